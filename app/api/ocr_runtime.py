@@ -0,0 +1,129 @@
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+from app.application.dtos.responses.general_response import GeneralResponse
+from app.application.services.face_service import FaceService
+from app.application.services.ocr_service import OcrService
+from app.infrastructure.face_adapter import OpenCvFaceAdapter
+from app.infrastructure.in_memory_ocr_metrics import InMemoryOcrMetrics
+from app.infrastructure.in_memory_ocr_result_cache import InMemoryOcrResultCache
+from app.infrastructure.ocr_engine_router import OcrEngineRouter
+from app.infrastructure.ocr_adapter import EasyOcrAdapter
+from app.infrastructure.paddle_ocr_adapter import PaddleOcrAdapter
+
+# Trabajos que ejecuta el OcrWorkerPool. El router los referencia por nombre, asi que este
+# modulo (y los motores OCR) solo se importa dentro del worker que los ejecuta.
+_adapter = PaddleOcrAdapter()
+_fallback_adapter = EasyOcrAdapter()
+_face_adapter = OpenCvFaceAdapter()
+# Cache de resultados por proceso worker (los reintentos del kiosko suelen llegar en segundos)
+_result_cache = InMemoryOcrResultCache()
+_warm_report: dict[str, dict] | None = None
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OcrJobResult:
+    response: GeneralResponse
+    face_response: GeneralResponse | None = None
+    metrics: dict[str, dict[str, int]] | None = None
+    engine_stats: dict[str, dict[str, dict[str, float]]] | None = None
+
+
+def warm_up_engines() -> dict[str, dict]:
+    # El initializer de cada worker lo ejecuta y los sondeos solo leen el reporte; un motor que
+    # fallo (descarga de modelos, disco lleno) se reintenta en el siguiente sondeo
+    global _warm_report
+    if _warm_report is None or not all(info["ready"] for info in _warm_report.values()):
+        report = dict(_warm_report or {})
+        for adapter in (_adapter, _fallback_adapter):
+            if report.get(adapter.name, {}).get("ready"):
+                continue
+            start = time.perf_counter()
+            try:
+                adapter.warm_up()
+            except Exception as exc:
+                logger.exception("ocr_warmup_failed engine=%s", adapter.name)
+                report[adapter.name] = {"ready": False, "error": str(exc)}
+            else:
+                report[adapter.name] = {"ready": True, **adapter.load_stats}
+            report[adapter.name]["warmup_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(
+            "ocr_engines_loaded pid=%s %s",
+            os.getpid(),
+            " ".join(
+                f"{engine}_{key}={value}"
+                for engine, info in report.items()
+                for key, value in info.items()
+                if key.endswith("_ms")
+            ),
+        )
+        _warm_report = report
+    return _warm_report
+
+
+def build_ocr_service(
+    metrics: InMemoryOcrMetrics,
+    engine_stats: OcrEngineRouter | None = None,
+    primary: str | None = None,
+) -> OcrService:
+    port, fallback_port = _adapter, _fallback_adapter
+    # El router de la API elige el motor primario segun latencia y exito observados
+    if primary == fallback_port.name:
+        port, fallback_port = fallback_port, port
+    return OcrService(
+        port=port,
+        fallback_port=fallback_port,
+        metrics=metrics,
+        cache=_result_cache,
+        engine_stats=engine_stats,
+    )
+
+
+def build_face_service() -> FaceService:
+    return FaceService(port=_face_adapter)
+
+
+def run_extraer_cedula(image_bytes: bytes, spare_capacity: bool = False, primary: str | None = None) -> OcrJobResult:
+    metrics = InMemoryOcrMetrics()
+    engine_stats = OcrEngineRouter()
+    service = build_ocr_service(metrics, engine_stats, primary)
+    response, document = service.extraer_cedula_con_documento(image_bytes, spare_capacity=spare_capacity)
+    face_response = None
+    data = response.data or {}
+    if response.success and data.get("es_cedula"):
+        face_response = build_face_service().extraer_rostro(image_bytes, document)
+        face_data = face_response.data or {}
+        metrics.increment("cedula_face", face_data.get("source", "not_found"))
+    return OcrJobResult(
+        response=response,
+        face_response=face_response,
+        metrics=metrics.snapshot(),
+        engine_stats=engine_stats.snapshot(),
+    )
+
+
+def run_extraer_placa(image_bytes: bytes, spare_capacity: bool = False, primary: str | None = None) -> OcrJobResult:
+    metrics = InMemoryOcrMetrics()
+    engine_stats = OcrEngineRouter()
+    service = build_ocr_service(metrics, engine_stats, primary)
+    response = service.extraer_placa(image_bytes, spare_capacity=spare_capacity)
+    return OcrJobResult(response=response, metrics=metrics.snapshot(), engine_stats=engine_stats.snapshot())
+
+
+def run_extraer_placa_rafaga(
+    frames: list[bytes],
+    spare_capacity: bool = False,
+    primary: str | None = None,
+) -> OcrJobResult:
+    metrics = InMemoryOcrMetrics()
+    engine_stats = OcrEngineRouter()
+    service = build_ocr_service(metrics, engine_stats, primary)
+    response = service.extraer_placa_rafaga(frames, spare_capacity=spare_capacity)
+    return OcrJobResult(response=response, metrics=metrics.snapshot(), engine_stats=engine_stats.snapshot())
+
+
+def run_extraer_rostro(image_bytes: bytes) -> OcrJobResult:
+    return OcrJobResult(response=build_face_service().extraer_rostro(image_bytes))
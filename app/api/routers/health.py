@@ -0,0 +1,31 @@
+import logging
+
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse
+
+from app.application.dtos.responses.general_response import GeneralResponse, ErrorDTO
+
+router = APIRouter(prefix="/health", tags=["Health"])
+logger = logging.getLogger(__name__)
+
+
+@router.get("/ready")
+async def readiness(request: Request):
+    # Sin OCR (ENABLE_OCR=false) no hay motores que esperar
+    ocr_readiness = getattr(request.app.state, "ocr_readiness", None)
+    if ocr_readiness is None:
+        return GeneralResponse(success=True, message="Servicio listo", data={"warming": False, "engines": {}})
+
+    data = ocr_readiness.snapshot()
+    if ocr_readiness.is_ready():
+        return GeneralResponse(success=True, message="Servicio listo", data=data)
+
+    message = "Motores OCR en calentamiento" if data["warming"] else "Motores OCR no disponibles"
+    response = GeneralResponse(
+        success=False,
+        message=message,
+        data=data,
+        error=ErrorDTO(code="NOT_READY", message=message),
+    )
+    logger.warning("readiness_response status=503 payload=%s", response.model_dump())
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=response.model_dump())
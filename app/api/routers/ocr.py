@@ -1,6 +1,11 @@
+import asyncio
 import base64
 import binascii
+import copy
+import hashlib
 import logging
+import os
+import time
 
 from fastapi import APIRouter, Depends, File, UploadFile, status
 from fastapi.responses import JSONResponse
@@ -11,19 +16,53 @@ from app.api.deps import get_db
 from app.application.dtos.responses.general_response import GeneralResponse, ErrorDTO
 from app.application.services.acceso_service import AccesoService
 from app.application.services.face_compare_service import FaceCompareService
-from app.application.services.face_service import FaceService
-from app.application.services.ocr_service import OcrService
 from app.infrastructure.acceso_repository import AccesoRepository
 from app.infrastructure.face_compare_adapter import MockFaceCompareAdapter
-from app.infrastructure.face_adapter import OpenCvFaceAdapter
-from app.infrastructure.ocr_adapter import EasyOcrAdapter
-from app.infrastructure.paddle_ocr_adapter import PaddleOcrAdapter
+from app.infrastructure.frame_burst import split_mjpeg, subsample_frames
+from app.infrastructure.image_quality import ImageQualityGate
+from app.infrastructure.in_memory_face_descriptor_store import InMemoryFaceDescriptorStore
+from app.infrastructure.in_memory_face_token_cache import InMemoryFaceTokenCache
+from app.infrastructure.in_memory_ocr_metrics import InMemoryOcrMetrics
+from app.infrastructure.ocr_engine_readiness import OcrEngineReadiness
+from app.infrastructure.ocr_engine_router import OcrEngineRouter, classify_request
+from app.infrastructure.ocr_worker_pool import OcrPoolSaturatedError, OcrWorkerPool
+from app.infrastructure.single_flight import SingleFlight
 
 router = APIRouter(prefix="/ocr", tags=["OCR"])
 logger = logging.getLogger(__name__)
-_adapter = PaddleOcrAdapter()
-_fallback_adapter = EasyOcrAdapter()
-_face_adapter = OpenCvFaceAdapter()
+_OCR_WARMUP = os.getenv("OCR_WARMUP", "true").lower() in {"1", "true", "yes"}
+# Intentos de calentamiento antes de declarar los motores no disponibles; la espera se duplica en cada uno
+_WARMUP_ATTEMPTS = max(1, int(os.getenv("OCR_WARMUP_ATTEMPTS", "5")))
+_WARMUP_BACKOFF_SECONDS = float(os.getenv("OCR_WARMUP_BACKOFF_SECONDS", "2"))
+_WARMUP_BACKOFF_MAX_SECONDS = 60.0
+_ADAPTIVE_ROUTING = os.getenv("OCR_ADAPTIVE_ROUTING", "true").lower() in {"1", "true", "yes"}
+# Motores en el orden por defecto (primario, respaldo); coinciden con el atributo name de cada adapter
+_OCR_ENGINES = ("paddle", "easyocr")
+# Trabajos por nombre: easyocr/torch/paddleocr se importan en el worker, no en la API
+_CEDULA_JOB = "app.api.ocr_runtime:run_extraer_cedula"
+_PLACA_JOB = "app.api.ocr_runtime:run_extraer_placa"
+_PLACA_RAFAGA_JOB = "app.api.ocr_runtime:run_extraer_placa_rafaga"
+_ROSTRO_JOB = "app.api.ocr_runtime:run_extraer_rostro"
+_WARMUP_JOB = "app.api.ocr_runtime:warm_up_engines"
+# OCR y deteccion de rostro corren en el pool para no bloquear el event loop
+ocr_pool = OcrWorkerPool(warmup=_WARMUP_JOB if _OCR_WARMUP else None)
+ocr_readiness = OcrEngineReadiness()
+_ocr_metrics = InMemoryOcrMetrics()
+# La misma foto enviada a la vez (dos tablets, reintento del cliente) se procesa una sola vez
+_single_flight = SingleFlight()
+_engine_router = OcrEngineRouter()
+# Rechaza fotos borrosas, oscuras o con reflejos antes de ocupar un worker
+_quality_gate = ImageQualityGate()
+# Rostro de la cedula (y sus descriptores) que /ocr/face-compare recibe por token en lugar de base64
+_face_tokens = InMemoryFaceTokenCache()
+# Descriptores del rostro por numero de cedula, para no recalcularlos en cada visita
+# (requiere OpenCvFaceCompareAdapter, el unico comparador que produce descriptores)
+_face_descriptors = InMemoryFaceDescriptorStore()
+# Cada foto de la rafaga se lee como una placa suelta, asi que comparte sus estadisticas de motor
+_ROUTED_OPERATION = {"placa_rafaga": "placa"}
+_BURST_MAX_FRAMES = int(os.getenv("OCR_BURST_MAX_FRAMES", "15"))
+_IMAGE_TYPES = {"image/jpeg", "image/png"}
+_MJPEG_TYPES = {"video/x-motion-jpeg", "video/mjpeg", "multipart/x-mixed-replace"}
 # Modo temporal: comparar rostros con resultado controlado localmente (sin proveedor externo).
 # Cambia a False para simular no coincidencia.
 _FACE_COMPARE_FORCE_MATCH = True
@@ -42,18 +81,158 @@ def _sanitize_for_log(value, key: str | None = None):
     if isinstance(value, str):
         if key and "base64" in key.lower():
             return f"<base64 len={len(value)}>"
+        # Quien tenga el token puede comparar contra el rostro de la cedula
+        if key and key.lower().endswith("token"):
+            return "<token>"
         if len(value) > 240:
             return f"{value[:240]}..."
 
     return value
 
 
-def get_ocr_service() -> OcrService:
-    return OcrService(port=_adapter, fallback_port=_fallback_adapter)
+def _busy_response(log_prefix: str, exc: OcrPoolSaturatedError) -> JSONResponse:
+    response = GeneralResponse(
+        success=False,
+        message="Servicio OCR saturado, intente nuevamente",
+        error=ErrorDTO(
+            code="OCR_BUSY",
+            message="Servicio OCR saturado, intente nuevamente",
+            details={"retry_after": exc.retry_after},
+        ),
+    )
+    logger.warning("%s status=503 payload=%s", log_prefix, _sanitize_for_log(response))
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=response.model_dump(),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _check_quality(
+    operation: str,
+    image_bytes: bytes,
+    log_prefix: str,
+    kind: str = "document",
+) -> JSONResponse | None:
+    if not _quality_gate.enabled:
+        return None
+    # Decodifica una copia reducida en gris; fuera del event loop igual que el resto del trabajo con imagenes
+    report = await asyncio.to_thread(_quality_gate.check, image_bytes, kind)
+    _ocr_metrics.increment("quality_gate", f"{operation}_checked")
+    if report.ok:
+        return None
+    _ocr_metrics.increment("quality_gate", f"{operation}_{report.code.lower()}")
+    if not _quality_gate.enforcing:
+        logger.info("%s quality_gate_report code=%s metrics=%s", log_prefix, report.code, report.metrics)
+        return None
+    _ocr_metrics.increment("quality_gate", f"{operation}_rejected")
+    response = GeneralResponse(
+        success=False,
+        message=report.message,
+        error=ErrorDTO(code=report.code, message=report.message, details=report.metrics),
+    )
+    logger.warning("%s status=422 payload=%s", log_prefix, _sanitize_for_log(response))
+    return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=response.model_dump())
+
+
+def _quality_rejection_rates(counters: dict[str, int]) -> dict[str, float]:
+    # Fraccion de fotos marcadas por operacion (rechazadas, o que se rechazarian en modo report)
+    rates = {}
+    for key, checked in counters.items():
+        if not key.endswith("_checked") or not checked:
+            continue
+        operation = key[: -len("_checked")]
+        flagged = sum(
+            amount
+            for name, amount in counters.items()
+            if name.startswith(f"{operation}_image_")
+        )
+        rates[operation] = round(flagged / checked, 4)
+    return rates
+
+
+async def warm_up_ocr() -> None:
+    if not _OCR_WARMUP:
+        ocr_readiness.finish()
+        return
+    # Si el pool se recrea durante el calentamiento, el de la nueva generacion toma el relevo
+    generation = ocr_pool.generation
+    start = time.perf_counter()
+    delay = _WARMUP_BACKOFF_SECONDS
+    for attempt in range(1, _WARMUP_ATTEMPTS + 1):
+        final = attempt == _WARMUP_ATTEMPTS
+        try:
+            reports = await ocr_pool.warm_up()
+        except Exception:
+            logger.exception("ocr_warmup_failed attempt=%s", attempt)
+            reports = {0: {"ocr_pool": {"ready": False, "error": "warmup failed"}}}
+        if ocr_pool.generation != generation:
+            return
+        ocr_readiness.record(reports, expected_workers=max(ocr_pool.workers, 1), final=final)
+        if ocr_readiness.is_ready() or final:
+            break
+        logger.warning(
+            "ocr_warmup_retry attempt=%s delay_s=%.1f readiness=%s",
+            attempt,
+            delay,
+            ocr_readiness.snapshot(),
+        )
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, _WARMUP_BACKOFF_MAX_SECONDS)
+    logger.info(
+        "ocr_warmup_finished duration_ms=%.2f readiness=%s",
+        (time.perf_counter() - start) * 1000,
+        ocr_readiness.snapshot(),
+    )
+
+
+_warmup_tasks: set[asyncio.Task] = set()
+
+
+def _on_pool_reset() -> None:
+    # Workers nuevos arrancan frios: /health/ready vuelve a 503 hasta calentarlos
+    ocr_readiness.reset()
+    task = asyncio.get_running_loop().create_task(warm_up_ocr())
+    _warmup_tasks.add(task)
+    task.add_done_callback(_warmup_tasks.discard)
 
 
-def get_face_service() -> FaceService:
-    return FaceService(port=_face_adapter)
+ocr_pool.on_reset = _on_pool_reset
+
+
+async def _run_ocr_job(operation: str, job_name: str, image_bytes: bytes | list[bytes]):
+    key = (operation, _payload_digest(image_bytes))
+    job, shared = await _single_flight.run(key, lambda: _submit_ocr_job(operation, job_name, image_bytes))
+    if not shared:
+        return job
+    _ocr_metrics.increment("ocr_single_flight", f"{operation}_coalesced")
+    # Cada request completa su propia copia de data (p. ej. la foto del rostro en /cedula)
+    return copy.deepcopy(job)
+
+
+def _payload_digest(image_bytes: bytes | list[bytes]) -> str:
+    if isinstance(image_bytes, bytes):
+        return hashlib.sha256(image_bytes).hexdigest()
+    digest = hashlib.sha256()
+    for frame in image_bytes:
+        digest.update(hashlib.sha256(frame).digest())
+    return digest.hexdigest()
+
+
+async def _submit_ocr_job(operation: str, job_name: str, image_bytes: bytes | list[bytes]):
+    args = (image_bytes,)
+    if job_name != _ROSTRO_JOB:
+        primary = None
+        if _ADAPTIVE_ROUTING:
+            sample = image_bytes if isinstance(image_bytes, bytes) else image_bytes[0]
+            request_class = classify_request(_ROUTED_OPERATION.get(operation, operation), sample)
+            primary = _engine_router.choose(request_class, list(_OCR_ENGINES))
+        # Con workers libres, el modo hedged lanza el motor de respaldo sin esperar
+        args += (ocr_pool.has_spare_capacity(), primary)
+    job = await ocr_pool.run(job_name, *args)
+    _ocr_metrics.merge(job.metrics)
+    _engine_router.merge(job.engine_stats)
+    return job
 
 
 def get_face_compare_service() -> FaceCompareService:
@@ -66,7 +245,9 @@ def get_acceso_service(db: Session = Depends(get_db)) -> AccesoService:
 
 class FaceCompareRequest(BaseModel):
     accesoPk: int | None = None
-    foto_cedula_base64: str
+    # Uno de los dos: el token que devolvio /ocr/cedula o la foto de la cedula en base64
+    foto_cedula_base64: str | None = None
+    foto_cedula_token: str | None = None
     foto_rostro_vivo_base64: str
 
 
@@ -85,8 +266,7 @@ class FaceCompareRequest(BaseModel):
 @router.post("/cedula")
 async def extract_cedula(
     file: UploadFile = File(...),
-    service: OcrService = Depends(get_ocr_service),
-    face_service: FaceService = Depends(get_face_service),
+    face_compare_service: FaceCompareService = Depends(get_face_compare_service),
 ):
     logger.info(
         "extract_cedula_request filename=%s content_type=%s",
@@ -105,7 +285,14 @@ async def extract_cedula(
 
     image_bytes = await file.read()
     logger.info("extract_cedula_image_bytes size=%s", len(image_bytes))
-    ocr_response = service.extraer_cedula(image_bytes)
+    rejected = await _check_quality("cedula", image_bytes, "extract_cedula_response")
+    if rejected is not None:
+        return rejected
+    try:
+        job = await _run_ocr_job("cedula", _CEDULA_JOB, image_bytes)
+    except OcrPoolSaturatedError as exc:
+        return _busy_response("extract_cedula_response", exc)
+    ocr_response = job.response
     if not ocr_response.success:
         logger.warning("extract_cedula_response status=500 payload=%s", _sanitize_for_log(ocr_response))
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=ocr_response.model_dump())
@@ -114,11 +301,12 @@ async def extract_cedula(
     if not data.get("es_cedula"):
         data["foto_base64"] = None
         data["foto_formato"] = None
+        data["foto_token"] = None
         response = GeneralResponse(success=True, message=ocr_response.message, data=data)
         logger.info("extract_cedula_response status=200 payload=%s", _sanitize_for_log(response))
         return response
 
-    face_response = face_service.extraer_rostro(image_bytes)
+    face_response = job.face_response
     if not face_response.success:
         logger.warning("extract_cedula_response status=500 payload=%s", _sanitize_for_log(face_response))
         return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=face_response.model_dump())
@@ -126,13 +314,14 @@ async def extract_cedula(
     face_data = face_response.data or {}
     data["foto_base64"] = face_data.get("image_base64")
     data["foto_formato"] = face_data.get("format")
+    data["foto_token"] = await _issue_face_token(data["foto_base64"], data.get("cedula"), face_compare_service)
     response = GeneralResponse(success=True, message=ocr_response.message, data=data)
     logger.info("extract_cedula_response status=200 payload=%s", _sanitize_for_log(response))
     return response
 
 
 @router.post("/placa")
-async def extract_placa(file: UploadFile = File(...), service: OcrService = Depends(get_ocr_service)):
+async def extract_placa(file: UploadFile = File(...)):
     logger.info(
         "extract_placa_request filename=%s content_type=%s",
         file.filename,
@@ -150,7 +339,14 @@ async def extract_placa(file: UploadFile = File(...), service: OcrService = Depe
 
     image_bytes = await file.read()
     logger.info("extract_placa_image_bytes size=%s", len(image_bytes))
-    response = service.extraer_placa(image_bytes)
+    rejected = await _check_quality("placa", image_bytes, "extract_placa_response", kind="scene")
+    if rejected is not None:
+        return rejected
+    try:
+        job = await _run_ocr_job("placa", _PLACA_JOB, image_bytes)
+    except OcrPoolSaturatedError as exc:
+        return _busy_response("extract_placa_response", exc)
+    response = job.response
     if response.success:
         logger.info("extract_placa_response status=200 payload=%s", _sanitize_for_log(response))
         return response
@@ -158,8 +354,64 @@ async def extract_placa(file: UploadFile = File(...), service: OcrService = Depe
     return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=response.model_dump())
 
 
+@router.post("/placa/rafaga")
+async def extract_placa_rafaga(files: list[UploadFile] = File(...)):
+    logger.info(
+        "extract_placa_rafaga_request files=%s content_types=%s",
+        len(files),
+        [file.content_type for file in files],
+    )
+
+    frames: list[bytes] = []
+    for file in files:
+        # multipart/x-mixed-replace llega con "; boundary=..."
+        media_type = (file.content_type or "").split(";")[0].strip().lower()
+        if media_type not in _IMAGE_TYPES | _MJPEG_TYPES:
+            response = GeneralResponse(
+                success=False,
+                message="Solo se permiten imagenes JPG o PNG o clips MJPEG",
+                error=ErrorDTO(code="UNSUPPORTED_MEDIA", message="Solo se permiten imagenes JPG o PNG o clips MJPEG"),
+            )
+            logger.warning("extract_placa_rafaga_response status=415 payload=%s", _sanitize_for_log(response))
+            return JSONResponse(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, content=response.model_dump())
+        content = await file.read()
+        frames.extend(split_mjpeg(content) if media_type in _MJPEG_TYPES else [content])
+
+    if not frames:
+        message = "La rafaga no trae fotos"
+        response = GeneralResponse(
+            success=False,
+            message=message,
+            error=ErrorDTO(code="INVALID_BURST", message=message, details={"frames": len(frames)}),
+        )
+        logger.warning("extract_placa_rafaga_response status=400 payload=%s", _sanitize_for_log(response))
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=response.model_dump())
+
+    received = len(frames)
+    if received > _BURST_MAX_FRAMES:
+        # Un clip largo no se rechaza: se toman fotos repartidas en el tiempo hasta el maximo
+        frames = subsample_frames(frames, _BURST_MAX_FRAMES)
+        _ocr_metrics.increment("placa_rafaga", "frames_subsampled", received - len(frames))
+    logger.info(
+        "extract_placa_rafaga_frames received=%s count=%s bytes=%s",
+        received,
+        len(frames),
+        sum(len(frame) for frame in frames),
+    )
+    try:
+        job = await _run_ocr_job("placa_rafaga", _PLACA_RAFAGA_JOB, frames)
+    except OcrPoolSaturatedError as exc:
+        return _busy_response("extract_placa_rafaga_response", exc)
+    response = job.response
+    if response.success:
+        logger.info("extract_placa_rafaga_response status=200 payload=%s", _sanitize_for_log(response))
+        return response
+    logger.warning("extract_placa_rafaga_response status=500 payload=%s", _sanitize_for_log(response))
+    return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=response.model_dump())
+
+
 @router.post("/foto")
-async def extract_foto(file: UploadFile = File(...), service: FaceService = Depends(get_face_service)):
+async def extract_foto(file: UploadFile = File(...)):
     logger.info(
         "extract_foto_request filename=%s content_type=%s",
         file.filename,
@@ -177,7 +429,14 @@ async def extract_foto(file: UploadFile = File(...), service: FaceService = Depe
 
     image_bytes = await file.read()
     logger.info("extract_foto_image_bytes size=%s", len(image_bytes))
-    response = service.extraer_rostro(image_bytes)
+    rejected = await _check_quality("foto", image_bytes, "extract_foto_response", kind="scene")
+    if rejected is not None:
+        return rejected
+    try:
+        job = await _run_ocr_job("foto", _ROSTRO_JOB, image_bytes)
+    except OcrPoolSaturatedError as exc:
+        return _busy_response("extract_foto_response", exc)
+    response = job.response
     if response.success:
         logger.info("extract_foto_response status=200 payload=%s", _sanitize_for_log(response))
         return response
@@ -185,6 +444,18 @@ async def extract_foto(file: UploadFile = File(...), service: FaceService = Depe
     return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=response.model_dump())
 
 
+@router.get("/metrics")
+async def get_ocr_metrics():
+    data = _ocr_metrics.snapshot()
+    data["ocr_pool"] = ocr_pool.stats()
+    data["ocr_pool"]["single_flight_in_flight"] = _single_flight.in_flight()
+    data["engine_router"] = _engine_router.snapshot()
+    # Emitidos/usados salen de los contadores; vencidos, desalojados y vigentes, del cache
+    data.setdefault("face_token", {}).update(_face_tokens.stats())
+    data["quality_gate_rejection_rate"] = _quality_rejection_rates(data.get("quality_gate", {}))
+    return GeneralResponse(success=True, message="Metricas OCR", data=data)
+
+
 @router.post("/face-compare")
 async def compare_faces(
     payload: FaceCompareRequest,
@@ -192,14 +463,40 @@ async def compare_faces(
     acceso_service: AccesoService = Depends(get_acceso_service),
 ):
     logger.info(
-        "compare_faces_request acceso_pk=%s cedula_base64_len=%s vivo_base64_len=%s",
+        "compare_faces_request acceso_pk=%s cedula_base64_len=%s cedula_token=%s vivo_base64_len=%s",
         payload.accesoPk,
         len(payload.foto_cedula_base64 or ""),
+        bool(payload.foto_cedula_token),
         len(payload.foto_rostro_vivo_base64 or ""),
     )
 
+    template = None
+    if payload.foto_cedula_token:
+        template = _face_tokens.get(payload.foto_cedula_token)
+        _ocr_metrics.increment("face_token", "hits" if template is not None else "misses")
+        # Sin base64 de respaldo no hay con que comparar (token vencido o emitido por otro proceso)
+        if template is None and not payload.foto_cedula_base64:
+            response = GeneralResponse(
+                success=False,
+                message="Token de rostro vencido o desconocido, envie la foto de la cedula",
+                error=ErrorDTO(
+                    code="FACE_TOKEN_NOT_FOUND",
+                    message="Token de rostro vencido o desconocido, envie la foto de la cedula",
+                ),
+            )
+            logger.warning("compare_faces_response status=404 payload=%s", _sanitize_for_log(response))
+            return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content=response.model_dump())
+    elif not payload.foto_cedula_base64:
+        response = GeneralResponse(
+            success=False,
+            message="Envie foto_cedula_base64 o foto_cedula_token",
+            error=ErrorDTO(code="MISSING_IMAGE", message="Envie foto_cedula_base64 o foto_cedula_token"),
+        )
+        logger.warning("compare_faces_response status=400 payload=%s", _sanitize_for_log(response))
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=response.model_dump())
+
     try:
-        image_a = _decode_base64(payload.foto_cedula_base64)
+        image_a = template.image if template is not None else _decode_base64(payload.foto_cedula_base64)
         image_b = _decode_base64(payload.foto_rostro_vivo_base64)
     except ValueError:
         response = GeneralResponse(
@@ -210,7 +507,16 @@ async def compare_faces(
         logger.warning("compare_faces_response status=400 payload=%s", _sanitize_for_log(response))
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=response.model_dump())
 
-    response = service.comparar(image_a, image_b)
+    # Ambas son fotos de rostro (la de la cedula ya viene recortada por /ocr/cedula).
+    # La del token salio de una foto que ya paso el control en /ocr/cedula
+    for image in (image_b,) if template is not None else (image_a, image_b):
+        rejected = await _check_quality("face_compare", image, "compare_faces_response", kind="face")
+        if rejected is not None:
+            return rejected
+
+    # Fuera del event loop: con un comparador local la deteccion ocupa CPU y varias comparaciones corren en paralelo
+    descriptor_a = template.descriptor if template is not None else None
+    response = await asyncio.to_thread(service.comparar, image_a, image_b, descriptor_a)
     if response.success:
         if payload.accesoPk is not None:
             response_data = response.data or {}
@@ -243,6 +549,33 @@ async def compare_faces(
     return JSONResponse(status_code=status_code, content=response.model_dump())
 
 
+async def _issue_face_token(
+    image_base64: str | None,
+    cedula: str | None,
+    service: FaceCompareService,
+) -> str | None:
+    if not image_base64 or not _face_tokens.enabled:
+        return None
+    stored = _face_descriptors.get(cedula) if cedula else None
+    if stored is not None:
+        # Visitante frecuente: se compara contra el rostro ya descrito, solo falta procesar la selfie.
+        # Se usa el recorte guardado junto a su descriptor; mezclarlo con el recorte de hoy dejaria
+        # una imagen que no corresponde a lo que se compara
+        _ocr_metrics.increment("face_descriptor_store", "hits")
+        template = stored
+    else:
+        template = await asyncio.to_thread(service.preparar_rostro, base64.b64decode(image_base64))
+        # Solo OpenCvFaceCompareAdapter produce descriptores: con el mock (get_face_compare_service)
+        # o el proveedor HTTP el almacen queda vacio y cada visita procesa la foto de la cedula
+        if cedula and template.descriptor is not None and _face_descriptors.enabled:
+            _ocr_metrics.increment("face_descriptor_store", "misses")
+            evicted = _face_descriptors.put(cedula, template)
+            if evicted:
+                _ocr_metrics.increment("face_descriptor_store", "evicted", evicted)
+    _ocr_metrics.increment("face_token", "issued")
+    return _face_tokens.put(template)
+
+
 def _decode_base64(value: str) -> bytes:
     raw = value.strip()
     if raw.lower().startswith("data:") and "," in raw:
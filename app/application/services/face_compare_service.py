@@ -1,5 +1,7 @@
+from typing import Any
+
 from app.application.dtos.responses.general_response import GeneralResponse, ErrorDTO
-from app.domain.face import FaceComparePort, FaceCompareProviderError
+from app.domain.face import FaceComparePort, FaceCompareProviderError, FaceTemplate
 from app.infrastructure.face_compare_image_storage import LocalFaceCompareImageStorage
 
 
@@ -8,7 +10,15 @@ class FaceCompareService:
         self.port = port
         self.image_storage = image_storage or LocalFaceCompareImageStorage()
 
-    def comparar(self, image_a: bytes, image_b: bytes) -> GeneralResponse[dict]:
+    def preparar_rostro(self, image: bytes) -> FaceTemplate:
+        # Descriptores del rostro de la cedula calculados una vez; si fallan, compare los recalcula
+        try:
+            descriptor = self.port.describe(image)
+        except Exception:
+            descriptor = None
+        return FaceTemplate(image=image, descriptor=descriptor)
+
+    def comparar(self, image_a: bytes, image_b: bytes, descriptor_a: Any = None) -> GeneralResponse[dict]:
         if not image_a or not image_b:
             return GeneralResponse(
                 success=False,
@@ -30,7 +40,7 @@ class FaceCompareService:
             )
 
         try:
-            result = self.port.compare(image_a, image_b)
+            result = self.port.compare(image_a, image_b, descriptor_a)
         except FaceCompareProviderError as exc:
             return GeneralResponse(
                 success=False,
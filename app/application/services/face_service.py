@@ -1,14 +1,22 @@
 import base64
 
 from app.application.dtos.responses.general_response import GeneralResponse, ErrorDTO
+from app.domain.ecuador_id import LAYOUT_ANTIGUA, LAYOUT_NUEVA
 from app.domain.face import FacePort
+from app.domain.ocr import PreparedImage
+
+# Zona (x, y, w, h) de la foto en cada formato de cedula normalizada, con holgura para el deskew
+_CEDULA_PHOTO_ZONES = {
+    LAYOUT_NUEVA: (0.0, 0.08, 0.36, 0.70),
+    LAYOUT_ANTIGUA: (0.0, 0.06, 0.34, 0.88),
+}
 
 
 class FaceService:
     def __init__(self, port: FacePort):
         self.port = port
 
-    def extraer_rostro(self, image_bytes: bytes) -> GeneralResponse[dict]:
+    def extraer_rostro(self, image_bytes: bytes, document: PreparedImage | None = None) -> GeneralResponse[dict]:
         if not image_bytes:
             return GeneralResponse(
                 success=False,
@@ -17,7 +25,16 @@ class FaceService:
             )
 
         try:
-            face_bytes = self.port.extract_face(image_bytes)
+            # Con el documento ya normalizado por el OCR basta buscar en la zona de la foto;
+            # la busqueda completa (con rotaciones) sobre la foto original queda como respaldo
+            face_bytes = None
+            source = "document_zone"
+            zone = _CEDULA_PHOTO_ZONES.get(document.layout) if document is not None else None
+            if zone is not None:
+                face_bytes = self.port.extract_face_in_region(document.image, zone, document.color)
+            if not face_bytes:
+                source = "full_image"
+                face_bytes = self.port.extract_face(image_bytes)
         except Exception as exc:
             return GeneralResponse(
                 success=False,
@@ -36,5 +53,5 @@ class FaceService:
         return GeneralResponse(
             success=True,
             message="Rostro extraido",
-            data={"image_base64": encoded, "format": "jpg"},
+            data={"image_base64": encoded, "format": "jpg", "source": source},
         )
@@ -1,5 +1,16 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from dataclasses import dataclass, field
+
 from app.application.dtos.responses.general_response import GeneralResponse, ErrorDTO
 from app.domain.ecuador_id import (
+    LAYOUT_ANTIGUA,
+    LAYOUT_NUEVA,
     extraer_cedula,
     extraer_cedula_etiquetada,
     extraer_cedula_patron,
@@ -7,13 +18,90 @@ from app.domain.ecuador_id import (
     validar_cedula,
 )
 from app.domain.placa import extraer_placa, extraer_placa_en_lineas
-from app.domain.ocr import OcrPort
+from app.domain.ocr import OcrPass, OcrPort, OcrResult, PreparedImage
+from app.infrastructure.frame_burst import frame_sharpness
+from app.infrastructure.in_memory_ocr_metrics import InMemoryOcrMetrics
+from app.infrastructure.in_memory_ocr_result_cache import InMemoryOcrResultCache
+from app.infrastructure.ocr_engine_router import OcrEngineRouter, classify_request
+
+
+logger = logging.getLogger(__name__)
+
+# Un lock por motor (adapter compartido por el proceso): los modelos no son seguros entre hilos y el
+# perdedor del modo hedged termina su etapa en segundo plano mientras el worker ya atiende otro trabajo
+_ENGINE_LOCKS: "weakref.WeakKeyDictionary[OcrPort, threading.Lock]" = weakref.WeakKeyDictionary()
+_ENGINE_LOCKS_GUARD = threading.Lock()
+
+
+@dataclass
+class _CedulaOcrRun:
+    engine: str
+    layout: str | None = None
+    full_result: OcrResult | None = None
+    digits_only_result: OcrResult | None = None
+    roi_results: list[OcrResult] = field(default_factory=list)
+    name_results: list[OcrResult] = field(default_factory=list)
+    cedula: str | None = None
+    nombres: str | None = None
+    stage: str | None = None
+    budget_exhausted: bool = False
+    inference_count: int = 0
+    detection_count: int = 0
+    fingerprint: int | None = None
+    document: PreparedImage | None = None
+    cached: GeneralResponse | None = None
+    cancelled: bool = False
+    duration_ms: float = 0.0
+    error: GeneralResponse | None = None
+
+    def merged(self) -> tuple[OcrResult, OcrResult]:
+        result = self.full_result or OcrResult(text="", lines=[])
+        for name_result in self.name_results:
+            result = _merge_results(result, name_result)
+        digits_result = self.digits_only_result or OcrResult(text="", lines=[])
+        for roi_result in self.roi_results:
+            digits_result = _merge_digits(digits_result, roi_result)
+        return result, digits_result
+
+
+@dataclass
+class _PlacaOcrAttempt:
+    engine: str
+    result: OcrResult | None = None
+    fingerprint: int | None = None
+    # Error de OCR o respuesta tomada de la cache
+    early: GeneralResponse | None = None
+    placa: str | None = None
+    cancelled: bool = False
+    duration_ms: float = 0.0
 
 
 class OcrService:
-    def __init__(self, port: OcrPort, fallback_port: OcrPort | None = None):
+    def __init__(
+        self,
+        port: OcrPort,
+        fallback_port: OcrPort | None = None,
+        metrics: InMemoryOcrMetrics | None = None,
+        budget_ms: float | None = None,
+        cache: InMemoryOcrResultCache | None = None,
+        hedge_delay_ms: float | None = None,
+        engine_stats: OcrEngineRouter | None = None,
+    ):
         self.port = port
         self.fallback_port = fallback_port
+        self.metrics = metrics or InMemoryOcrMetrics()
+        self.cache = cache if cache is not None and cache.enabled else None
+        # Negativo: fallback secuencial; 0 o mas: el fallback arranca en paralelo tras esa espera
+        env_hedge = os.getenv("OCR_HEDGE_DELAY_MS", "-1")
+        self.hedge_delay_ms = hedge_delay_ms if hedge_delay_ms is not None else float(env_hedge)
+        # Latencia y exito por motor y clase de request, para el enrutamiento adaptativo
+        self.engine_stats = engine_stats
+        # Rafagas de placa: fotos mas nitidas que se leen y votos iguales que cierran la lectura
+        self.burst_top_k = int(os.getenv("OCR_BURST_TOP_K", "4"))
+        self.burst_consensus = int(os.getenv("OCR_BURST_CONSENSUS", "2"))
+        env_budget = os.getenv("OCR_CEDULA_BUDGET_MS", "0")
+        # 0 o negativo desactiva el presupuesto de latencia
+        self.budget_ms = budget_ms if budget_ms is not None else float(env_budget)
 
     def extraer_texto(self, image_bytes: bytes) -> GeneralResponse[dict]:
         if not image_bytes:
@@ -24,7 +112,8 @@ class OcrService:
             )
 
         try:
-            result = self.port.extract_text(image_bytes)
+            with _engine_lock(self.port):
+                result = self.port.extract_text(image_bytes)
         except Exception as exc:
             return GeneralResponse(
                 success=False,
@@ -44,44 +133,108 @@ class OcrService:
             },
         )
 
-    def extraer_cedula(self, image_bytes: bytes) -> GeneralResponse[dict]:
+    def extraer_cedula(self, image_bytes: bytes, spare_capacity: bool = False) -> GeneralResponse[dict]:
+        response, _ = self.extraer_cedula_con_documento(image_bytes, spare_capacity)
+        return response
+
+    def extraer_cedula_con_documento(
+        self,
+        image_bytes: bytes,
+        spare_capacity: bool = False,
+    ) -> tuple[GeneralResponse[dict], PreparedImage | None]:
+        # Ademas de la respuesta devuelve el documento normalizado de la corrida ganadora (None si
+        # salio de cache o fallo), para recortar el rostro sin volver a decodificar la foto
         if not image_bytes:
-            return GeneralResponse(
-                success=False,
-                message="Imagen vacia",
-                error=ErrorDTO(code="EMPTY_IMAGE", message="Imagen vacia"),
+            return (
+                GeneralResponse(
+                    success=False,
+                    message="Imagen vacia",
+                    error=ErrorDTO(code="EMPTY_IMAGE", message="Imagen vacia"),
+                ),
+                None,
             )
 
-        result, digits_result, roi_results, ocr_error = self._run_ocr_for_cedula(image_bytes, self.port)
-        if ocr_error and self.fallback_port is not None:
-            result, digits_result, roi_results, ocr_error = self._run_ocr_for_cedula(image_bytes, self.fallback_port)
-        if ocr_error:
-            return ocr_error
-
-        cedula, nombres = self._extraer_cedula_y_nombres(result, digits_result, roi_results)
-        if not cedula and self.fallback_port is not None:
-            fallback_result, fallback_digits, fallback_rois, fallback_error = self._run_ocr_for_cedula(
-                image_bytes, self.fallback_port
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        cached = self._cache_get("cedula", digest=digest)
+        if cached is not None:
+            return cached, None
+
+        started = time.perf_counter()
+        deadline = started + self.budget_ms / 1000 if self.budget_ms > 0 else None
+        if self._hedging_enabled():
+            runs = self._run_hedged(
+                "cedula",
+                [
+                    lambda cancel: self._run_ocr_for_cedula(image_bytes, self.port, deadline, True, cancel),
+                    lambda cancel: self._run_ocr_for_cedula(image_bytes, self.fallback_port, deadline, False, cancel),
+                ],
+                lambda current: bool(current.cedula) or current.cached is not None,
+                spare_capacity,
             )
-            if fallback_error:
-                return fallback_error
-            cedula, nombres = self._extraer_cedula_y_nombres(fallback_result, fallback_digits, fallback_rois)
-
-        if not cedula:
-            details = _build_debug_details(result, digits_result, roi_results)
-            return GeneralResponse(
-                success=True,
-                message="No es cedula ecuatoriana",
-                data={"cedula": None, "es_cedula": False, "nombres": None, "debug": details},
+        else:
+            runs = self._run_cedula_sequential(image_bytes, deadline)
+
+        inference_count = 0
+        detection_count = 0
+        budget_exhausted = False
+        run = None
+        for current in runs:
+            if current.cached is not None:
+                return current.cached, None
+            if not current.cancelled:
+                self._record_engine("cedula", image_bytes, current.engine, current.duration_ms, bool(current.cedula))
+            inference_count += current.inference_count
+            detection_count += current.detection_count
+            budget_exhausted = budget_exhausted or current.budget_exhausted
+            if run is None or (run.error and not current.error):
+                run = current
+            elif current.cedula and not run.cedula:
+                run = current
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "ocr_cedula_cascade engine=%s layout=%s stage=%s budget_exhausted=%s "
+            "inference_count=%s detection_count=%s duration_ms=%.2f",
+            run.engine,
+            run.layout,
+            run.stage,
+            budget_exhausted,
+            inference_count,
+            detection_count,
+            elapsed_ms,
+        )
+        if run.error:
+            self.metrics.increment("cedula_stage", "error")
+            return run.error, None
+
+        self.metrics.increment("cedula_stage", run.stage or "unresolved")
+        self.metrics.increment("cedula_layout", run.layout or "unknown")
+        if budget_exhausted:
+            self.metrics.increment("cedula_budget", "exhausted")
+
+        if not run.cedula:
+            result, digits_result = run.merged()
+            details = _build_debug_details(result, digits_result, run.roi_results, inference_count)
+            details["detection_count"] = detection_count
+            details["budget_exhausted"] = budget_exhausted
+            return (
+                GeneralResponse(
+                    success=True,
+                    message="No es cedula ecuatoriana",
+                    data={"cedula": None, "es_cedula": False, "nombres": None, "debug": details},
+                ),
+                run.document,
             )
 
-        return GeneralResponse(
+        response = GeneralResponse(
             success=True,
             message="Cedula procesada",
-            data={"cedula": cedula, "es_cedula": True, "nombres": nombres},
+            data={"cedula": run.cedula, "es_cedula": True, "nombres": run.nombres},
         )
+        self._cache_put("cedula", digest, run.fingerprint, response)
+        return response, run.document
 
-    def extraer_placa(self, image_bytes: bytes) -> GeneralResponse[dict]:
+    def extraer_placa(self, image_bytes: bytes, spare_capacity: bool = False) -> GeneralResponse[dict]:
         if not image_bytes:
             return GeneralResponse(
                 success=False,
@@ -89,107 +242,379 @@ class OcrService:
                 error=ErrorDTO(code="EMPTY_IMAGE", message="Imagen vacia"),
             )
 
-        result, ocr_error = self._run_ocr_for_placa(image_bytes, self.port)
-        if ocr_error and self.fallback_port is not None:
-            result, ocr_error = self._run_ocr_for_placa(image_bytes, self.fallback_port)
-        if ocr_error:
-            return ocr_error
-
-        placa = None
-        best_conf = -1.0
-        for line in result.lines:
-            candidata = extraer_placa(line.text)
-            if candidata and line.confidence > best_conf:
-                best_conf = line.confidence
-                placa = candidata
-
-        if not placa:
-            placa = extraer_placa(result.text)
-        if not placa:
-            placa = extraer_placa_en_lineas([line.text for line in result.lines])
-
-        if not placa:
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        cached = self._cache_get("placa", digest=digest)
+        if cached is not None:
+            return cached
+
+        response, winner = self._leer_placa(image_bytes, spare_capacity, lookup_similar=True)
+        if winner is not None and winner.placa:
+            self._cache_put("placa", digest, winner.fingerprint, response)
+        return response
+
+    def extraer_placa_rafaga(self, frames: list[bytes], spare_capacity: bool = False) -> GeneralResponse[dict]:
+        frames = [frame for frame in frames if frame]
+        if not frames:
+            return GeneralResponse(
+                success=False,
+                message="Imagen vacia",
+                error=ErrorDTO(code="EMPTY_IMAGE", message="Imagen vacia"),
+            )
+
+        # Solo las K fotos mas nitidas pasan por OCR, de la mas nitida a la menos
+        scored = sorted(((frame_sharpness(frame), idx) for idx, frame in enumerate(frames)), reverse=True)
+        readable = [idx for score, idx in scored if score >= 0]
+        selected = readable[: max(self.burst_top_k, 1)]
+        self.metrics.increment("placa_rafaga", "frames", len(frames))
+        if len(readable) < len(frames):
+            self.metrics.increment("placa_rafaga", "unreadable_frames", len(frames) - len(readable))
+        if not selected:
+            return GeneralResponse(
+                success=False,
+                message="Ninguna foto de la rafaga se pudo decodificar",
+                error=ErrorDTO(code="INVALID_IMAGE", message="Ninguna foto de la rafaga se pudo decodificar"),
+            )
+
+        votes: dict[str, int] = {}
+        processed = errors = 0
+        last_error = None
+        for idx in selected:
+            # Sin cache por similitud: fotos casi identicas de la rafaga deben votar por separado
+            response, _ = self._leer_placa(frames[idx], spare_capacity, lookup_similar=False)
+            processed += 1
+            if not response.success:
+                errors += 1
+                last_error = response
+                continue
+            placa = (response.data or {}).get("placa")
+            if not placa:
+                continue
+            votes[placa] = votes.get(placa, 0) + 1
+            if votes[placa] >= self.burst_consensus:
+                break
+        self.metrics.increment("placa_rafaga", "ocr_frames", processed)
+
+        if not votes:
+            # Si el OCR fallo en todas las fotos se devuelve el error, no "sin placa"
+            if last_error is not None and errors == processed:
+                return last_error
+            self.metrics.increment("placa_rafaga", "no_plate")
             return GeneralResponse(
                 success=True,
                 message="No se encontro placa",
-                data={"placa": None},
+                data={"placa": None, "frames_recibidos": len(frames), "frames_procesados": processed},
             )
 
+        # Empate: gana la placa leida primero, es decir en la foto mas nitida
+        placa = max(votes, key=lambda candidate: votes[candidate])
+        consenso = votes[placa] >= self.burst_consensus
+        self.metrics.increment("placa_rafaga", "consensus" if consenso else "no_consensus")
+        if consenso and processed < len(selected):
+            self.metrics.increment("placa_rafaga", "early_exit")
         return GeneralResponse(
             success=True,
             message="Placa procesada",
-            data={"placa": placa},
+            data={
+                "placa": placa,
+                "votos": votes[placa],
+                "consenso": consenso,
+                "frames_recibidos": len(frames),
+                "frames_procesados": processed,
+            },
         )
 
-    def _run_ocr_for_placa(self, image_bytes: bytes, port: OcrPort):
+    def _leer_placa(
+        self,
+        image_bytes: bytes,
+        spare_capacity: bool,
+        lookup_similar: bool,
+    ) -> tuple[GeneralResponse, _PlacaOcrAttempt | None]:
+        if self._hedging_enabled():
+            attempts = self._run_hedged(
+                "placa",
+                [
+                    lambda cancel: self._run_ocr_for_placa(image_bytes, self.port, lookup_similar, cancel),
+                    lambda cancel: self._run_ocr_for_placa(image_bytes, self.fallback_port, cancel=cancel),
+                ],
+                lambda attempt: attempt.placa is not None or (attempt.early is not None and attempt.early.success),
+                spare_capacity,
+            )
+        else:
+            attempts = [self._run_ocr_for_placa(image_bytes, self.port, lookup_similar=lookup_similar)]
+            if attempts[0].early is not None and not attempts[0].early.success and self.fallback_port is not None:
+                attempts.append(self._run_ocr_for_placa(image_bytes, self.fallback_port))
+
+        for attempt in attempts:
+            if attempt.early is not None and attempt.early.success:
+                return attempt.early, None
+            if attempt.cancelled:
+                continue
+            self._record_engine("placa", image_bytes, attempt.engine, attempt.duration_ms, attempt.placa is not None)
+        readings = [attempt for attempt in attempts if attempt.early is None]
+        if not readings:
+            return attempts[-1].early, None
+
+        winner = next((attempt for attempt in readings if attempt.placa), readings[0])
+        if not winner.placa:
+            return GeneralResponse(
+                success=True,
+                message="No se encontro placa",
+                data={"placa": None},
+            ), winner
+        return GeneralResponse(
+            success=True,
+            message="Placa procesada",
+            data={"placa": winner.placa},
+        ), winner
+
+    def _run_ocr_for_placa(
+        self,
+        image_bytes: bytes,
+        port: OcrPort,
+        lookup_similar: bool = False,
+        cancel: threading.Event | None = None,
+    ) -> _PlacaOcrAttempt:
+        attempt = _PlacaOcrAttempt(engine=port.name)
+        started = time.perf_counter()
         try:
-            result = port.extract_text(image_bytes, allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-")
+            prepared = port.prepare_image(image_bytes, preprocess_mode="plate")
+            attempt.fingerprint = prepared.fingerprint
+            if lookup_similar:
+                cached = self._cache_get("placa", fingerprint=prepared.fingerprint)
+                if cached is not None and self._placa_matches(port, prepared, cached):
+                    attempt.early = cached
+                    return attempt
+            if cancel is not None and cancel.is_set():
+                attempt.cancelled = True
+            elif prepared.regions:
+                # Primero solo los recortes candidatos; el cuadro completo queda como respaldo
+                prepared.count("placa_localizer", "candidates", len(prepared.regions))
+                roi_results = _run_passes(
+                    port,
+                    prepared,
+                    [OcrPass(allowlist=_PLACA_ALLOWLIST, roi=region, crop=True) for region in prepared.regions],
+                )
+                for roi_result in roi_results:
+                    attempt.placa = _buscar_placa(roi_result)
+                    if attempt.placa:
+                        attempt.result = roi_result
+                        prepared.count("placa_localizer", "roi_hits")
+                        break
+            else:
+                prepared.count("placa_localizer", "no_candidates")
+            if cancel is not None and cancel.is_set():
+                attempt.cancelled = True
+            if attempt.placa is None and not attempt.cancelled:
+                prepared.count("placa_localizer", "full_frame")
+                attempt.result = _run_passes(port, prepared, [OcrPass(allowlist=_PLACA_ALLOWLIST)])[0]
+                attempt.placa = _buscar_placa(attempt.result)
         except Exception as exc:
-            return None, GeneralResponse(
+            attempt.early = GeneralResponse(
                 success=False,
                 message="Fallo al procesar OCR",
                 error=ErrorDTO(code="OCR_ERROR", message="Fallo al procesar OCR", details={"error": str(exc)}),
             )
-        return result, None
-
-    def _run_ocr_for_cedula(self, image_bytes: bytes, port: OcrPort):
+            attempt.duration_ms = (time.perf_counter() - started) * 1000
+            return attempt
+        self._record_stats(prepared)
+        attempt.duration_ms = (time.perf_counter() - started) * 1000
+        return attempt
+
+    def _record_engine(
+        self,
+        operation: str,
+        image_bytes: bytes,
+        engine: str,
+        duration_ms: float,
+        success: bool,
+    ) -> None:
+        # Solo cuentan las corridas como primario: el respaldo solo ve las fotos en las que el primario
+        # fallo y su tasa de exito saldria sesgada. Cada motor junta muestras como primario con la
+        # exploracion epsilon del router
+        if self.engine_stats is not None and engine == self.port.name:
+            self.engine_stats.record(classify_request(operation, image_bytes), engine, duration_ms, success)
+
+    def _run_cedula_sequential(self, image_bytes: bytes, deadline: float | None) -> list[_CedulaOcrRun]:
+        ports = [self.port] if self.fallback_port is None else [self.port, self.fallback_port]
+        runs: list[_CedulaOcrRun] = []
+        for port in ports:
+            if runs and _deadline_reached(deadline):
+                runs[-1].budget_exhausted = True
+                break
+            current = self._run_ocr_for_cedula(image_bytes, port, deadline, lookup_similar=not runs)
+            runs.append(current)
+            if current.cedula or current.cached is not None:
+                break
+        return runs
+
+    def _hedging_enabled(self) -> bool:
+        return self.fallback_port is not None and self.hedge_delay_ms >= 0
+
+    def _run_hedged(self, operation: str, calls: list, is_winner, spare_capacity: bool) -> list:
+        # El fallback arranca tras hedge_delay_ms (o de inmediato si hay workers libres) sin esperar
+        # al primario; gana el primer resultado valido y el otro se cancela entre etapas.
+        # spare_capacity: queda un worker ocioso aun contando este trabajo, asi que el hilo extra
+        # del fallback usa nucleos que nadie mas ocupa.
+        cancel = threading.Event()
+        engines = [self.port.name, self.fallback_port.name]
+        executor = ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="ocr-hedge")
         try:
-            result = port.extract_text(image_bytes, preprocess_mode="document")
-            digits_result = port.extract_text(
-                image_bytes,
-                allowlist="0123456789",
-                preprocess_mode="document",
-            )
-            roi_results = []
-            for roi in _NUI_ROIS:
-                roi_results.append(
-                    port.extract_text(
-                        image_bytes,
-                        allowlist="0123456789",
-                        preprocess_mode="document",
-                        roi=roi,
-                    )
-                )
-            name_results = []
-            for roi in _NAME_ROIS:
-                name_results.append(
-                    port.extract_text(
-                        image_bytes,
-                        allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ ",
-                        preprocess_mode="document",
-                        roi=roi,
-                        binarize=True,
-                    )
-                )
-            # Fallback: grab a wider middle-left band for names
-            name_results.append(
-                port.extract_text(
-                    image_bytes,
-                    allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ ",
-                    preprocess_mode="document",
-                    roi=_NAME_BAND_ROI,
-                    binarize=True,
-                )
-            )
+            futures = {executor.submit(calls[0], cancel): engines[0]}
+            delay_s = 0.0 if spare_capacity else self.hedge_delay_ms / 1000
+            done, _ = wait(futures, timeout=delay_s)
+            if not done or not is_winner(next(iter(done)).result()):
+                self.metrics.increment(f"{operation}_hedge", "fallback_started")
+                futures[executor.submit(calls[1], cancel)] = engines[1]
+
+            results = []
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if is_winner(result):
+                    self.metrics.increment(f"{operation}_hedge", f"{futures[future]}_won")
+                    break
+            else:
+                self.metrics.increment(f"{operation}_hedge", "no_winner")
+            return results
+        finally:
+            # No se espera al perdedor: se detiene al terminar su etapa actual y, mientras tanto,
+            # el lock de su motor (_run_passes) impide que el siguiente trabajo lo use a la vez
+            cancel.set()
+            executor.shutdown(wait=False)
+
+    def _cache_get(
+        self,
+        operation: str,
+        digest: str | None = None,
+        fingerprint: int | None = None,
+    ) -> GeneralResponse | None:
+        if self.cache is None:
+            return None
+        if digest is not None:
+            cached, kind = self.cache.get_exact(operation, digest), "exact"
+        else:
+            cached, kind = self.cache.get_similar(operation, fingerprint), "phash"
+        if cached is None:
+            self.metrics.increment("ocr_cache", f"{operation}_{kind}_misses")
+            return None
+        self.metrics.increment("ocr_cache", f"{operation}_{kind}_hits")
+        # Copia: el router completa data (foto del rostro) sobre la respuesta que recibe
+        return cached.model_copy(deep=True)
+
+    def _cache_put(self, operation: str, digest: str, fingerprint: int | None, response: GeneralResponse) -> None:
+        # Solo se guardan lecturas positivas: un reintento tras un fallo debe volver a procesarse
+        if self.cache is None:
+            return
+        evicted = self.cache.put(operation, digest, fingerprint, response.model_copy(deep=True))
+        if evicted:
+            self.metrics.increment("ocr_cache", "evictions", evicted)
+
+    def _record_stats(self, prepared) -> None:
+        for group, counters in prepared.stats.items():
+            for key, amount in counters.items():
+                self.metrics.increment(group, key, amount)
+
+    def _run_ocr_for_cedula(
+        self,
+        image_bytes: bytes,
+        port: OcrPort,
+        deadline: float | None,
+        lookup_similar: bool = False,
+        cancel: threading.Event | None = None,
+    ) -> _CedulaOcrRun:
+        run = _CedulaOcrRun(engine=port.name)
+        started = time.perf_counter()
+        prepared = None
+        try:
+            # Decodifica y normaliza el documento una sola vez para todas las etapas
+            prepared = port.prepare_image(image_bytes, preprocess_mode="document")
+            run.layout = prepared.layout
+            run.fingerprint = prepared.fingerprint
+            run.document = prepared
+            if lookup_similar:
+                cached = self._cache_get("cedula", fingerprint=prepared.fingerprint)
+                if cached is not None and self._nui_matches(port, prepared, cached):
+                    run.cached = cached
+                    return run
+            for stage, tagged_passes in _cedula_stages(prepared.layout):
+                if cancel is not None and cancel.is_set():
+                    run.cancelled = True
+                    break
+                if _deadline_reached(deadline):
+                    run.budget_exhausted = True
+                    break
+                stage_results = _run_passes(port, prepared, [ocr_pass for _, ocr_pass in tagged_passes])
+                for (kind, _), stage_result in zip(tagged_passes, stage_results):
+                    if kind == "nui":
+                        run.roi_results.append(stage_result)
+                    elif kind == "name":
+                        run.name_results.append(stage_result)
+                    elif kind == "full":
+                        run.full_result = stage_result
+                    else:
+                        run.digits_only_result = stage_result
+
+                result, digits_result = run.merged()
+                cedula, nombres = self._extraer_cedula_y_nombres(result, digits_result, run.roi_results)
+                if cedula and (run.cedula is None or (nombres and not run.nombres)):
+                    run.stage = f"{port.name}:{stage}"
+                if cedula:
+                    run.cedula, run.nombres = cedula, nombres
+                if run.cedula and run.nombres:
+                    break
         except Exception as exc:
-            return None, None, None, GeneralResponse(
+            if prepared is not None:
+                run.inference_count = prepared.inference_count
+                run.detection_count = prepared.detection_count
+                self._record_stats(prepared)
+            run.error = GeneralResponse(
                 success=False,
                 message="Fallo al procesar OCR",
                 error=ErrorDTO(code="OCR_ERROR", message="Fallo al procesar OCR", details={"error": str(exc)}),
             )
-        if _is_empty_result(result) and _is_empty_result(digits_result):
-            return None, None, None, GeneralResponse(
+            run.duration_ms = (time.perf_counter() - started) * 1000
+            return run
+
+        run.duration_ms = (time.perf_counter() - started) * 1000
+        run.inference_count = prepared.inference_count
+        run.detection_count = prepared.detection_count
+        self._record_stats(prepared)
+        ran_full_stages = run.full_result is not None and run.digits_only_result is not None
+        if (
+            not run.cedula
+            and ran_full_stages
+            and _is_empty_result(run.full_result)
+            and _is_empty_result(run.digits_only_result)
+        ):
+            run.error = GeneralResponse(
                 success=False,
                 message="OCR sin texto",
                 error=ErrorDTO(code="OCR_EMPTY", message="OCR sin texto"),
             )
-
-        merged = digits_result
-        for roi_result in roi_results:
-            merged = _merge_digits(merged, roi_result)
-        for name_result in name_results:
-            result = _merge_results(result, name_result)
-        return result, merged, roi_results, None
+        return run
+
+    def _nui_matches(self, port: OcrPort, prepared: PreparedImage, cached: GeneralResponse) -> bool:
+        # El dHash no ve el texto impreso: dos cedulas del mismo formato quedan a pocos bits.
+        # La lectura guardada solo se reusa si el NUI de esta foto dice lo mismo (las mismas
+        # pasadas que la primera etapa, asi el adapter reusa el reconocimiento si hay que seguir)
+        nui_rois, _ = _rois_for_layout(prepared.layout)
+        roi_results = _run_passes(port, prepared, [OcrPass(allowlist="0123456789", roi=roi) for roi in nui_rois])
+        matched = _extraer_cedula_desde_rois(roi_results) == (cached.data or {}).get("cedula")
+        self.metrics.increment("ocr_cache", "cedula_phash_verified" if matched else "cedula_phash_rejected")
+        return matched
+
+    def _placa_matches(self, port: OcrPort, prepared: PreparedImage, cached: GeneralResponse) -> bool:
+        # Con la camara fija de la garita dos vehiculos seguidos dan cuadros casi identicos: la placa
+        # guardada solo se reusa si el recorte candidato principal la confirma. Es la primera pasada de
+        # la lectura normal, asi que si no coincide el adapter reusa ese reconocimiento
+        matched = False
+        if prepared.regions:
+            roi_result = _run_passes(
+                port, prepared, [OcrPass(allowlist=_PLACA_ALLOWLIST, roi=prepared.regions[0], crop=True)]
+            )[0]
+            matched = _buscar_placa(roi_result) == (cached.data or {}).get("placa")
+        self.metrics.increment("ocr_cache", "placa_phash_verified" if matched else "placa_phash_rejected")
+        return matched
 
     def _extraer_cedula_y_nombres(self, result, digits_result, roi_results):
         line_texts = [line.text for line in result.lines] or result.text.splitlines()
@@ -212,6 +637,61 @@ class OcrService:
         return cedula, nombres
 
 
+def _buscar_placa(result: OcrResult | None) -> str | None:
+    if result is None:
+        return None
+    placa = None
+    best_conf = -1.0
+    for line in result.lines:
+        candidata = extraer_placa(line.text)
+        if candidata and line.confidence > best_conf:
+            best_conf = line.confidence
+            placa = candidata
+
+    if not placa:
+        placa = extraer_placa(result.text)
+    if not placa:
+        placa = extraer_placa_en_lineas([line.text for line in result.lines])
+    return placa
+
+
+def _cedula_stages(layout: str | None) -> list[tuple[str, list[tuple[str, OcrPass]]]]:
+    # Primero las ROI del formato detectado (baratas y casi siempre suficientes),
+    # luego las pasadas completas y, si el formato era seguro, el resto de ROI.
+    nui_rois, name_rois = _rois_for_layout(layout)
+    stages = [
+        ("roi", _roi_passes(nui_rois, name_rois)),
+        ("full", [("full", OcrPass())]),
+        ("digits", [("digits", OcrPass(allowlist="0123456789"))]),
+    ]
+    rest_nui = [roi for roi in _NUI_ROIS if roi not in nui_rois]
+    rest_names = [roi for roi in _NAME_ROIS + [_NAME_BAND_ROI] if roi not in name_rois]
+    if rest_nui or rest_names:
+        stages.append(("roi_resto", _roi_passes(rest_nui, rest_names)))
+    return stages
+
+
+def _rois_for_layout(layout: str | None):
+    if layout == LAYOUT_NUEVA:
+        return _NUI_ROIS_NUEVA, _NAME_ROIS_NUEVA
+    if layout == LAYOUT_ANTIGUA:
+        # Fallback: grab a wider middle-left band for names
+        return _NUI_ROIS_ANTIGUA, _NAME_ROIS_ANTIGUA + [_NAME_BAND_ROI]
+    return _NUI_ROIS, _NAME_ROIS + [_NAME_BAND_ROI]
+
+
+def _roi_passes(nui_rois, name_rois) -> list[tuple[str, OcrPass]]:
+    passes = [("nui", OcrPass(allowlist="0123456789", roi=roi)) for roi in nui_rois]
+    passes.extend(
+        ("name", OcrPass(allowlist="ABCDEFGHIJKLMNOPQRSTUVWXYZ ", roi=roi, binarize=True)) for roi in name_rois
+    )
+    return passes
+
+
+def _deadline_reached(deadline: float | None) -> bool:
+    return deadline is not None and time.perf_counter() >= deadline
+
+
 def _extraer_cedula_por_ancla(result) -> str | None:
     anchors = []
     candidates = []
@@ -298,8 +778,9 @@ def _extraer_cedula_desde_rois(roi_results) -> str | None:
     return None
 
 
-def _build_debug_details(result, digits_result, roi_results):
+def _build_debug_details(result, digits_result, roi_results, inference_count: int):
     return {
+        "inference_count": inference_count,
         "roi_texts": [r.text for r in roi_results if r],
         "digits_text": digits_result.text if digits_result else None,
         "full_text": result.text if result else None,
@@ -342,9 +823,11 @@ def _collect_valid_candidates(line_texts, result, digits_result) -> list[str]:
 
 
 # ROI for NUI zone on normalized document (x, y, w, h) as ratios
-_NUI_ROIS = [
+_NUI_ROIS_NUEVA = [
     # New ID: NUI bottom-left
     (0.03, 0.72, 0.45, 0.22),
+]
+_NUI_ROIS_ANTIGUA = [
     # Older ID: number top-right
     (0.58, 0.05, 0.38, 0.16),
     # Older ID: number mid-right
@@ -354,16 +837,36 @@ _NUI_ROIS = [
     # Older ID: NUI label top-right tighter
     (0.62, 0.04, 0.30, 0.12),
 ]
+_NUI_ROIS = _NUI_ROIS_NUEVA + _NUI_ROIS_ANTIGUA
 
 # Name zones (apellidos + nombres)
-_NAME_ROIS = [
+_NAME_ROIS_NUEVA = [
     # New ID: center-left block
     (0.32, 0.22, 0.34, 0.28),
+]
+_NAME_ROIS_ANTIGUA = [
     # Old ID: center block
     (0.30, 0.26, 0.40, 0.22),
     # Old ID: center-right block
     (0.34, 0.22, 0.36, 0.22),
 ]
+_NAME_ROIS = _NAME_ROIS_NUEVA + _NAME_ROIS_ANTIGUA
 
 # Wider band where "APELLIDOS Y NOMBRES" typically sits (older IDs)
 _NAME_BAND_ROI = (0.22, 0.18, 0.50, 0.34)
+
+_PLACA_ALLOWLIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-"
+
+
+def _engine_lock(port: OcrPort) -> threading.Lock:
+    with _ENGINE_LOCKS_GUARD:
+        lock = _ENGINE_LOCKS.get(port)
+        if lock is None:
+            lock = threading.Lock()
+            _ENGINE_LOCKS[port] = lock
+        return lock
+
+
+def _run_passes(port: OcrPort, prepared: PreparedImage, passes: list[OcrPass]) -> list[OcrResult]:
+    with _engine_lock(port):
+        return port.extract_text_passes(prepared, passes)
@@ -2,6 +2,11 @@ import re
 import unicodedata
 from typing import Optional, List, Tuple
 
+# Formatos de cedula: la nueva (2020+) lleva el NUI abajo a la izquierda,
+# la antigua lo lleva arriba a la derecha.
+LAYOUT_NUEVA = "nueva"
+LAYOUT_ANTIGUA = "antigua"
+
 
 def validar_cedula(cedula: str) -> bool:
     if len(cedula) != 10 or not cedula.isdigit():
@@ -1,11 +1,20 @@
 from dataclasses import dataclass
-from typing import Protocol, Optional
+from typing import Any, Protocol, Optional
 
 
 class FacePort(Protocol):
     def extract_face(self, image_bytes: bytes) -> Optional[bytes]:
         ...
 
+    def extract_face_in_region(
+        self,
+        image: Any,
+        region: tuple[float, float, float, float],
+        color: str = "rgb",
+    ) -> Optional[bytes]:
+        # image ya decodificada (p. ej. el documento normalizado por el OCR); region (x, y, w, h) normalizada
+        ...
+
 
 @dataclass
 class FaceMatchResult:
@@ -14,8 +23,19 @@ class FaceMatchResult:
     threshold: float
 
 
+@dataclass
+class FaceTemplate:
+    # Rostro ya recortado y los descriptores que su comparador precalculo (None si no usa)
+    image: bytes
+    descriptor: Any = None
+
+
 class FaceComparePort(Protocol):
-    def compare(self, image_a: bytes, image_b: bytes) -> Optional[FaceMatchResult]:
+    def compare(self, image_a: bytes, image_b: bytes, descriptor_a: Any = None) -> Optional[FaceMatchResult]:
+        # descriptor_a: resultado previo de describe(image_a), evita repetir deteccion y descriptores
+        ...
+
+    def describe(self, image: bytes) -> Any:
         ...
 
 
@@ -1,5 +1,5 @@
-from dataclasses import dataclass
-from typing import Protocol, List
+from dataclasses import dataclass, field
+from typing import Any, Protocol, List
 
 
 @dataclass
@@ -15,7 +15,42 @@ class OcrResult:
     lines: List[OcrLine]
 
 
+@dataclass
+class OcrPass:
+    allowlist: str | None = None
+    roi: tuple[float, float, float, float] | None = None
+    binarize: bool = False
+    # Con roi: detectar texto dentro del recorte en lugar de filtrar las cajas de toda la imagen
+    crop: bool = False
+
+
+@dataclass
+class PreparedImage:
+    # Imagen ya decodificada (y normalizada si aplica); cada adapter guarda su propio formato.
+    image: Any
+    preprocess_mode: str | None = None
+    # Orden de canales de image ("rgb" o "bgr"), para quien la reutilice fuera del adapter
+    color: str = "rgb"
+    layout: str | None = None
+    # Hash perceptual (dHash) del documento normalizado, para detectar reenvios casi identicos
+    fingerprint: int | None = None
+    # Regiones candidatas (x, y, w, h normalizados) encontradas al preparar, p. ej. placas
+    regions: list[tuple[float, float, float, float]] = field(default_factory=list)
+    inference_count: int = 0
+    detection_count: int = 0
+    # Contadores del request (grupo -> clave -> valor) que el servicio suma a las metricas
+    stats: dict[str, dict[str, int]] = field(default_factory=dict)
+    # Resultados intermedios del adapter (detecciones, variantes) validos solo para este request
+    cache: dict = field(default_factory=dict)
+
+    def count(self, group: str, key: str, amount: int = 1) -> None:
+        counters = self.stats.setdefault(group, {})
+        counters[key] = counters.get(key, 0) + amount
+
+
 class OcrPort(Protocol):
+    name: str
+
     def extract_text(
         self,
         image_bytes: bytes,
@@ -25,3 +60,12 @@ class OcrPort(Protocol):
         binarize: bool = False,
     ) -> OcrResult:
         ...
+
+    def prepare_image(self, image_bytes: bytes, preprocess_mode: str | None = None) -> PreparedImage:
+        ...
+
+    def extract_text_passes(self, image: PreparedImage, passes: List[OcrPass]) -> List[OcrResult]:
+        ...
+
+    def warm_up(self) -> None:
+        ...
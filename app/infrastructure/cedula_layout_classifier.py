@@ -0,0 +1,61 @@
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.domain.ecuador_id import LAYOUT_ANTIGUA, LAYOUT_NUEVA
+
+# Zonas (x, y, w, h) donde cada formato imprime el NUI, iguales a las ROI principales del OcrService
+_NUEVA_NUI_ZONE = (0.03, 0.72, 0.45, 0.22)
+_ANTIGUA_NUI_ZONE = (0.58, 0.05, 0.38, 0.16)
+# Tarjeta ID-1 (85.6 x 54 mm) a ~5 px/mm
+_TEMPLATE_SIZE = (428, 270)
+
+
+class CedulaLayoutClassifier:
+    def __init__(self, margin: Optional[float] = None):
+        env_margin = os.getenv("CEDULA_LAYOUT_MARGIN", "0.25")
+        self.margin = margin if margin is not None else float(env_margin)
+        self.min_ratio = float(os.getenv("CEDULA_LAYOUT_MIN_RATIO", "1.35"))
+        self.max_ratio = float(os.getenv("CEDULA_LAYOUT_MAX_RATIO", "1.85"))
+
+    def classify(self, gray: np.ndarray) -> tuple[Optional[str], float]:
+        """Devuelve (formato, confianza); formato es None cuando la imagen no es concluyente."""
+        h, w = gray.shape[0], gray.shape[1]
+        ratio = w / max(h, 1)
+        if ratio < self.min_ratio or ratio > self.max_ratio:
+            # No parece una tarjeta normalizada: las zonas del template no aplican
+            return None, 0.0
+
+        small = cv2.resize(gray, _TEMPLATE_SIZE, interpolation=cv2.INTER_AREA)
+        mask = _text_mask(small)
+        nueva = _zone_density(mask, _NUEVA_NUI_ZONE)
+        antigua = _zone_density(mask, _ANTIGUA_NUI_ZONE)
+        total = nueva + antigua
+        if total < 1e-3:
+            return None, 0.0
+
+        score = (nueva - antigua) / total
+        if score >= self.margin:
+            return LAYOUT_NUEVA, score
+        if score <= -self.margin:
+            return LAYOUT_ANTIGUA, -score
+        return None, abs(score)
+
+
+def _text_mask(gray: np.ndarray) -> np.ndarray:
+    # Blackhat resalta trazos oscuros y finos (texto impreso) sobre el fondo de la tarjeta
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    blackhat = cv2.morphologyEx(gray, cv2.MORPH_BLACKHAT, kernel)
+    _, mask = cv2.threshold(blackhat, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    return mask
+
+
+def _zone_density(mask: np.ndarray, zone: tuple[float, float, float, float]) -> float:
+    x, y, w, h = zone
+    h_img, w_img = mask.shape[0], mask.shape[1]
+    region = mask[int(y * h_img) : int((y + h) * h_img), int(x * w_img) : int((x + w) * w_img)]
+    if region.size == 0:
+        return 0.0
+    return float(np.count_nonzero(region)) / region.size
@@ -0,0 +1,41 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Lado mayor de la copia reducida donde se buscan los bordes del documento
+_CONTOUR_MAX_SIDE = 640
+
+
+def find_document_quad(gray: np.ndarray, max_side: int = _CONTOUR_MAX_SIDE) -> Optional[np.ndarray]:
+    # Blur, Canny y findContours sobre una copia reducida; las esquinas se devuelven
+    # ordenadas (tl, tr, br, bl) en coordenadas de la imagen original para el warp.
+    h, w = gray.shape[0], gray.shape[1]
+    scale = min(1.0, max_side / max(h, w))
+    small = gray
+    if scale < 1.0:
+        small = cv2.resize(gray, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    blur = cv2.GaussianBlur(small, (5, 5), 0)
+    edges = cv2.Canny(blur, 50, 150)
+    # Cierra los cortes del borde para que el contorno externo sea la tarjeta y no la foto interior
+    edges = cv2.dilate(edges, np.ones((3, 3), dtype=np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:5]
+    for contour in contours:
+        peri = cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
+        if len(approx) == 4:
+            pts = approx.reshape(4, 2).astype("float32") / scale
+            return order_points(pts)
+    return None
+
+
+def order_points(pts: np.ndarray) -> np.ndarray:
+    rect = np.zeros((4, 2), dtype="float32")
+    s = pts.sum(axis=1)
+    rect[0] = pts[np.argmin(s)]
+    rect[2] = pts[np.argmax(s)]
+    diff = np.diff(pts, axis=1)
+    rect[1] = pts[np.argmin(diff)]
+    rect[3] = pts[np.argmax(diff)]
+    return rect
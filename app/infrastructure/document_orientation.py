@@ -0,0 +1,63 @@
+from typing import Optional
+
+import cv2
+import numpy as np
+
+_SKEW_MAX_SIDE = 1000
+# Inclinaciones menores las tolera el reconocedor; mayores suelen ser un documento girado 90 grados
+_MIN_SKEW_DEGREES = 0.5
+_MAX_SKEW_DEGREES = 15.0
+_MIN_TEXT_LINES = 3
+
+
+def estimate_skew(gray: np.ndarray, max_side: int = _SKEW_MAX_SIDE) -> Optional[float]:
+    # Angulo (grados, antihorario) de las lineas de texto, medido con minAreaRect sobre una copia reducida
+    h, w = gray.shape[:2]
+    scale = min(1.0, max_side / max(h, w))
+    small = gray if scale == 1.0 else cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    binary = cv2.adaptiveThreshold(
+        small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15
+    )
+    # Une los caracteres de cada renglon en una sola mancha alargada
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, small.shape[1] // 60), 3))
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    angles, weights = [], []
+    min_length = small.shape[1] * 0.08
+    for contour in contours:
+        corners = cv2.boxPoints(cv2.minAreaRect(contour))
+        edges = [corners[1] - corners[0], corners[2] - corners[1]]
+        long_edge, short_edge = sorted(edges, key=lambda e: float(np.hypot(*e)), reverse=True)
+        length, thickness = float(np.hypot(*long_edge)), float(np.hypot(*short_edge))
+        if length < min_length or length < thickness * 4:
+            continue
+        angle = float(np.degrees(np.arctan2(-long_edge[1], long_edge[0])))
+        angle = (angle + 90) % 180 - 90
+        if abs(angle) > 45:
+            continue
+        angles.append(angle)
+        weights.append(length)
+    if len(angles) < _MIN_TEXT_LINES:
+        return None
+    return _weighted_median(angles, weights)
+
+
+def deskew(image: np.ndarray, angle: Optional[float]) -> tuple[np.ndarray, bool]:
+    if angle is None or abs(angle) < _MIN_SKEW_DEGREES or abs(angle) > _MAX_SKEW_DEGREES:
+        return image, False
+    h, w = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), -angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_w, new_h = int(h * sin + w * cos), int(h * cos + w * sin)
+    matrix[0, 2] += new_w / 2 - w / 2
+    matrix[1, 2] += new_h / 2 - h / 2
+    rotated = cv2.warpAffine(image, matrix, (new_w, new_h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+    return rotated, True
+
+
+def _weighted_median(values: list[float], weights: list[float]) -> float:
+    order = np.argsort(values)
+    cumulative = np.cumsum(np.asarray(weights)[order])
+    idx = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+    return float(np.asarray(values)[order][idx])
@@ -1,72 +1,59 @@
-import io
-from typing import Optional, Tuple
+from typing import Optional
 
 import cv2
 import numpy as np
-from PIL import Image
 
 from app.domain.face import FacePort
+from app.infrastructure.face_detection import FaceDetector
+from app.infrastructure.image_resolution import decode_rgb
+
+# Lado minimo del rostro buscado dentro de una zona, como fraccion del lado menor de la zona
+_ZONE_MIN_FACE = 0.25
 
 
 class OpenCvFaceAdapter(FacePort):
     def __init__(self):
-        cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        self._cascade = cv2.CascadeClassifier(cascade_path)
+        self._detector = FaceDetector()
 
     def extract_face(self, image_bytes: bytes) -> Optional[bytes]:
-        image = _load_image(image_bytes)
-        crop = _detect_and_crop_face(image, self._cascade)
+        # Resolucion completa y orientacion EXIF aplicada: la deteccion reduce por su cuenta
+        image = decode_rgb(image_bytes, 0)
+        crop = self._detector.crop(image, 0.35)
         if crop is None:
             return None
-        success, encoded = cv2.imencode(".jpg", crop)
-        if not success:
+        return _encode_jpeg(cv2.cvtColor(crop, cv2.COLOR_RGB2BGR))
+
+    def extract_face_in_region(
+        self,
+        image: np.ndarray,
+        region: tuple[float, float, float, float],
+        color: str = "rgb",
+    ) -> Optional[bytes]:
+        # Busca solo dentro de la zona (la foto de la cedula normalizada): sin rotaciones ni escalas pequenas
+        x, y, w, h = region
+        height, width = image.shape[:2]
+        x1, y1 = int(max(0.0, x) * width), int(max(0.0, y) * height)
+        x2, y2 = int(min(1.0, x + w) * width), int(min(1.0, y + h) * height)
+        zone = image[y1:y2, x1:x2]
+        if zone.size == 0:
             return None
-        return encoded.tobytes()
-
-
-def _load_image(image_bytes: bytes) -> np.ndarray:
-    with Image.open(io.BytesIO(image_bytes)) as image:
-        return np.array(image.convert("RGB"))
-
-
-def _detect_and_crop_face(image: np.ndarray, cascade) -> Optional[np.ndarray]:
-    primary = _detect_on_image(image, cascade)
-    if primary is not None:
-        return primary
-
-    best_crop = None
-    best_area = 0
-    for rotated in _iter_rotations(image):
-        if rotated is image:
-            continue
-        gray = cv2.cvtColor(rotated, cv2.COLOR_RGB2GRAY)
-        faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(60, 60))
-        for (x, y, w, h) in faces:
-            area = w * h
-            if area > best_area:
-                best_area = area
-                best_crop = _crop_with_margin(rotated, x, y, w, h, 0.35)
-    return best_crop
-
-
-def _detect_on_image(image: np.ndarray, cascade) -> Optional[np.ndarray]:
-    best_crop = None
-    best_area = 0
-    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-    faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(60, 60))
-    for (x, y, w, h) in faces:
-        area = w * h
-        if area > best_area:
-            best_area = area
-            best_crop = _crop_with_margin(image, x, y, w, h, 0.35)
-    return best_crop
-
-
-def _iter_rotations(image: np.ndarray):
-    yield image
-    yield cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
-    yield cv2.rotate(image, cv2.ROTATE_180)
-    yield cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        gray = cv2.cvtColor(zone, cv2.COLOR_BGR2GRAY if color == "bgr" else cv2.COLOR_RGB2GRAY)
+        # El rostro ocupa buena parte de la foto del documento
+        found = self._detector.find(gray, max(24, int(min(gray.shape[:2]) * _ZONE_MIN_FACE)))
+        if found is None:
+            return None
+        (fx, fy, fw, fh), _ = found
+        # El margen se toma sobre el documento completo para no cortarlo en el borde de la zona
+        crop = _crop_with_margin(image, x1 + fx, y1 + fy, fw, fh, 0.35)
+        return _encode_jpeg(crop if color == "bgr" else cv2.cvtColor(crop, cv2.COLOR_RGB2BGR))
+
+
+def _encode_jpeg(image: np.ndarray) -> Optional[bytes]:
+    # cv2.imencode espera BGR
+    success, encoded = cv2.imencode(".jpg", image)
+    if not success:
+        return None
+    return encoded.tobytes()
 
 
 def _crop_with_margin(image: np.ndarray, x: int, y: int, w: int, h: int, margin: float) -> np.ndarray:
@@ -1,5 +1,6 @@
 import os
 import io
+from dataclasses import dataclass
 from typing import Optional, Any
 
 import httpx
@@ -9,18 +10,18 @@ import numpy as np
 from PIL import Image, ImageOps
 
 from app.domain.face import FaceComparePort, FaceMatchResult, FaceCompareProviderError
+from app.infrastructure.face_detection import FaceDetector
 
 
 class OpenCvFaceCompareAdapter(FaceComparePort):
     def __init__(self, threshold: Optional[float] = None):
         env_threshold = os.getenv("FACE_MATCH_THRESHOLD", "0.45")
         self.threshold = threshold if threshold is not None else float(env_threshold)
-        cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
-        self._cascade = cv2.CascadeClassifier(cascade_path)
+        self._detector = FaceDetector()
 
-    def compare(self, image_a: bytes, image_b: bytes) -> Optional[FaceMatchResult]:
-        face_a = _get_face_crop(image_a, self._cascade)
-        face_b = _get_face_crop(image_b, self._cascade)
+    def compare(self, image_a: bytes, image_b: bytes, descriptor_a: Any = None) -> Optional[FaceMatchResult]:
+        face_a = descriptor_a if descriptor_a is not None else self.describe(image_a)
+        face_b = self.describe(image_b)
         if face_a is None or face_b is None:
             return None
         score = _orb_similarity(face_a, face_b)
@@ -30,6 +31,12 @@ class OpenCvFaceCompareAdapter(FaceComparePort):
         match = distance <= self.threshold
         return FaceMatchResult(match=match, distance=distance, threshold=self.threshold)
 
+    def describe(self, image: bytes) -> Optional["_FaceDescriptor"]:
+        face = _get_face_crop(image, self._detector)
+        if face is None:
+            return None
+        return _describe_face(face)
+
 
 class MockFaceCompareAdapter(FaceComparePort):
     def __init__(
@@ -44,7 +51,7 @@ class MockFaceCompareAdapter(FaceComparePort):
         self.distance_if_match = float(distance_if_match)
         self.distance_if_no_match = float(distance_if_no_match)
 
-    def compare(self, image_a: bytes, image_b: bytes) -> Optional[Any]:
+    def compare(self, image_a: bytes, image_b: bytes, descriptor_a: Any = None) -> Optional[Any]:
         # Mantiene el mismo contrato que espera el servicio (dict con `match`)
         # sin consumir proveedor externo.
         return {
@@ -55,6 +62,9 @@ class MockFaceCompareAdapter(FaceComparePort):
             "mock": True,
         }
 
+    def describe(self, image: bytes) -> Optional[Any]:
+        return None
+
 
 class HttpFaceCompareAdapter(FaceComparePort):
     def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None):
@@ -62,7 +72,8 @@ class HttpFaceCompareAdapter(FaceComparePort):
         env_timeout = os.getenv("FACE_COMPARE_TIMEOUT", "15")
         self.timeout = timeout if timeout is not None else float(env_timeout)
 
-    def compare(self, image_a: bytes, image_b: bytes) -> Optional[Any]:
+    def compare(self, image_a: bytes, image_b: bytes, descriptor_a: Any = None) -> Optional[Any]:
+        # El proveedor recibe las fotos: no hay descriptores locales que reusar
         image_a_jpg = _to_jpeg_bytes(image_a)
         image_b_jpg = _to_jpeg_bytes(image_b)
 
@@ -79,23 +90,19 @@ class HttpFaceCompareAdapter(FaceComparePort):
             raise FaceCompareProviderError(status_code=status_code, response_body=provider_body) from exc
         return response.json()
 
+    def describe(self, image: bytes) -> Optional[Any]:
+        return None
+
 
-def _get_face_crop(image_bytes: bytes, cascade) -> Optional[np.ndarray]:
+def _get_face_crop(image_bytes: bytes, detector: FaceDetector) -> Optional[np.ndarray]:
     image = _load_image(image_bytes)
-    best_crop = None
-    best_area = 0
-    for rotated in _iter_rotations(image):
-        gray = cv2.cvtColor(rotated, cv2.COLOR_RGB2GRAY)
-        faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(60, 60))
-        for (x, y, w, h) in faces:
-            area = w * h
-            if area > best_area:
-                best_area = area
-                best_crop = _crop_with_margin(rotated, x, y, w, h, 0.2)
-    return best_crop
+    if image is None:
+        return None
+    return detector.crop(image, 0.2)
 
 
 def _load_image(image_bytes: bytes) -> np.ndarray:
+    # imdecode ya aplica la orientacion EXIF, asi que la primera orientacion probada es la de la foto
     data = np.frombuffer(image_bytes, dtype=np.uint8)
     image = cv2.imdecode(data, cv2.IMREAD_COLOR)
     if image is None:
@@ -103,48 +110,39 @@ def _load_image(image_bytes: bytes) -> np.ndarray:
     return cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
 
-def _iter_rotations(image: np.ndarray):
-    yield image
-    yield cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)
-    yield cv2.rotate(image, cv2.ROTATE_180)
-    yield cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+@dataclass
+class _FaceDescriptor:
+    # Lo que compare necesita de cada rostro; se puede calcular una vez y reusar (token de /ocr/cedula,
+    # descriptores por cedula de visitantes frecuentes)
+    gray: np.ndarray
+    keypoints: tuple
+    descriptors: Optional[np.ndarray]
+    hist: np.ndarray
 
 
-def _crop_with_margin(image: np.ndarray, x: int, y: int, w: int, h: int, margin: float) -> np.ndarray:
-    pad_w = int(w * margin)
-    pad_h = int(h * margin)
-    x1 = max(x - pad_w, 0)
-    y1 = max(y - pad_h, 0)
-    x2 = min(x + w + pad_w, image.shape[1])
-    y2 = min(y + h + pad_h, image.shape[0])
-    return image[y1:y2, x1:x2]
+def _describe_face(face: np.ndarray) -> _FaceDescriptor:
+    gray = _prep_gray(face)
+    orb = cv2.ORB_create(nfeatures=500)
+    keypoints, descriptors = orb.detectAndCompute(gray, None)
+    hist = cv2.calcHist([gray], [0], None, [64], [0, 256])
+    cv2.normalize(hist, hist)
+    return _FaceDescriptor(gray=gray, keypoints=tuple(keypoints), descriptors=descriptors, hist=hist)
 
 
-def _orb_similarity(face_a: np.ndarray, face_b: np.ndarray) -> Optional[float]:
-    gray_a = _prep_gray(face_a)
-    gray_b = _prep_gray(face_b)
-    orb = cv2.ORB_create(nfeatures=500)
-    kp_a, des_a = orb.detectAndCompute(gray_a, None)
-    kp_b, des_b = orb.detectAndCompute(gray_b, None)
-    if des_a is None or des_b is None:
+def _orb_similarity(face_a: _FaceDescriptor, face_b: _FaceDescriptor) -> Optional[float]:
+    if face_a.descriptors is None or face_b.descriptors is None:
         return None
     matcher = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-    matches = matcher.match(des_a, des_b)
+    matches = matcher.match(face_a.descriptors, face_b.descriptors)
     if not matches:
         return None
-    max_kp = max(len(kp_a), len(kp_b), 1)
+    max_kp = max(len(face_a.keypoints), len(face_b.keypoints), 1)
     score = len(matches) / max_kp
     return max(0.0, min(1.0, score))
 
 
-def _hist_similarity(face_a: np.ndarray, face_b: np.ndarray) -> float:
-    gray_a = _prep_gray(face_a)
-    gray_b = _prep_gray(face_b)
-    hist_a = cv2.calcHist([gray_a], [0], None, [64], [0, 256])
-    hist_b = cv2.calcHist([gray_b], [0], None, [64], [0, 256])
-    cv2.normalize(hist_a, hist_a)
-    cv2.normalize(hist_b, hist_b)
-    corr = cv2.compareHist(hist_a, hist_b, cv2.HISTCMP_CORREL)
+def _hist_similarity(face_a: _FaceDescriptor, face_b: _FaceDescriptor) -> float:
+    corr = cv2.compareHist(face_a.hist, face_b.hist, cv2.HISTCMP_CORREL)
     score = (corr + 1.0) / 2.0
     return max(0.0, min(1.0, score))
 
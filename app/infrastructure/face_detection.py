@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Box = tuple[int, int, int, int]
+
+# Rotaciones a probar despues de la orientacion EXIF (la foto ya decodificada derecha)
+_ROTATIONS = (None, cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_COUNTERCLOCKWISE)
+_MIN_FACE = 60
+
+
+class FaceDetector:
+    def __init__(
+        self,
+        cascade_path: Optional[str] = None,
+        max_side: Optional[int] = None,
+        confident_neighbors: Optional[int] = None,
+        threads: Optional[int] = None,
+    ):
+        # CascadeClassifier no es seguro entre hilos: cada hilo que detecta carga el suyo (ver cascade)
+        self._local = threading.local()
+        # Cascada LBP opcional (mas rapida, algo menos precisa); las ruedas de opencv-python no la incluyen
+        lbp_path = cascade_path if cascade_path is not None else os.getenv("FACE_LBP_CASCADE_PATH", "")
+        self.cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        self.kind = "haar"
+        if lbp_path:
+            cascade = cv2.CascadeClassifier(lbp_path)
+            if cascade.empty():
+                logger.warning("face_lbp_cascade_not_loaded path=%s", lbp_path)
+            else:
+                self.cascade_path = lbp_path
+                self.kind = "lbp"
+                self._local.cascade = cascade
+        # La deteccion corre sobre una copia con este lado mayor; el recorte sale de la imagen completa
+        env_max_side = os.getenv("FACE_DETECT_MAX_SIDE", "640")
+        self.max_side = max_side if max_side is not None else int(env_max_side)
+        # Una deteccion con tantos vecinos se da por buena y no se prueban mas rotaciones
+        env_confident = os.getenv("FACE_CONFIDENT_NEIGHBORS", "12")
+        self.confident_neighbors = confident_neighbors if confident_neighbors is not None else int(env_confident)
+        # Hilos de OpenCV (global al proceso). Con varias detecciones concurrentes conviene 1:
+        # cada request ocupa un nucleo en lugar de repartirse todos. Vacio = no se toca
+        env_threads = os.getenv("FACE_DETECT_THREADS", "")
+        self.threads = threads if threads is not None else (int(env_threads) if env_threads else None)
+        if self.threads is not None:
+            cv2.setNumThreads(self.threads)
+
+    @property
+    def cascade(self):
+        cascade = getattr(self._local, "cascade", None)
+        if cascade is None:
+            cascade = cv2.CascadeClassifier(self.cascade_path)
+            self._local.cascade = cascade
+        return cascade
+
+    def find(self, gray: np.ndarray, min_face: int = _MIN_FACE) -> Optional[tuple[Box, int]]:
+        # Devuelve (caja en coordenadas de gray, vecinos) de la deteccion mas grande
+        small, scale = _downscale(gray, self.max_side)
+        found = self._detect(small, max(1, int(min_face * scale)))
+        if found is None:
+            return None
+        (x, y, w, h), neighbors = found
+        return (int(x / scale), int(y / scale), int(w / scale), int(h / scale)), neighbors
+
+    def crop(self, image: np.ndarray, margin: float, color: str = "rgb") -> Optional[np.ndarray]:
+        # Prueba la orientacion de la foto y, solo si no hay una deteccion confiable, las otras tres.
+        # Gana la deteccion con mas vecinos y, a igualdad, la de la rotacion probada antes: el area no
+        # cuenta, un falso positivo grande en una rotacion no debe desplazar al rostro derecho.
+        # Se rota la copia reducida; la caja se lleva a la imagen original y solo se rota el recorte.
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if color == "bgr" else cv2.COLOR_RGB2GRAY)
+        small, scale = _downscale(gray, self.max_side)
+        min_face = max(1, int(_MIN_FACE * scale))
+        best = None
+        for rotation in _ROTATIONS:
+            rotated = small if rotation is None else cv2.rotate(small, rotation)
+            found = self._detect(rotated, min_face)
+            if found is None:
+                continue
+            box, neighbors = found
+            if neighbors >= self.confident_neighbors:
+                best = (rotation, box, neighbors)
+                break
+            if best is None or neighbors > best[2]:
+                best = (rotation, box, neighbors)
+        if best is None:
+            return None
+        rotation, box, _ = best
+        x, y, w, h = _unrotate_box(box, rotation, small.shape[1], small.shape[0])
+        crop = _crop_with_margin(image, int(x / scale), int(y / scale), int(w / scale), int(h / scale), margin)
+        return crop if rotation is None else cv2.rotate(crop, rotation)
+
+    def _detect(self, gray: np.ndarray, min_face: int) -> Optional[tuple[Box, int]]:
+        faces, neighbors = self.cascade.detectMultiScale2(
+            gray, scaleFactor=1.1, minNeighbors=5, minSize=(min_face, min_face)
+        )
+        if len(faces) == 0:
+            return None
+        idx = max(range(len(faces)), key=lambda i: faces[i][2] * faces[i][3])
+        x, y, w, h = (int(value) for value in faces[idx])
+        return (x, y, w, h), int(neighbors[idx])
+
+
+def _downscale(gray: np.ndarray, max_side: int) -> tuple[np.ndarray, float]:
+    h, w = gray.shape[:2]
+    if max_side <= 0 or max(h, w) <= max_side:
+        return gray, 1.0
+    scale = max_side / max(h, w)
+    return cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA), scale
+
+
+def _unrotate_box(box: Box, rotation: Optional[int], width: int, height: int) -> Box:
+    # width/height son los de la imagen sin rotar
+    x, y, w, h = box
+    if rotation == cv2.ROTATE_90_CLOCKWISE:
+        return y, height - x - w, h, w
+    if rotation == cv2.ROTATE_180:
+        return width - x - w, height - y - h, w, h
+    if rotation == cv2.ROTATE_90_COUNTERCLOCKWISE:
+        return width - y - h, x, h, w
+    return box
+
+
+def _crop_with_margin(image: np.ndarray, x: int, y: int, w: int, h: int, margin: float) -> np.ndarray:
+    pad_w = int(w * margin)
+    pad_h = int(h * margin)
+    x1 = max(x - pad_w, 0)
+    y1 = max(y - pad_h, 0)
+    x2 = min(x + w + pad_w, image.shape[1])
+    y2 = min(y + h + pad_h, image.shape[0])
+    return image[y1:y2, x1:x2]
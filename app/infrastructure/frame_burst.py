@@ -0,0 +1,50 @@
+from typing import List
+
+import cv2
+import numpy as np
+
+_SOI = b"\xff\xd8\xff"
+_EOI = b"\xff\xd9"
+
+
+def split_mjpeg(data: bytes) -> List[bytes]:
+    # Un clip MJPEG (o multipart/x-mixed-replace) es una secuencia de JPEG; se cortan por SOI/EOI.
+    # La profundidad evita cortar en el EOI de una miniatura EXIF incrustada.
+    frames = []
+    depth = 0
+    start = 0
+    pos = 0
+    while True:
+        next_soi = data.find(_SOI, pos)
+        next_eoi = data.find(_EOI, pos)
+        if next_eoi < 0:
+            break
+        if 0 <= next_soi < next_eoi:
+            if depth == 0:
+                start = next_soi
+            depth += 1
+            pos = next_soi + len(_SOI)
+            continue
+        if depth > 0:
+            depth -= 1
+            if depth == 0:
+                frames.append(data[start : next_eoi + len(_EOI)])
+        pos = next_eoi + len(_EOI)
+    return frames
+
+
+def frame_sharpness(image_bytes: bytes) -> float:
+    # Varianza del laplaciano sobre la foto decodificada a 1/4 (los JPEG se escalan en el dominio DCT)
+    gray = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+    if gray is None:
+        return -1.0
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def subsample_frames(frames: List[bytes], limit: int) -> List[bytes]:
+    # Reparte la seleccion a lo largo del clip sin decodificar nada: cubre todo el paso del vehiculo
+    # y el servicio elige despues las mas nitidas entre las que quedan
+    if limit <= 0 or len(frames) <= limit:
+        return frames
+    step = len(frames) / limit
+    return [frames[int(i * step)] for i in range(limit)]
@@ -0,0 +1,19 @@
+import cv2
+import numpy as np
+
+# 16x16 = 256 bits. Capta la composicion de la foto, no el texto impreso: dos cedulas distintas
+# del mismo formato pueden quedar a pocos bits (por eso la cache verifica el NUI antes de reusar)
+_DHASH_SIZE = 16
+
+
+def dhash(gray: np.ndarray, size: int = _DHASH_SIZE) -> int:
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
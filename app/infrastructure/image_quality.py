@@ -0,0 +1,117 @@
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from app.infrastructure.document_contour import find_document_quad
+from app.infrastructure.image_resolution import decode_gray
+
+# Las metricas se miden a este lado mayor, asi los umbrales no dependen de la resolucion de la camara
+_QUALITY_MAX_SIDE = 1000
+_GLARE_LEVEL = 250
+# Un cuadrilatero mas chico que esta fraccion del cuadro es la foto interior o ruido, no la cedula
+_MIN_QUAD_AREA = 0.2
+_KINDS = ("document", "scene", "face")
+
+
+@dataclass
+class ImageQualityReport:
+    # code es None si la imagen pasa; si no, el codigo de error que se devuelve al cliente
+    code: Optional[str] = None
+    message: Optional[str] = None
+    metrics: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.code is None
+
+
+class ImageQualityGate:
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        min_sharpness: Optional[float] = None,
+        scene_min_sharpness: Optional[float] = None,
+        face_min_sharpness: Optional[float] = None,
+        min_brightness: Optional[float] = None,
+        max_brightness: Optional[float] = None,
+        max_glare: Optional[float] = None,
+    ):
+        # true: rechaza; report: solo mide y cuenta (opcional, para calibrar umbrales); false: desactivado
+        self.mode = (mode or os.getenv("OCR_QUALITY_GATE", "true")).lower()
+        self.min_sharpness = _env_float(min_sharpness, "OCR_QUALITY_MIN_SHARPNESS", "40")
+        self.scene_min_sharpness = _env_float(scene_min_sharpness, "OCR_QUALITY_SCENE_MIN_SHARPNESS", "20")
+        # Los recortes de rostro son chicos y de piel lisa: su laplaciano es bajo aunque esten enfocados
+        self.face_min_sharpness = _env_float(face_min_sharpness, "OCR_QUALITY_FACE_MIN_SHARPNESS", "10")
+        self.min_brightness = _env_float(min_brightness, "OCR_QUALITY_MIN_BRIGHTNESS", "45")
+        self.max_brightness = _env_float(max_brightness, "OCR_QUALITY_MAX_BRIGHTNESS", "225")
+        self.max_glare = _env_float(max_glare, "OCR_QUALITY_MAX_GLARE", "0.05")
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in {"1", "true", "yes", "report"}
+
+    @property
+    def enforcing(self) -> bool:
+        return self.mode in {"1", "true", "yes"}
+
+    def check(self, image_bytes: bytes, kind: str = "document") -> ImageQualityReport:
+        # document: cedula, se mide dentro del contorno de la tarjeta (el fondo no cuenta).
+        # scene (camara de garita): umbral de nitidez propio y sin reflejos, una placa reflectiva no impide leerla.
+        # face (selfie, rostro recortado): solo nitidez; la exposicion de un rostro no se parece a la de un documento
+        if kind not in _KINDS:
+            raise ValueError(f"kind desconocido: {kind}")
+        gray = decode_gray(image_bytes, _QUALITY_MAX_SIDE)
+        if gray is None:
+            return ImageQualityReport(code="IMAGE_UNREADABLE", message="No se pudo leer la imagen")
+
+        laplacian = cv2.Laplacian(gray, cv2.CV_64F)
+        mask = _document_mask(gray) if kind == "document" else None
+        if mask is None:
+            sharpness = float(laplacian.var())
+            pixels = gray.ravel()
+        else:
+            sharpness = float(laplacian[mask].var())
+            pixels = gray[mask]
+        brightness = float(pixels.mean())
+        glare = float(np.count_nonzero(pixels >= _GLARE_LEVEL)) / pixels.size
+        metrics = {
+            "sharpness": round(sharpness, 1),
+            "brightness": round(brightness, 1),
+            "glare_ratio": round(glare, 4),
+        }
+        if kind == "document":
+            metrics["document_area"] = round(float(pixels.size) / gray.size, 3)
+        if kind == "face":
+            if sharpness < self.face_min_sharpness:
+                return ImageQualityReport("IMAGE_BLURRY", "Imagen borrosa, tome la foto nuevamente", metrics)
+            return ImageQualityReport(metrics=metrics)
+
+        if brightness < self.min_brightness:
+            return ImageQualityReport("IMAGE_TOO_DARK", "Imagen muy oscura, tome la foto con mas luz", metrics)
+        if brightness > self.max_brightness:
+            return ImageQualityReport("IMAGE_OVEREXPOSED", "Imagen sobreexpuesta, evite la luz directa", metrics)
+        if kind == "document" and glare > self.max_glare:
+            return ImageQualityReport("IMAGE_GLARE", "Hay reflejos sobre el documento, incline la cedula", metrics)
+        min_sharpness = self.min_sharpness if kind == "document" else self.scene_min_sharpness
+        if sharpness < min_sharpness:
+            return ImageQualityReport("IMAGE_BLURRY", "Imagen borrosa, tome la foto nuevamente", metrics)
+        return ImageQualityReport(metrics=metrics)
+
+
+def _document_mask(gray: np.ndarray) -> Optional[np.ndarray]:
+    # Pixeles dentro del contorno de la cedula; None si no se encontro (la cedula llena el cuadro)
+    quad = find_document_quad(gray)
+    if quad is None:
+        return None
+    mask = np.zeros(gray.shape, dtype=np.uint8)
+    cv2.fillConvexPoly(mask, quad.astype(np.int32), 1)
+    if np.count_nonzero(mask) < _MIN_QUAD_AREA * gray.size:
+        return None
+    return mask.astype(bool)
+
+
+def _env_float(value: Optional[float], name: str, default: str) -> float:
+    return value if value is not None else float(os.getenv(name, default))
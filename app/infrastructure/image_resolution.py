@@ -0,0 +1,86 @@
+import io
+from typing import Optional
+
+import cv2
+import numpy as np
+from PIL import Image, ImageOps
+
+_REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+_REDUCED_GRAY_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+
+def decode_bgr(image_bytes: bytes, max_side: int) -> Optional[np.ndarray]:
+    # Los JPEG grandes se decodifican directamente a 1/2, 1/4 o 1/8 (escalado en el dominio DCT)
+    flag = cv2.IMREAD_COLOR
+    size = _jpeg_size(image_bytes)
+    if size is not None and max_side > 0:
+        flag = _REDUCED_FLAGS[_reduction_factor(size, max_side)]
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), flag)
+    if image is None:
+        return image
+    return limit_max_side(image, max_side)
+
+
+def decode_gray(image_bytes: bytes, max_side: int) -> Optional[np.ndarray]:
+    flag = cv2.IMREAD_GRAYSCALE
+    size = _jpeg_size(image_bytes)
+    if size is not None and max_side > 0:
+        flag = _REDUCED_GRAY_FLAGS[_reduction_factor(size, max_side)]
+    image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), flag)
+    if image is None:
+        return image
+    return limit_max_side(image, max_side)
+
+
+def decode_rgb(image_bytes: bytes, max_side: int) -> np.ndarray:
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        if max_side > 0 and image.format == "JPEG" and max(image.size) > max_side:
+            scale = max_side / max(image.size)
+            # draft elige la mayor reduccion JPEG que no quede por debajo del tamano pedido
+            image.draft("RGB", (int(image.width * scale), int(image.height * scale)))
+        # PIL no aplica la orientacion EXIF por su cuenta (cv2.imdecode si)
+        upright = ImageOps.exif_transpose(image)
+        return limit_max_side(np.array(upright.convert("RGB")), max_side)
+
+
+def limit_max_side(image: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = image.shape[0], image.shape[1]
+    if max_side <= 0 or max(h, w) <= max_side:
+        return image
+    scale = max_side / max(h, w)
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def upscale_to_height(image: np.ndarray, min_height: int, max_factor: float = 2.0) -> np.ndarray:
+    # Solo se amplian los recortes con texto demasiado bajo para el detector
+    h, w = image.shape[0], image.shape[1]
+    if min_height <= 0 or h >= min_height:
+        return image
+    scale = min(max_factor, min_height / max(h, 1))
+    return cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_CUBIC)
+
+
+def _jpeg_size(image_bytes: bytes) -> Optional[tuple[int, int]]:
+    # Image.open solo lee la cabecera
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return image.size if image.format == "JPEG" else None
+    except Exception:
+        return None
+
+
+def _reduction_factor(size: tuple[int, int], max_side: int) -> int:
+    factor = 1
+    while factor < 8 and max(size) / (factor * 2) >= max_side:
+        factor *= 2
+    return factor
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from app.domain.face import FaceTemplate
+
+
+@dataclass
+class _StoreEntry:
+    template: FaceTemplate
+    expires_at: float
+
+
+class InMemoryFaceDescriptorStore:
+    def __init__(self, max_entries: int | None = None, ttl_seconds: float | None = None):
+        # Rostro de cedula ya descrito por numero de cedula: un visitante frecuente solo procesa la selfie
+        env_entries = os.getenv("FACE_DESCRIPTOR_STORE_MAX_ENTRIES", "512")
+        self.max_entries = max_entries if max_entries is not None else int(env_entries)
+        # Acota cuanto tiempo se confia en un rostro visto antes (renovacion de cedula, error de lectura)
+        env_ttl = os.getenv("FACE_DESCRIPTOR_STORE_TTL_SECONDS", "86400")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(env_ttl)
+        self._lock = Lock()
+        self._entries: OrderedDict[str, _StoreEntry] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, cedula: str) -> FaceTemplate | None:
+        with self._lock:
+            entry = self._entries.get(cedula)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[cedula]
+                return None
+            self._entries.move_to_end(cedula)
+            return entry.template
+
+    def put(self, cedula: str, template: FaceTemplate) -> int:
+        # Devuelve cuantas entradas se desalojaron por tamano (LRU)
+        if not self.enabled:
+            return 0
+        with self._lock:
+            self._entries[cedula] = _StoreEntry(template=template, expires_at=time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(cedula)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
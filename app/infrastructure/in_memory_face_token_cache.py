@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+
+from app.domain.face import FaceTemplate
+
+
+@dataclass
+class _TokenEntry:
+    template: FaceTemplate
+    expires_at: float
+
+
+class InMemoryFaceTokenCache:
+    def __init__(self, max_entries: int | None = None, ttl_seconds: float | None = None):
+        # Rostros de cedula recortados por /ocr/cedula, a la espera del /ocr/face-compare de la misma visita
+        env_entries = os.getenv("FACE_TOKEN_MAX_ENTRIES", "256")
+        self.max_entries = max_entries if max_entries is not None else int(env_entries)
+        env_ttl = os.getenv("FACE_TOKEN_TTL_SECONDS", "300")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(env_ttl)
+        self._lock = Lock()
+        self._entries: OrderedDict[str, _TokenEntry] = OrderedDict()
+        # Tokens descartados por TTL (sin usar o tras la ultima comparacion) y por tamano (LRU)
+        self._expired = 0
+        self._evicted = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def put(self, template: FaceTemplate) -> str | None:
+        if not self.enabled:
+            return None
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._purge_expired()
+            self._entries[token] = _TokenEntry(template=template, expires_at=time.monotonic() + self.ttl_seconds)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evicted += 1
+        return token
+
+    def get(self, token: str) -> FaceTemplate | None:
+        # No se consume: el kiosko puede repetir la comparacion con otra selfie dentro del TTL
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[token]
+                self._expired += 1
+                return None
+            return entry.template
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            self._purge_expired()
+            return {"size": len(self._entries), "expired": self._expired, "evicted": self._evicted}
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [token for token, entry in self._entries.items() if entry.expires_at <= now]
+        for token in expired:
+            del self._entries[token]
+        self._expired += len(expired)
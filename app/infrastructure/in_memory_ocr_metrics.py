@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from threading import Lock
+
+
+class InMemoryOcrMetrics:
+    def __init__(self):
+        self._lock = Lock()
+        self._counters: dict[str, dict[str, int]] = {}
+
+    def increment(self, group: str, key: str, amount: int = 1) -> None:
+        with self._lock:
+            counters = self._counters.setdefault(group, {})
+            counters[key] = counters.get(key, 0) + amount
+
+    def merge(self, snapshot: dict[str, dict[str, int]] | None) -> None:
+        if not snapshot:
+            return
+        with self._lock:
+            for group, counters in snapshot.items():
+                current = self._counters.setdefault(group, {})
+                for key, amount in counters.items():
+                    current[key] = current.get(key, 0) + amount
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        with self._lock:
+            return {group: dict(counters) for group, counters in self._counters.items()}
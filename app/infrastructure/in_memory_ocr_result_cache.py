@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any
+
+from app.infrastructure.image_hash import hamming_distance
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    fingerprint: int | None
+    expires_at: float
+
+
+class InMemoryOcrResultCache:
+    def __init__(
+        self,
+        max_entries: int | None = None,
+        ttl_seconds: float | None = None,
+        max_distance: int | None = None,
+    ):
+        # LRU por cantidad de entradas; 0 desactiva la cache
+        env_entries = os.getenv("OCR_CACHE_MAX_ENTRIES", "256")
+        self.max_entries = max_entries if max_entries is not None else int(env_entries)
+        env_ttl = os.getenv("OCR_CACHE_TTL_SECONDS", "120")
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(env_ttl)
+        # Bits distintos (de 256) para considerar una foto casi identica; negativo = solo SHA-256.
+        # Desactivado por defecto: el ruido del sensor separa mas dos tomas de la misma tarjeta
+        # que dos tarjetas distintas del mismo formato
+        env_distance = os.getenv("OCR_CACHE_PHASH_MAX_DISTANCE", "-1")
+        self.max_distance = max_distance if max_distance is not None else int(env_distance)
+        self._lock = Lock()
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get_exact(self, operation: str, digest: str) -> Any | None:
+        with self._lock:
+            key = (operation, digest)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def get_similar(self, operation: str, fingerprint: int | None) -> Any | None:
+        if fingerprint is None or self.max_distance < 0:
+            return None
+        with self._lock:
+            self._purge_expired()
+            best_key = None
+            best_distance = None
+            for key, entry in self._entries.items():
+                if key[0] != operation or entry.fingerprint is None:
+                    continue
+                distance = hamming_distance(fingerprint, entry.fingerprint)
+                if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                return None
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key].value
+
+    def put(self, operation: str, digest: str, fingerprint: int | None, value: Any) -> int:
+        # Devuelve cuantas entradas se desalojaron por tamano
+        if not self.enabled:
+            return 0
+        with self._lock:
+            key = (operation, digest)
+            self._entries[key] = _CacheEntry(
+                value=value,
+                fingerprint=fingerprint,
+                expires_at=time.monotonic() + self.ttl_seconds,
+            )
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            del self._entries[key]
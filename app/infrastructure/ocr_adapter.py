@@ -1,18 +1,23 @@
-import io
 import os
 import threading
+import time
 from datetime import datetime
 from typing import List, Optional
 
-import easyocr
 import numpy as np
 import cv2
-from PIL import Image
 
-from app.domain.ocr import OcrPort, OcrResult, OcrLine
+from app.domain.ocr import OcrPort, OcrResult, OcrLine, OcrPass, PreparedImage
+from app.infrastructure.cedula_layout_classifier import CedulaLayoutClassifier
+from app.infrastructure.document_contour import find_document_quad
+from app.infrastructure.image_hash import dhash
+from app.infrastructure.image_resolution import decode_rgb, upscale_to_height
+from app.infrastructure.plate_localizer import find_plate_regions
 
 
 class EasyOcrAdapter(OcrPort):
+    name = "easyocr"
+
     def __init__(self, languages: Optional[List[str]] = None, gpu: Optional[bool] = None):
         env_langs = os.getenv("EASYOCR_LANGS", "es,en")
         self.languages = languages or [lang.strip() for lang in env_langs.split(",") if lang.strip()]
@@ -20,8 +25,21 @@ class EasyOcrAdapter(OcrPort):
         self.gpu = gpu if gpu is not None else env_gpu in {"1", "true", "yes"}
         env_pre = os.getenv("EASYOCR_PREPROCESS", "true").lower()
         self.preprocess = env_pre in {"1", "true", "yes"}
+        # Las variantes mejoradas solo se prueban si la imagen original no alcanza estos umbrales
+        self.variant_min_confidence = float(os.getenv("EASYOCR_VARIANT_MIN_CONFIDENCE", "0.6"))
+        self.variant_min_chars = int(os.getenv("EASYOCR_VARIANT_MIN_CHARS", "6"))
+        # Lado mayor de trabajo por operacion y altura minima de los recortes ROI
+        self.document_max_side = int(os.getenv("OCR_DOCUMENT_MAX_SIDE", "2000"))
+        self.plate_max_side = int(os.getenv("OCR_PLATE_MAX_SIDE", "1600"))
+        self.roi_min_height = int(os.getenv("OCR_ROI_MIN_HEIGHT", "160"))
+        env_localizer = os.getenv("OCR_PLATE_LOCALIZER", "true").lower()
+        self.plate_localizer = env_localizer in {"1", "true", "yes"}
+        self.plate_max_candidates = int(os.getenv("OCR_PLATE_MAX_CANDIDATES", "3"))
         self._reader = None
         self._lock = threading.Lock()
+        # Tiempos de import y carga del modelo, para el log de arranque
+        self.load_stats: dict[str, float] = {}
+        self._layout_classifier = CedulaLayoutClassifier()
 
     def extract_text(
         self,
@@ -31,90 +49,232 @@ class EasyOcrAdapter(OcrPort):
         roi: tuple[float, float, float, float] | None = None,
         binarize: bool = False,
     ) -> OcrResult:
-        image = _load_image(image_bytes)
+        prepared = self.prepare_image(image_bytes, preprocess_mode=preprocess_mode)
+        ocr_pass = OcrPass(allowlist=allowlist, roi=roi, binarize=binarize)
+        return self.extract_text_passes(prepared, [ocr_pass])[0]
+
+    def prepare_image(self, image_bytes: bytes, preprocess_mode: str | None = None) -> PreparedImage:
+        max_side = self.document_max_side if preprocess_mode == "document" else self.plate_max_side
+        image = decode_rgb(image_bytes, max_side)
         _debug_dump(image, "input")
+        layout = None
         if preprocess_mode == "document":
             image = _normalize_document(image)
             _debug_dump(image, "document")
-        if roi is not None:
-            image = _crop_roi(image, roi)
-            _debug_dump(image, "roi")
-        image = _upscale_if_needed(image)
-        _debug_dump(image, "upscaled")
-        if binarize:
-            image = _binarize_strong(image)
-            _debug_dump(image, "binarized")
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        if preprocess_mode == "document":
+            layout, _ = self._layout_classifier.classify(gray)
+        prepared = PreparedImage(image=image, preprocess_mode=preprocess_mode, layout=layout, fingerprint=dhash(gray))
+        if preprocess_mode == "plate" and self.plate_localizer:
+            # Las pasadas ROI ya leen solo el recorte, asi que OcrPass.crop no cambia nada en este adapter
+            prepared.regions = find_plate_regions(gray, self.plate_max_candidates)
+        return prepared
+
+    def extract_text_passes(self, image: PreparedImage, passes: List[OcrPass]) -> List[OcrResult]:
         reader = self._get_reader()
+        results: List[Optional[OcrResult]] = [None] * len(passes)
+        roi_groups: dict[str | None, List[int]] = {}
+        for idx, ocr_pass in enumerate(passes):
+            if ocr_pass.roi is None:
+                results[idx] = self._run_pass(reader, image, ocr_pass)
+            else:
+                roi_groups.setdefault(ocr_pass.allowlist, []).append(idx)
+        # readtext_batched acepta un solo allowlist, asi que se agrupan las ROI por allowlist
+        for allowlist, indexes in roi_groups.items():
+            batch_results = self._run_roi_batch(reader, image, [passes[idx] for idx in indexes], allowlist)
+            for idx, result in zip(indexes, batch_results):
+                results[idx] = result
+        return results
+
+    def warm_up(self) -> None:
+        # Carga el modelo y ejecuta deteccion + reconocimiento una vez sobre texto sintetico
+        self._get_reader().readtext(_warmup_image())
+
+    def _run_pass(self, reader, image: PreparedImage, ocr_pass: OcrPass) -> OcrResult:
+        # La deteccion no depende del allowlist: se reutiliza entre pasadas sobre la misma imagen
+        # y solo se vuelve a ejecutar el reconocimiento.
+        variants = image.cache.setdefault(("variants", ocr_pass.roi, ocr_pass.binarize), {})
+        base = variants.get("raw")
+        if base is None:
+            base = _prepare_pass_image(image.image, ocr_pass, self.roi_min_height)
+            variants["raw"] = base
+
         results = []
-        for img in _iter_ocr_images(image, self.preprocess):
-            results.extend(reader.readtext(img, detail=1, paragraph=False, allowlist=allowlist))
-        results = _dedupe_results(results)
+        for variant in self._variant_names():
+            img = _get_variant(variants, base, variant)
+            detection_key = ("detection", ocr_pass.roi, ocr_pass.binarize, variant)
+            detection = image.cache.get(detection_key)
+            if detection is None:
+                horizontal_list, free_list = reader.detect(img)
+                detection = (horizontal_list[0], free_list[0])
+                image.cache[detection_key] = detection
+                image.inference_count += 1
+                image.detection_count += 1
+            results.extend(
+                reader.recognize(
+                    img,
+                    detection[0],
+                    detection[1],
+                    allowlist=ocr_pass.allowlist,
+                    detail=1,
+                    paragraph=False,
+                )
+            )
+            image.inference_count += 1
+            image.count("easyocr_variants", f"{variant}_runs")
+            if not self._needs_more_variants(results):
+                image.count("easyocr_variants", f"{variant}_hits")
+                break
+        else:
+            image.count("easyocr_variants", "exhausted")
+        return _to_ocr_result(_dedupe_results(results))
 
-        lines: List[OcrLine] = []
-        texts: List[str] = []
-        for bbox, text, conf in results:
-            norm_bbox = [[float(p[0]), float(p[1])] for p in bbox]
-            lines.append(OcrLine(text=text, confidence=float(conf), bbox=norm_bbox))
-            texts.append(text)
+    def _run_roi_batch(
+        self,
+        reader,
+        image: PreparedImage,
+        passes: List[OcrPass],
+        allowlist: str | None,
+    ) -> List[OcrResult]:
+        bases = [_prepare_pass_image(image.image, ocr_pass, self.roi_min_height) for ocr_pass in passes]
+        variant_caches = [{"raw": base} for base in bases]
+        collected = [[] for _ in passes]
+        pending = list(range(len(passes)))
+        for variant in self._variant_names():
+            if not pending:
+                break
+            batch = [_get_variant(variant_caches[pos], bases[pos], variant) for pos in pending]
+            batched = reader.readtext_batched(
+                _pad_to_common_shape(batch),
+                detail=1,
+                paragraph=False,
+                allowlist=allowlist,
+            )
+            image.inference_count += 1
+            image.detection_count += 1
+            image.count("easyocr_variants", f"{variant}_runs", len(pending))
 
-        full_text = "\n".join(texts).strip()
-        return OcrResult(text=full_text, lines=lines)
+            still_pending = []
+            for pos, img_results in zip(pending, batched):
+                collected[pos].extend(img_results)
+                if self._needs_more_variants(collected[pos]):
+                    still_pending.append(pos)
+                else:
+                    image.count("easyocr_variants", f"{variant}_hits")
+            pending = still_pending
+        if pending:
+            image.count("easyocr_variants", "exhausted", len(pending))
+        return [_to_ocr_result(_dedupe_results(results)) for results in collected]
 
-    def _get_reader(self) -> easyocr.Reader:
+    def _variant_names(self) -> tuple[str, ...]:
+        return _VARIANTS if self.preprocess else _VARIANTS[:1]
+
+    def _needs_more_variants(self, results) -> bool:
+        deduped = _dedupe_results(results)
+        if not deduped:
+            return True
+        mean_conf = sum(float(conf) for _, _, conf in deduped) / len(deduped)
+        chars = sum(len(text) for _, text, _ in deduped)
+        return mean_conf < self.variant_min_confidence or chars < self.variant_min_chars
+
+    def _get_reader(self):
         if self._reader is None:
             with self._lock:
                 if self._reader is None:
+                    # easyocr arrastra torch; se importa solo cuando se usa el motor
+                    start = time.perf_counter()
+                    import easyocr
+
+                    loaded = time.perf_counter()
                     self._reader = easyocr.Reader(self.languages, gpu=self.gpu)
+                    self.load_stats = {
+                        "import_ms": round((loaded - start) * 1000, 1),
+                        "load_ms": round((time.perf_counter() - loaded) * 1000, 1),
+                    }
         return self._reader
 
 
-def _load_image(image_bytes: bytes) -> np.ndarray:
-    with Image.open(io.BytesIO(image_bytes)) as image:
-        return np.array(image.convert("RGB"))
+def _warmup_image() -> np.ndarray:
+    image = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "0912345678", (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    return image
 
 
-def _iter_ocr_images(image: np.ndarray, preprocess: bool):
-    yield image
-    if not preprocess:
-        return
-    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(gray)
-    denoised = cv2.bilateralFilter(enhanced, 7, 50, 50)
-    yield denoised
-    thresh = cv2.adaptiveThreshold(
-        denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 35, 12
-    )
-    yield thresh
+def _prepare_pass_image(document: np.ndarray, ocr_pass: OcrPass, roi_min_height: int) -> np.ndarray:
+    image = document
+    if ocr_pass.roi is not None:
+        # _crop_roi devuelve una vista del documento, sin copiar pixeles
+        image = _crop_roi(image, ocr_pass.roi)
+        _debug_dump(image, "roi")
+        # El documento ya viene acotado; solo se amplian los recortes pequenos
+        image = upscale_to_height(image, roi_min_height)
+        _debug_dump(image, "upscaled")
+    if ocr_pass.binarize:
+        image = _binarize_strong(image)
+        _debug_dump(image, "binarized")
+    return image
 
 
-def _normalize_document(image: np.ndarray) -> np.ndarray:
-    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-    blur = cv2.GaussianBlur(gray, (5, 5), 0)
-    edges = cv2.Canny(blur, 50, 150)
-    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:5]
-    for contour in contours:
-        peri = cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
-        if len(approx) == 4:
-            pts = _order_points(approx.reshape(4, 2))
-            warped = _four_point_transform(image, pts)
-            if _is_reasonable_document(image, warped):
-                return warped
-            return image
+def _to_ocr_result(results) -> OcrResult:
+    lines: List[OcrLine] = []
+    texts: List[str] = []
+    for bbox, text, conf in results:
+        norm_bbox = [[float(p[0]), float(p[1])] for p in bbox]
+        lines.append(OcrLine(text=text, confidence=float(conf), bbox=norm_bbox))
+        texts.append(text)
+
+    full_text = "\n".join(texts).strip()
+    return OcrResult(text=full_text, lines=lines)
+
+
+def _pad_to_common_shape(images: List[np.ndarray]) -> List[np.ndarray]:
+    # readtext_batched exige imagenes del mismo tamano; se rellena abajo/derecha
+    # para no deformar los recortes ni desplazar las coordenadas de los bbox.
+    max_h = max(img.shape[0] for img in images)
+    max_w = max(img.shape[1] for img in images)
+    padded = []
+    for img in images:
+        pad_h = max_h - img.shape[0]
+        pad_w = max_w - img.shape[1]
+        if pad_h or pad_w:
+            img = cv2.copyMakeBorder(img, 0, pad_h, 0, pad_w, cv2.BORDER_CONSTANT, value=(255, 255, 255))
+        padded.append(img)
+    return padded
+
+
+# Orden en que se prueban las variantes de preprocesamiento
+_VARIANTS = ("raw", "clahe", "threshold")
+
+
+def _get_variant(variants: dict, base: np.ndarray, variant: str) -> np.ndarray:
+    cached = variants.get(variant)
+    if cached is not None:
+        return cached
+    if variant == "raw":
+        image = base
+    elif variant == "clahe":
+        gray = cv2.cvtColor(base, cv2.COLOR_RGB2GRAY)
+        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        enhanced = clahe.apply(gray)
+        image = cv2.bilateralFilter(enhanced, 7, 50, 50)
+    else:
+        denoised = _get_variant(variants, base, "clahe")
+        image = cv2.adaptiveThreshold(
+            denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 35, 12
+        )
+    variants[variant] = image
     return image
 
 
-def _order_points(pts: np.ndarray) -> np.ndarray:
-    rect = np.zeros((4, 2), dtype="float32")
-    s = pts.sum(axis=1)
-    rect[0] = pts[np.argmin(s)]
-    rect[2] = pts[np.argmax(s)]
-    diff = np.diff(pts, axis=1)
-    rect[1] = pts[np.argmin(diff)]
-    rect[3] = pts[np.argmax(diff)]
-    return rect
+def _normalize_document(image: np.ndarray) -> np.ndarray:
+    # Los bordes se buscan en una copia reducida; el warp se hace sobre la imagen completa
+    pts = find_document_quad(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY))
+    if pts is None:
+        return image
+    warped = _four_point_transform(image, pts)
+    if _is_reasonable_document(image, warped):
+        return warped
+    return image
 
 
 def _four_point_transform(image: np.ndarray, pts: np.ndarray) -> np.ndarray:
@@ -163,16 +323,6 @@ def _is_reasonable_document(original: np.ndarray, warped: np.ndarray) -> bool:
     return True
 
 
-def _upscale_if_needed(image: np.ndarray) -> np.ndarray:
-    h, w = image.shape[0], image.shape[1]
-    if h >= 900:
-        return image
-    scale = 2.0
-    new_w = int(w * scale)
-    new_h = int(h * scale)
-    return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_CUBIC)
-
-
 def _binarize_strong(image: np.ndarray) -> np.ndarray:
     gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
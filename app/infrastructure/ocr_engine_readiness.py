@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from threading import Lock
+
+
+class OcrEngineReadiness:
+    def __init__(self):
+        self._lock = Lock()
+        self._engines: dict[str, dict] = {}
+        self._workers: dict[str, dict[str, bool]] = {}
+        self._expected_workers = 0
+        self._attempts = 0
+        self._warming = True
+
+    def record(self, reports: dict[int, dict[str, dict]], expected_workers: int = 0, final: bool = True) -> None:
+        # Un reporte por pid de worker: el motor esta listo solo si cargo en todos, y el servicio
+        # solo si respondieron todos los workers. Cada intento reemplaza al anterior; con final=False
+        # quedan reintentos y el servicio sigue "en calentamiento"
+        with self._lock:
+            self._engines = {}
+            self._workers = {}
+            self._expected_workers = expected_workers
+            self._attempts += 1
+            for pid, report in reports.items():
+                self._workers[str(pid)] = {engine: bool(info.get("ready")) for engine, info in report.items()}
+                for engine, info in report.items():
+                    current = self._engines.setdefault(engine, {"ready": True, "workers": 0})
+                    current["ready"] = current["ready"] and bool(info.get("ready"))
+                    current["workers"] += 1
+                    # Tiempos (import_ms, load_ms, warmup_ms): se reporta el worker mas lento
+                    for key, value in info.items():
+                        if key.endswith("_ms"):
+                            current[key] = max(current.get(key, 0.0), float(value))
+                    if info.get("error"):
+                        current["error"] = info["error"]
+            self._warming = not final and not self._all_ready()
+
+    def finish(self) -> None:
+        with self._lock:
+            self._warming = False
+
+    def reset(self) -> None:
+        # El pool se recreo: los workers nuevos arrancan frios hasta el proximo calentamiento
+        with self._lock:
+            self._engines = {}
+            self._workers = {}
+            self._expected_workers = 0
+            self._attempts = 0
+            self._warming = True
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return not self._warming and self._all_ready()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "warming": self._warming,
+                "attempts": self._attempts,
+                "expected_workers": self._expected_workers,
+                "engines": {engine: dict(info) for engine, info in self._engines.items()},
+                "workers": {pid: dict(engines) for pid, engines in self._workers.items()},
+            }
+
+    def _all_ready(self) -> bool:
+        return len(self._workers) >= self._expected_workers and all(
+            info["ready"] for info in self._engines.values()
+        )
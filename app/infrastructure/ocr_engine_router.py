@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import random
+from threading import Lock
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Fotos de celular suelen superar 1 MB; las capturas del kiosko quedan por debajo
+_LARGE_UPLOAD_BYTES = 1_000_000
+
+
+def classify_request(operation: str, image_bytes: bytes) -> str:
+    # Clase barata, sin decodificar: operacion + formato + tamano de la subida
+    image_format = "png" if image_bytes[:8] == _PNG_SIGNATURE else "jpeg"
+    size = "large" if len(image_bytes) >= _LARGE_UPLOAD_BYTES else "small"
+    return f"{operation}:{image_format}:{size}"
+
+
+class OcrEngineRouter:
+    def __init__(
+        self,
+        epsilon: float | None = None,
+        min_samples: int | None = None,
+        window: int | None = None,
+    ):
+        self.epsilon = epsilon if epsilon is not None else float(os.getenv("OCR_ROUTER_EPSILON", "0.1"))
+        env_samples = os.getenv("OCR_ROUTER_MIN_SAMPLES", "20")
+        self.min_samples = min_samples if min_samples is not None else int(env_samples)
+        # Al superar la ventana se reducen los contadores a la mitad para seguir cambios de trafico
+        self.window = window if window is not None else int(os.getenv("OCR_ROUTER_WINDOW", "500"))
+        self._lock = Lock()
+        # clase -> motor -> {"runs", "successes", "total_ms"}
+        self._stats: dict[str, dict[str, dict[str, float]]] = {}
+
+    def record(self, request_class: str, engine: str, latency_ms: float, success: bool) -> None:
+        self.merge({request_class: {engine: {"runs": 1, "successes": int(success), "total_ms": latency_ms}}})
+
+    def merge(self, snapshot: dict[str, dict[str, dict[str, float]]] | None) -> None:
+        if not snapshot:
+            return
+        with self._lock:
+            for request_class, engines in snapshot.items():
+                for engine, values in engines.items():
+                    current = self._stats.setdefault(request_class, {}).setdefault(
+                        engine, {"runs": 0, "successes": 0, "total_ms": 0.0}
+                    )
+                    for key, value in values.items():
+                        current[key] = current.get(key, 0) + value
+                    if current["runs"] > self.window:
+                        for key in current:
+                            current[key] /= 2
+
+    def choose(self, request_class: str, engines: list[str]) -> str:
+        # engines viene en el orden por defecto; se usa mientras no haya muestras suficientes
+        if len(engines) < 2:
+            return engines[0]
+        if random.random() < self.epsilon:
+            return random.choice(engines)
+        with self._lock:
+            stats = self._stats.get(request_class, {})
+            if any(stats.get(engine, {}).get("runs", 0) < self.min_samples for engine in engines):
+                return engines[0]
+            costs = {engine: self._expected_cost(stats, engine, engines) for engine in engines}
+        return min(engines, key=lambda engine: costs[engine])
+
+    def snapshot(self) -> dict[str, dict[str, dict[str, float]]]:
+        with self._lock:
+            return {
+                request_class: {engine: dict(values) for engine, values in engines.items()}
+                for request_class, engines in self._stats.items()
+            }
+
+    def _expected_cost(self, stats: dict, primary: str, engines: list[str]) -> float:
+        # Latencia esperada si primary va primero: su tiempo + el del respaldo cuando falla
+        first = stats[primary]
+        cost = first["total_ms"] / first["runs"]
+        failure = 1 - first["successes"] / first["runs"]
+        for engine in engines:
+            if engine != primary:
+                cost += failure * stats[engine]["total_ms"] / stats[engine]["runs"]
+        return cost
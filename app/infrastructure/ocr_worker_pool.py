@@ -0,0 +1,253 @@
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class OcrPoolSaturatedError(Exception):
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"OCR pool saturated, retry after {retry_after}s")
+
+
+@dataclass(frozen=True)
+class SharedBytesHandle:
+    name: str
+    size: int
+
+
+class OcrWorkerPool:
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        retry_after: Optional[int] = None,
+        warmup: Optional[Callable[[], Any] | str] = None,
+    ):
+        # OCR_WORKERS=0 ejecuta los trabajos en un hilo del mismo proceso (sin modelos duplicados)
+        self.workers = workers if workers is not None else int(os.getenv("OCR_WORKERS", "2"))
+        self.queue_size = queue_size if queue_size is not None else int(os.getenv("OCR_QUEUE_SIZE", "4"))
+        env_threads = os.getenv("OCR_WORKER_THREADS", "2")
+        self.threads_per_worker = threads_per_worker if threads_per_worker is not None else int(env_threads)
+        env_retry = os.getenv("OCR_RETRY_AFTER_SECONDS", "5")
+        self.retry_after = retry_after if retry_after is not None else int(env_retry)
+        # Fotos a partir de este tamano viajan al worker por memoria compartida, no por el pipe
+        self.shm_min_bytes = int(os.getenv("OCR_SHM_MIN_BYTES", "65536"))
+        # Cada worker lo ejecuta al arrancar, asi nunca atiende trabajos con modelos frios
+        self.warmup = warmup
+        # Se incrementa cada vez que el pool se recrea; on_reset avisa al dueno (p. ej. para volver a calentar)
+        self.generation = 0
+        self.on_reset: Optional[Callable[[], Any]] = None
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._shm_jobs = 0
+        self._shm_bytes = 0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.queue_size
+
+    async def run(self, fn: Callable[..., Any] | str, *args: Any) -> Any:
+        # fn puede ser "modulo:funcion"; se importa en el worker, no en el proceso de la API
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                raise OcrPoolSaturatedError(self.retry_after)
+            self._in_flight += 1
+
+        segments: list[shared_memory.SharedMemory] = []
+        try:
+            if self.workers > 0:
+                args = tuple(self._share_bytes(arg, segments) for arg in args)
+            future = self._get_executor().submit(_call_job, fn, *args)
+        except BaseException:
+            _unlink_segments(segments)
+            self._release()
+            raise
+        # El cupo y los segmentos se liberan cuando el worker termina, aunque el cliente haya cancelado
+        future.add_done_callback(lambda _: self._finish(segments))
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            logger.exception("ocr_pool_broken workers=%s", self.workers)
+            self._reset_executor()
+            raise
+
+    async def warm_up(self, rounds: int = 3) -> dict[int, Any]:
+        # Reporte de calentamiento por pid de worker. Un sondeo por worker; al enviarlos juntos el
+        # executor arranca todos los procesos, pero nada garantiza que cada uno caiga en un worker
+        # distinto: se sondea de nuevo hasta ver todos los pids (o agotar las rondas)
+        if self.warmup is None:
+            return {}
+        expected = max(self.workers, 1)
+        reports: dict[int, Any] = {}
+        for _ in range(rounds):
+            executor = self._get_executor()
+            missing = expected - len(reports)
+            futures = [asyncio.wrap_future(executor.submit(_probe_worker, self.warmup)) for _ in range(missing)]
+            for pid, report in await asyncio.gather(*futures):
+                reports[pid] = report
+            if len(reports) >= expected:
+                break
+        return reports
+
+    def has_spare_capacity(self) -> bool:
+        # Se consulta antes de enviar el trabajo, que aun no cuenta en _in_flight: solo hay capacidad
+        # libre si, sumandolo, sigue quedando un worker ocioso para el hilo del fallback (nunca con OCR_WORKERS=0)
+        with self._lock:
+            return self._in_flight + 1 < self.workers
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "shm_jobs": self._shm_jobs,
+                "shm_bytes": self._shm_bytes,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _share_bytes(self, value: Any, segments: list[shared_memory.SharedMemory]) -> Any:
+        if isinstance(value, list):
+            # Rafagas de fotos: cada elemento viaja por su propio segmento
+            return [self._share_bytes(item, segments) for item in value]
+        if not isinstance(value, (bytes, bytearray)) or len(value) < self.shm_min_bytes:
+            return value
+        segment = shared_memory.SharedMemory(create=True, size=len(value))
+        segments.append(segment)
+        segment.buf[: len(value)] = value
+        with self._lock:
+            self._shm_jobs += 1
+            self._shm_bytes += len(value)
+        return SharedBytesHandle(name=segment.name, size=len(value))
+
+    def _finish(self, segments: list[shared_memory.SharedMemory]) -> None:
+        _unlink_segments(segments)
+        self._release()
+
+    def _release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            executor = self._executor
+            self._executor = None
+            self.generation += 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self.on_reset is not None:
+            self.on_reset()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.workers > 0:
+                    # spawn: torch/paddle no son seguros tras fork con hilos activos
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.threads_per_worker, self.warmup),
+                    )
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr")
+                logger.info(
+                    "ocr_pool_started workers=%s queue_size=%s threads_per_worker=%s",
+                    self.workers,
+                    self.queue_size,
+                    self.threads_per_worker,
+                )
+            return self._executor
+
+
+def _call_job(fn: Callable[..., Any] | str, *args: Any) -> Any:
+    return _resolve(fn)(*(_materialize(arg) for arg in args))
+
+
+def _probe_worker(warmup: Callable[[], Any] | str) -> tuple[int, Any]:
+    return os.getpid(), _resolve(warmup)()
+
+
+def _materialize(value: Any) -> Any:
+    if isinstance(value, SharedBytesHandle):
+        return _read_shared_bytes(value)
+    if isinstance(value, list):
+        return [_materialize(item) for item in value]
+    return value
+
+
+def _resolve(fn: Callable[..., Any] | str) -> Callable[..., Any]:
+    if not isinstance(fn, str):
+        return fn
+    module_name, _, attr = fn.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def _read_shared_bytes(handle: SharedBytesHandle) -> bytes:
+    # El segmento es del proceso de la API, que lo libera. Antes de 3.13 adjuntarlo tambien lo
+    # registra en el resource_tracker del worker (bpo-39959): al apagar avisaria de una fuga y
+    # volveria a hacer unlink de un segmento ya liberado
+    if sys.version_info >= (3, 13):
+        segment = shared_memory.SharedMemory(name=handle.name, track=False)
+    else:
+        segment = shared_memory.SharedMemory(name=handle.name)
+        resource_tracker.unregister(segment._name, "shared_memory")
+    try:
+        # Una sola copia local; el pipe solo transporta el nombre del segmento
+        return bytes(segment.buf[: handle.size])
+    finally:
+        segment.close()
+
+
+def _unlink_segments(segments: list[shared_memory.SharedMemory]) -> None:
+    for segment in segments:
+        segment.close()
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _init_worker(threads: int, warmup: Optional[Callable[[], Any] | str] = None) -> None:
+    # Debe ejecutarse antes de importar numpy/torch/paddle en el worker
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    os.environ.setdefault("PADDLE_OCR_CPU_THREADS", str(threads))
+
+    level_name = os.getenv("LOG_LEVEL", "INFO").upper()
+    logging.basicConfig(
+        level=getattr(logging, level_name, logging.INFO),
+        format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+    )
+
+    import cv2
+
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+    except ImportError:
+        torch = None
+    if torch is not None:
+        torch.set_num_threads(threads)
+    logger.info("ocr_worker_started pid=%s threads=%s", os.getpid(), threads)
+    if warmup is not None:
+        _resolve(warmup)()
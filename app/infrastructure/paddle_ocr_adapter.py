@@ -1,20 +1,32 @@
 import os
 import threading
+import time
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 import cv2
 import numpy as np
 
-from app.domain.ocr import OcrPort, OcrResult, OcrLine
+from app.domain.ocr import OcrPort, OcrResult, OcrLine, OcrPass, PreparedImage
+from app.infrastructure.cedula_layout_classifier import CedulaLayoutClassifier
+from app.infrastructure.document_contour import find_document_quad
+from app.infrastructure.document_orientation import deskew, estimate_skew
+from app.infrastructure.image_hash import dhash
+from app.infrastructure.image_resolution import decode_bgr, upscale_to_height
+from app.infrastructure.plate_localizer import find_plate_regions
 
 os.environ.setdefault("FLAGS_use_onednn", "0")
 os.environ.setdefault("FLAGS_enable_onednn", "0")
 os.environ.setdefault("FLAGS_use_mkldnn", "0")
 os.environ.setdefault("FLAGS_enable_pir_api", "0")
 
+# Mismo umbral que aplica PaddleOCR por defecto (drop_score) al combinar deteccion y reconocimiento
+_DROP_SCORE = 0.5
+
 
 class PaddleOcrAdapter(OcrPort):
+    name = "paddle"
+
     def __init__(
         self,
         lang: Optional[str] = None,
@@ -24,10 +36,29 @@ class PaddleOcrAdapter(OcrPort):
         self.lang = lang or os.getenv("PADDLE_OCR_LANG", "es")
         env_gpu = os.getenv("PADDLE_OCR_GPU", "false").lower()
         self.use_gpu = use_gpu if use_gpu is not None else env_gpu in {"1", "true", "yes"}
-        env_angle = os.getenv("PADDLE_OCR_ANGLE", "true").lower()
-        self.use_angle_cls = use_angle_cls if use_angle_cls is not None else env_angle in {"1", "true", "yes"}
+        # auto: se reconoce sin clasificador de angulo y solo se reintenta con el las cajas de baja confianza
+        env_angle = os.getenv("PADDLE_OCR_ANGLE", "auto").lower()
+        if use_angle_cls is not None:
+            env_angle = "true" if use_angle_cls else "false"
+        self.angle_mode = "auto" if env_angle == "auto" else ("true" if env_angle in {"1", "true", "yes"} else "false")
+        self.use_angle_cls = self.angle_mode != "false"
+        self.angle_retry_score = float(os.getenv("PADDLE_OCR_ANGLE_RETRY_SCORE", "0.6"))
+        env_deskew = os.getenv("OCR_DESKEW", "true").lower()
+        self.deskew = env_deskew in {"1", "true", "yes"}
+        env_threads = os.getenv("PADDLE_OCR_CPU_THREADS")
+        self.cpu_threads = int(env_threads) if env_threads else None
+        # Lado mayor de trabajo por operacion (el detector de Paddle reduce a 960 px de todos modos)
+        self.document_max_side = int(os.getenv("OCR_DOCUMENT_MAX_SIDE", "2000"))
+        self.plate_max_side = int(os.getenv("OCR_PLATE_MAX_SIDE", "1600"))
+        self.roi_min_height = int(os.getenv("OCR_ROI_MIN_HEIGHT", "160"))
+        env_localizer = os.getenv("OCR_PLATE_LOCALIZER", "true").lower()
+        self.plate_localizer = env_localizer in {"1", "true", "yes"}
+        self.plate_max_candidates = int(os.getenv("OCR_PLATE_MAX_CANDIDATES", "3"))
         self._ocr = None
         self._lock = threading.Lock()
+        # Tiempos de import y carga del modelo, para el log de arranque
+        self.load_stats: dict[str, float] = {}
+        self._layout_classifier = CedulaLayoutClassifier()
 
     def extract_text(
         self,
@@ -37,54 +68,172 @@ class PaddleOcrAdapter(OcrPort):
         roi: tuple[float, float, float, float] | None = None,
         binarize: bool = False,
     ) -> OcrResult:
-        image = _load_image_bgr(image_bytes)
+        prepared = self.prepare_image(image_bytes, preprocess_mode=preprocess_mode)
+        ocr_pass = OcrPass(allowlist=allowlist, roi=roi, binarize=binarize)
+        return self.extract_text_passes(prepared, [ocr_pass])[0]
+
+    def prepare_image(self, image_bytes: bytes, preprocess_mode: str | None = None) -> PreparedImage:
+        max_side = self.document_max_side if preprocess_mode == "document" else self.plate_max_side
+        # imdecode ya aplica la orientacion EXIF de la foto
+        image = decode_bgr(image_bytes, max_side)
         _debug_dump(image, "input")
+        layout = None
+        deskewed = False
         if preprocess_mode == "document":
             image = _normalize_document(image)
+            if self.deskew:
+                image, deskewed = deskew(image, estimate_skew(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)))
             _debug_dump(image, "document")
-        if roi is not None:
-            image = _crop_roi(image, roi)
-            _debug_dump(image, "roi")
-        image = _upscale_if_needed(image)
-        _debug_dump(image, "upscaled")
-        if binarize:
-            image = _binarize_strong(image)
-            _debug_dump(image, "binarized")
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if preprocess_mode == "document":
+            layout, _ = self._layout_classifier.classify(gray)
+        prepared = PreparedImage(
+            image=image,
+            preprocess_mode=preprocess_mode,
+            color="bgr",
+            layout=layout,
+            fingerprint=dhash(gray),
+        )
+        if preprocess_mode == "document" and self.deskew:
+            prepared.count("paddle_deskew", "applied" if deskewed else "upright")
+        if preprocess_mode == "plate" and self.plate_localizer:
+            prepared.regions = find_plate_regions(gray, self.plate_max_candidates)
+        return prepared
 
+    def extract_text_passes(self, image: PreparedImage, passes: List[OcrPass]) -> List[OcrResult]:
+        # Paddle aplica el allowlist despues de reconocer, asi que todas las pasadas comparten
+        # una sola deteccion sobre el documento y el reconocimiento de cada caja se hace una vez.
+        # Las pasadas con crop=True detectan dentro de su recorte (una deteccion por ROI).
         ocr = self._get_ocr()
-        try:
-            result = ocr.ocr(image, cls=self.use_angle_cls)
-        except TypeError:
-            # Older versions may not accept cls parameter
-            result = ocr.ocr(image)
-
-        lines = []
-        texts = []
-        for line in result[0] if result else []:
-            bbox, (text, conf) = line
-            text = _apply_allowlist(text, allowlist)
-            if not text:
-                continue
-            lines.append(OcrLine(text=text, confidence=float(conf), bbox=bbox))
-            texts.append(text)
-
-        return OcrResult(text="\n".join(texts).strip(), lines=lines)
+        recognized = image.cache.setdefault("recognized", {})
+
+        selections = []
+        pending: dict[tuple, np.ndarray] = {}
+        for ocr_pass in passes:
+            region, work, selected = self._select_boxes(ocr, image, ocr_pass)
+            selections.append((region, selected))
+            for box_idx, box in selected:
+                key = (region, box_idx, ocr_pass.binarize)
+                if key in recognized or key in pending:
+                    continue
+                source = self._binarized_image(image, work, region) if ocr_pass.binarize else work
+                crop = _crop_text_box(source, box)
+                if crop is None:
+                    recognized[key] = None
+                    continue
+                pending[key] = crop
+
+        if pending:
+            keys = list(pending)
+            batch = self._recognize(ocr, image, [pending[key] for key in keys])
+            for key, rec in zip(keys, batch):
+                recognized[key] = rec
+
+        results = []
+        for ocr_pass, (region, selected) in zip(passes, selections):
+            lines = []
+            for box_idx, box in selected:
+                rec = recognized.get((region, box_idx, ocr_pass.binarize))
+                if not rec:
+                    continue
+                text, conf = rec
+                if conf < _DROP_SCORE:
+                    continue
+                text = _apply_allowlist(text, ocr_pass.allowlist)
+                if not text:
+                    continue
+                lines.append(OcrLine(text=text, confidence=float(conf), bbox=box))
+            results.append(OcrResult(text="\n".join(line.text for line in lines).strip(), lines=lines))
+        return results
+
+    def warm_up(self) -> None:
+        # Carga los modelos y ejecuta deteccion + reconocimiento una vez sobre texto sintetico
+        ocr = self._get_ocr()
+        image = _warmup_image()
+        _detect_boxes(ocr, image)
+        _recognize_batch(ocr, [image], self.use_angle_cls)
+
+    def _recognize(self, ocr, image: PreparedImage, crops: List[np.ndarray]) -> list:
+        image.inference_count += 1
+        if self.angle_mode != "auto":
+            return _recognize_batch(ocr, crops, self.angle_mode == "true")
+        batch = _recognize_batch(ocr, crops, False)
+        image.count("paddle_angle_cls", "crops", len(crops))
+        retry = [idx for idx, rec in enumerate(batch) if not rec or rec[1] < self.angle_retry_score]
+        if not retry:
+            return batch
+        # Solo estas cajas pagan el clasificador (texto invertido que el deskew no corrige)
+        image.inference_count += 1
+        image.count("paddle_angle_cls", "retried", len(retry))
+        second = _recognize_batch(ocr, [crops[idx] for idx in retry], True)
+        for idx, rec in zip(retry, second):
+            if rec and (not batch[idx] or rec[1] > batch[idx][1]):
+                batch[idx] = rec
+                image.count("paddle_angle_cls", "recovered")
+        return batch
+
+    def _select_boxes(self, ocr, image: PreparedImage, ocr_pass: OcrPass):
+        # Devuelve (region, imagen de trabajo, cajas); region es None cuando las cajas son del documento completo
+        if ocr_pass.crop and ocr_pass.roi is not None:
+            cached = image.cache.get(("crop", ocr_pass.roi))
+            if cached is None:
+                work = upscale_to_height(_crop_roi(image.image, ocr_pass.roi), self.roi_min_height)
+                _debug_dump(work, "roi")
+                cached = (work, _sort_boxes(_detect_boxes(ocr, work)))
+                image.cache[("crop", ocr_pass.roi)] = cached
+                image.inference_count += 1
+                image.detection_count += 1
+            work, boxes = cached
+            return ocr_pass.roi, work, list(enumerate(boxes))
+        # Sin ampliar el documento: el detector lo reduce a 960 px y el reconocedor lleva cada caja a 48 px
+        work = image.image
+        boxes = self._detect_cached(ocr, image, work)
+        if ocr_pass.roi is None:
+            return None, work, list(enumerate(boxes))
+        return None, work, _boxes_in_roi(boxes, work, ocr_pass.roi)
+
+    def _binarized_image(self, image: PreparedImage, work: np.ndarray, region=None) -> np.ndarray:
+        binarized = image.cache.get(("binarized", region))
+        if binarized is None:
+            binarized = _binarize_strong(work)
+            _debug_dump(binarized, "binarized")
+            image.cache[("binarized", region)] = binarized
+        return binarized
+
+    def _detect_cached(self, ocr, image: PreparedImage, work: np.ndarray) -> list:
+        boxes = image.cache.get("boxes")
+        if boxes is None:
+            boxes = _sort_boxes(_detect_boxes(ocr, work))
+            image.cache["boxes"] = boxes
+            image.inference_count += 1
+            image.detection_count += 1
+        return boxes
 
     def _get_ocr(self):
         if self._ocr is None:
             with self._lock:
                 if self._ocr is None:
                     from inspect import signature
+
+                    start = time.perf_counter()
                     from paddleocr import PaddleOCR
 
+                    loaded = time.perf_counter()
+
                     kwargs = {
                         "use_angle_cls": self.use_angle_cls,
                         "lang": self.lang,
                         "use_gpu": self.use_gpu,
                     }
+                    if self.cpu_threads:
+                        kwargs["cpu_threads"] = self.cpu_threads
                     params = signature(PaddleOCR.__init__).parameters
                     filtered = {k: v for k, v in kwargs.items() if k in params}
                     self._ocr = PaddleOCR(**filtered)
+                    self.load_stats = {
+                        "import_ms": round((loaded - start) * 1000, 1),
+                        "load_ms": round((time.perf_counter() - loaded) * 1000, 1),
+                    }
         return self._ocr
 
 
@@ -95,41 +244,104 @@ def _apply_allowlist(text: str, allowlist: Optional[str]) -> str:
     return "".join(ch for ch in text if ch in allowed)
 
 
-def _load_image_bgr(image_bytes: bytes) -> np.ndarray:
-    data = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(data, cv2.IMREAD_COLOR)
-    if image is None:
+def _detect_boxes(ocr, image: np.ndarray) -> list:
+    result = ocr.ocr(image, det=True, rec=False, cls=False)
+    if not result or not result[0]:
+        return []
+    return [[[float(p[0]), float(p[1])] for p in box] for box in result[0]]
+
+
+def _sort_boxes(boxes: list) -> list:
+    # Mismo orden que usa PaddleOCR en det+rec: de arriba hacia abajo y de izquierda a derecha
+    ordered = sorted(boxes, key=lambda box: (box[0][1], box[0][0]))
+    for i in range(len(ordered) - 1):
+        for j in range(i, -1, -1):
+            current, following = ordered[j], ordered[j + 1]
+            if abs(following[0][1] - current[0][1]) < 10 and following[0][0] < current[0][0]:
+                ordered[j], ordered[j + 1] = following, current
+            else:
+                break
+    return ordered
+
+
+def _recognize_batch(ocr, crops: List[np.ndarray], use_angle_cls: bool) -> list:
+    # Un (texto, confianza) por recorte, en el mismo orden. Desde 2.6, ocr.ocr trata una lista como
+    # paginas de un PDF (y recorta a page_num), asi que se llama al reconocedor del pipeline en lote
+    if not crops:
+        return []
+    recognizer = getattr(ocr, "text_recognizer", None)
+    if recognizer is not None:
+        images = list(crops)
+        classifier = getattr(ocr, "text_classifier", None)
+        if use_angle_cls and classifier is not None:
+            images, _, _ = classifier(images)
+        result, _ = recognizer(images)
+    else:
+        # Todos los recortes como una sola pagina
+        pages = ocr.ocr([list(crops)], det=False, cls=use_angle_cls)
+        result = pages[0] if pages else []
+    result = list(result or [])
+    if len(result) != len(crops):
+        raise RuntimeError(f"PaddleOCR devolvio {len(result)} lecturas para {len(crops)} recortes")
+    return result
+
+
+def _boxes_in_roi(boxes: list, image: np.ndarray, roi: tuple[float, float, float, float]):
+    x, y, w, h = roi
+    h_img, w_img = image.shape[0], image.shape[1]
+    x1 = max(0, min(1, x)) * w_img
+    y1 = max(0, min(1, y)) * h_img
+    x2 = max(0, min(1, x + w)) * w_img
+    y2 = max(0, min(1, y + h)) * h_img
+    if x2 - x1 < 80 or y2 - y1 < 40:
+        # Misma regla que _crop_roi en ocr_adapter: una ROI demasiado pequena equivale a todo el documento
+        return list(enumerate(boxes))
+    selected = []
+    for idx, box in enumerate(boxes):
+        cx = sum(p[0] for p in box) / len(box)
+        cy = sum(p[1] for p in box) / len(box)
+        if x1 <= cx <= x2 and y1 <= cy <= y2:
+            selected.append((idx, box))
+    return selected
+
+
+def _crop_roi(image: np.ndarray, roi: tuple[float, float, float, float]) -> np.ndarray:
+    x, y, w, h = roi
+    h_img, w_img = image.shape[0], image.shape[1]
+    x1 = int(max(0, min(1, x)) * w_img)
+    y1 = int(max(0, min(1, y)) * h_img)
+    x2 = int(max(0, min(1, x + w)) * w_img)
+    y2 = int(max(0, min(1, y + h)) * h_img)
+    if x2 <= x1 or y2 <= y1:
         return image
-    return image
+    return image[y1:y2, x1:x2]
 
 
-def _normalize_document(image: np.ndarray) -> np.ndarray:
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    blur = cv2.GaussianBlur(gray, (5, 5), 0)
-    edges = cv2.Canny(blur, 50, 150)
-    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:5]
-    for contour in contours:
-        peri = cv2.arcLength(contour, True)
-        approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
-        if len(approx) == 4:
-            pts = _order_points(approx.reshape(4, 2))
-            warped = _four_point_transform(image, pts)
-            if _is_reasonable_document(image, warped):
-                return warped
-            return image
+def _crop_text_box(image: np.ndarray, box: list) -> Optional[np.ndarray]:
+    pts = np.array(box, dtype="float32")
+    crop = _four_point_transform(image, pts)
+    if crop is image or crop.shape[0] < 2 or crop.shape[1] < 2:
+        return None
+    if crop.shape[0] / crop.shape[1] >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+
+def _warmup_image() -> np.ndarray:
+    image = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "0912345678", (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
     return image
 
 
-def _order_points(pts: np.ndarray) -> np.ndarray:
-    rect = np.zeros((4, 2), dtype="float32")
-    s = pts.sum(axis=1)
-    rect[0] = pts[np.argmin(s)]
-    rect[2] = pts[np.argmax(s)]
-    diff = np.diff(pts, axis=1)
-    rect[1] = pts[np.argmin(diff)]
-    rect[3] = pts[np.argmax(diff)]
-    return rect
+def _normalize_document(image: np.ndarray) -> np.ndarray:
+    # Los bordes se buscan en una copia reducida; el warp se hace sobre la imagen completa
+    pts = find_document_quad(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+    if pts is None:
+        return image
+    warped = _four_point_transform(image, pts)
+    if _is_reasonable_document(image, warped):
+        return warped
+    return image
 
 
 def _four_point_transform(image: np.ndarray, pts: np.ndarray) -> np.ndarray:
@@ -150,21 +362,6 @@ def _four_point_transform(image: np.ndarray, pts: np.ndarray) -> np.ndarray:
     return cv2.warpPerspective(image, matrix, (max_w, max_h))
 
 
-def _crop_roi(image: np.ndarray, roi: tuple[float, float, float, float]) -> np.ndarray:
-    x, y, w, h = roi
-    h_img, w_img = image.shape[0], image.shape[1]
-    x1 = int(max(0, min(1, x)) * w_img)
-    y1 = int(max(0, min(1, y)) * h_img)
-    x2 = int(max(0, min(1, x + w)) * w_img)
-    y2 = int(max(0, min(1, y + h)) * h_img)
-    if x2 <= x1 or y2 <= y1:
-        return image
-    crop = image[y1:y2, x1:x2]
-    if crop.shape[0] < 40 or crop.shape[1] < 80:
-        return image
-    return crop
-
-
 def _is_reasonable_document(original: np.ndarray, warped: np.ndarray) -> bool:
     h, w = warped.shape[0], warped.shape[1]
     if h < 300 or w < 400:
@@ -178,16 +375,6 @@ def _is_reasonable_document(original: np.ndarray, warped: np.ndarray) -> bool:
     return True
 
 
-def _upscale_if_needed(image: np.ndarray) -> np.ndarray:
-    h, w = image.shape[0], image.shape[1]
-    if h >= 900:
-        return image
-    scale = 2.0
-    new_w = int(w * scale)
-    new_h = int(h * scale)
-    return cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_CUBIC)
-
-
 def _binarize_strong(image: np.ndarray) -> np.ndarray:
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
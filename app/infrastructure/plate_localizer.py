@@ -0,0 +1,112 @@
+from typing import List
+
+import cv2
+import numpy as np
+
+_LOCALIZER_MAX_SIDE = 960
+# Placa ecuatoriana 404x154 mm (~2.6:1); la mancha puede ser la placa entera o solo la franja de caracteres
+_MIN_ASPECT = 1.6
+_MAX_ASPECT = 8.0
+_MIN_AREA_FRACTION = 0.0005
+_MAX_AREA_FRACTION = 0.2
+_MIN_EDGE_DENSITY = 0.1
+_MIN_GRADIENT_RATIO = 0.3
+# Los caracteres se cuentan sobre la franja llevada a esta altura
+_CHARACTER_BAND_HEIGHT = 48
+# Una placa tiene 6-7 caracteres; pocas regiones MSER con forma de letra descartan parrillas y textos sueltos
+_MIN_CHARACTERS = 3
+_MAX_CHARACTERS = 8
+# Recortes mas pequenos los adapters los tratan como "toda la imagen" (ver _crop_roi)
+_MIN_CROP_WIDTH = 96
+_MIN_CROP_HEIGHT = 48
+
+Region = tuple[float, float, float, float]
+
+
+def find_plate_regions(gray: np.ndarray, max_candidates: int = 3) -> List[Region]:
+    # Devuelve ROIs normalizadas (x, y, w, h) ordenadas de mas a menos probable
+    h, w = gray.shape[:2]
+    scale = min(1.0, _LOCALIZER_MAX_SIDE / max(h, w))
+    small = gray if scale == 1.0 else cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    sh, sw = small.shape[:2]
+
+    # Blackhat resalta caracteres oscuros sobre fondo claro; su gradiente horizontal marca la franja de la placa
+    kernel_w = max(13, sw // 70)
+    rect = cv2.getStructuringElement(cv2.MORPH_RECT, (kernel_w, max(5, kernel_w // 3)))
+    blackhat = cv2.morphologyEx(small, cv2.MORPH_BLACKHAT, rect)
+    grad = cv2.convertScaleAbs(cv2.Sobel(blackhat, cv2.CV_16S, 1, 0, ksize=3))
+    # Otsu solo no basta con fondos texturizados (asfalto, follaje): se exige parte del gradiente maximo
+    otsu, _ = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    _, edges = cv2.threshold(grad, max(otsu, _MIN_GRADIENT_RATIO * float(grad.max())), 255, cv2.THRESH_BINARY)
+    merged = cv2.morphologyEx(cv2.GaussianBlur(edges, (5, 5), 0), cv2.MORPH_CLOSE, rect)
+    _, merged = cv2.threshold(merged, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    # El fondo de la placa es claro: se descartan manchas sobre zonas oscuras
+    _, light = cv2.threshold(cv2.morphologyEx(small, cv2.MORPH_CLOSE, rect), 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    merged = cv2.bitwise_and(merged, light)
+    merged = cv2.morphologyEx(merged, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3)))
+    contours, _ = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    mser = cv2.MSER_create()
+    mser.setMinArea(30)
+    frame_area = float(sh * sw)
+    scored = []
+    for contour in contours:
+        x, y, cw, ch = cv2.boundingRect(contour)
+        area = cw * ch
+        if ch < 8 or not (_MIN_AREA_FRACTION <= area / frame_area <= _MAX_AREA_FRACTION):
+            continue
+        if not (_MIN_ASPECT <= cw / ch <= _MAX_ASPECT):
+            continue
+        density = float(np.count_nonzero(edges[y : y + ch, x : x + cw])) / area
+        if density < _MIN_EDGE_DENSITY:
+            continue
+        characters = _count_characters(mser, gray, (x / scale, y / scale, cw / scale, ch / scale))
+        if characters < _MIN_CHARACTERS:
+            continue
+        # 6-7 caracteres (mas el guion) es lo esperado; letreros con mas texto quedan detras
+        plate_like = 1.0 if characters <= _MAX_CHARACTERS else 0.5
+        scored.append((density * min(characters, _MAX_CHARACTERS) * plate_like, (x, y, cw, ch)))
+
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return [_ensure_min_size(_to_region(box, sw, sh), w, h) for _, box in scored[:max_candidates]]
+
+
+def _count_characters(mser, gray: np.ndarray, box: tuple[float, float, float, float]) -> int:
+    # Se mide sobre la imagen de trabajo: en la copia reducida las letras pueden medir pocos pixeles
+    x, y, w, h = box
+    pad = h * 0.35
+    y1, y2 = int(max(0, y - pad)), int(min(gray.shape[0], y + h + pad))
+    x1, x2 = int(max(0, x - pad)), int(min(gray.shape[1], x + w + pad))
+    factor = _CHARACTER_BAND_HEIGHT / max(h, 1.0)
+    crop = cv2.resize(gray[y1:y2, x1:x2], None, fx=factor, fy=factor, interpolation=cv2.INTER_LINEAR)
+    _, boxes = mser.detectRegions(crop)
+    seen = []
+    for bx, _, bw, bh in boxes:
+        # La franja puede ser la placa completa (letras ~1/3 de su altura) o solo el texto
+        if not (0.25 * _CHARACTER_BAND_HEIGHT <= bh <= 1.5 * _CHARACTER_BAND_HEIGHT) or not (1.0 <= bh / max(bw, 1) <= 8.0):
+            continue
+        # MSER devuelve regiones anidadas; se cuenta un caracter por posicion horizontal
+        center = bx + bw / 2
+        if all(abs(center - other) > bw * 0.5 for other in seen):
+            seen.append(center)
+    return len(seen)
+
+
+def _to_region(box: tuple[int, int, int, int], width: int, height: int) -> Region:
+    x, y, w, h = box
+    # Margen para no cortar el primer/ultimo caracter ni el borde de la placa
+    pad_x, pad_y = w * 0.15, h * 0.35
+    x1, y1 = max(0.0, x - pad_x), max(0.0, y - pad_y)
+    x2, y2 = min(float(width), x + w + pad_x), min(float(height), y + h + pad_y)
+    return x1 / width, y1 / height, (x2 - x1) / width, (y2 - y1) / height
+
+
+def _ensure_min_size(region: Region, width: int, height: int) -> Region:
+    # Agranda la ROI alrededor de su centro hasta el minimo que aceptan los adapters (en pixeles de trabajo)
+    x, y, w, h = region
+    need_w = min(1.0, max(w, _MIN_CROP_WIDTH / max(width, 1)))
+    need_h = min(1.0, max(h, _MIN_CROP_HEIGHT / max(height, 1)))
+    cx, cy = x + w / 2, y + h / 2
+    x1 = min(max(0.0, cx - need_w / 2), 1.0 - need_w)
+    y1 = min(max(0.0, cy - need_h / 2), 1.0 - need_h)
+    return x1, y1, need_w, need_h
@@ -0,0 +1,28 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    # Coalesce llamadas concurrentes con la misma clave; vive en el event loop de la API (sin locks)
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        task = self._calls.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield: si el cliente que inicio la llamada se desconecta, los demas siguen esperando
+        return await asyncio.shield(task), shared
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Marca la excepcion como leida aunque todos los clientes se hayan ido
+            task.exception()
@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import os
 import time
+from contextlib import asynccontextmanager
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -15,7 +17,7 @@ load_dotenv()
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routers.twilio import router as twilio_router
-from app.api.routers.ocr import router as ocr_router
+from app.api.routers.health import router as health_router
 from app.api.routers.qr import router as qr_router
 from app.api.routers.catalogo import router as catalogo_router
 from app.api.routers.acceso import router as acceso_router
@@ -34,8 +36,34 @@ def _configure_logging() -> None:
 _configure_logging()
 logger = logging.getLogger("app.http")
 
+# ENABLE_OCR=false permite desplegar la API liviana (reportes, catalogo, twilio) sin el stack OCR
+_OCR_ENABLED = os.getenv("ENABLE_OCR", "true").lower() in {"1", "true", "yes"}
+_ocr_import_start = time.perf_counter()
+if _OCR_ENABLED:
+    from app.api.routers import ocr as ocr_routes
+else:
+    ocr_routes = None
+logging.getLogger("app.boot").info(
+    "app_boot enable_ocr=%s ocr_router_import_ms=%.1f",
+    _OCR_ENABLED,
+    (time.perf_counter() - _ocr_import_start) * 1000,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ocr_routes is None:
+        yield
+        return
+    app.state.ocr_readiness = ocr_routes.ocr_readiness
+    # El calentamiento corre en segundo plano; /health/ready responde 503 hasta que termine
+    warmup_task = asyncio.create_task(ocr_routes.warm_up_ocr())
+    yield
+    warmup_task.cancel()
+    ocr_routes.ocr_pool.shutdown()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 
 def _parse_cors_allowed_origins(raw: Optional[str]) -> list[str]:
@@ -95,9 +123,11 @@ async def log_http_requests(request: Request, call_next):
     return response
 
 
+app.include_router(health_router)
 app.include_router(qr_router)
 
-app.include_router(ocr_router)
+if ocr_routes is not None:
+    app.include_router(ocr_routes.router)
 app.include_router(catalogo_router)
 app.include_router(twilio_router)
 app.include_router(acceso_router)
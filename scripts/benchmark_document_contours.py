@@ -0,0 +1,171 @@
+"""Compara la busqueda de bordes del documento a resolucion completa (ruta anterior)
+contra la busqueda sobre una copia reducida (find_document_quad).
+
+Uso:
+    python scripts/benchmark_document_contours.py fotos/           # corpus propio (jpg/png)
+    python scripts/benchmark_document_contours.py --synthetic 20   # cedulas sinteticas en perspectiva
+
+Reporta por imagen el tiempo de cada ruta, el error maximo entre esquinas y la diferencia
+media de pixeles entre ambos warps; al final, medianas, speedup y tasa de coincidencia.
+Con --synthetic tambien se conoce la posicion real de la tarjeta y se reporta el acierto de cada ruta.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.infrastructure.document_contour import find_document_quad, order_points  # noqa: E402
+
+# Coinciden si ninguna esquina se aleja mas de este porcentaje de la diagonal
+_AGREEMENT_PCT = 1.0
+
+
+def _legacy_find_quad(gray: np.ndarray):
+    blur = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(blur, 50, 150)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    contours = sorted(contours, key=cv2.contourArea, reverse=True)[:5]
+    for contour in contours:
+        peri = cv2.arcLength(contour, True)
+        approx = cv2.approxPolyDP(contour, 0.02 * peri, True)
+        if len(approx) == 4:
+            return order_points(approx.reshape(4, 2).astype("float32"))
+    return None
+
+
+def _warp(image: np.ndarray, pts: np.ndarray, size: tuple[int, int]) -> np.ndarray:
+    w, h = size
+    dst = np.array([[0, 0], [w - 1, 0], [w - 1, h - 1], [0, h - 1]], dtype="float32")
+    return cv2.warpPerspective(image, cv2.getPerspectiveTransform(pts, dst), (w, h))
+
+
+def _corner_error_pct(a: np.ndarray, b: np.ndarray, gray: np.ndarray) -> float:
+    diagonal = float(np.hypot(*gray.shape[:2]))
+    return float(np.max(np.linalg.norm(a - b, axis=1))) / diagonal * 100
+
+
+def _timed(fn, gray: np.ndarray, repeat: int):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(gray)
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times)
+
+
+def _synthetic_corpus(count: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    for idx in range(count):
+        canvas_w, canvas_h = [(4000, 3000), (3264, 2448), (1920, 1080), (1280, 720)][idx % 4]
+        background = rng.integers(40, 120, size=(canvas_h // 8, canvas_w // 8, 3), dtype=np.uint8)
+        image = cv2.resize(background, (canvas_w, canvas_h), interpolation=cv2.INTER_LINEAR)
+
+        card_w = int(canvas_w * rng.uniform(0.45, 0.75))
+        card_h = int(card_w / 1.585)
+        card = np.full((card_h, card_w, 3), (225, 220, 210), dtype=np.uint8)
+        for line in range(6):
+            y = int(card_h * (0.2 + line * 0.12))
+            cv2.putText(card, "APELLIDOS NOMBRES 1710034065", (int(card_w * 0.35), y),
+                        cv2.FONT_HERSHEY_SIMPLEX, card_h / 500, (30, 30, 30), max(1, card_h // 250))
+        cv2.rectangle(card, (int(card_w * 0.05), int(card_h * 0.2)), (int(card_w * 0.3), int(card_h * 0.8)),
+                      (90, 90, 90), -1)
+
+        cx, cy = canvas_w / 2, canvas_h / 2
+        jitter = card_w * 0.06
+        dst = np.array(
+            [
+                [cx - card_w / 2, cy - card_h / 2],
+                [cx + card_w / 2, cy - card_h / 2],
+                [cx + card_w / 2, cy + card_h / 2],
+                [cx - card_w / 2, cy + card_h / 2],
+            ],
+            dtype="float32",
+        ) + rng.uniform(-jitter, jitter, size=(4, 2)).astype("float32")
+        src = np.array([[0, 0], [card_w, 0], [card_w, card_h], [0, card_h]], dtype="float32")
+        matrix = cv2.getPerspectiveTransform(src, dst)
+        mask = cv2.warpPerspective(np.full((card_h, card_w), 255, np.uint8), matrix, (canvas_w, canvas_h))
+        warped = cv2.warpPerspective(card, matrix, (canvas_w, canvas_h))
+        image[mask > 0] = warped[mask > 0]
+        noise = rng.normal(0, 6, size=image.shape)
+        image = np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+        ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 88])
+        yield f"synthetic_{idx:03d}_{canvas_w}x{canvas_h}", cv2.imdecode(encoded, cv2.IMREAD_COLOR), order_points(dst)
+
+
+def _file_corpus(directory: str):
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        image = cv2.imread(os.path.join(directory, name), cv2.IMREAD_COLOR)
+        if image is not None:
+            yield name, image, None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="directorio con fotos de cedulas")
+    parser.add_argument("--synthetic", type=int, default=0, help="generar N imagenes sinteticas")
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por imagen (se usa la mediana)")
+    args = parser.parse_args()
+    if not args.corpus and not args.synthetic:
+        parser.error("indique un directorio o --synthetic N")
+
+    corpus = _file_corpus(args.corpus) if args.corpus else _synthetic_corpus(args.synthetic)
+    legacy_times, new_times, corner_errors = [], [], []
+    agreed = total = 0
+    hits = {"anterior": 0, "reducida": 0}
+    with_truth = 0
+    print(f"{'imagen':40} {'anterior_ms':>11} {'reducida_ms':>11} {'esquinas_%':>10} {'warp_mae':>8}")
+    for name, image, truth in corpus:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        legacy, legacy_ms = _timed(_legacy_find_quad, gray, args.repeat)
+        reduced, new_ms = _timed(find_document_quad, gray, args.repeat)
+        legacy_times.append(legacy_ms)
+        new_times.append(new_ms)
+        total += 1
+        if truth is not None:
+            with_truth += 1
+            for label, quad in (("anterior", legacy), ("reducida", reduced)):
+                if quad is not None and _corner_error_pct(quad, truth, gray) <= _AGREEMENT_PCT:
+                    hits[label] += 1
+
+        corner_pct = warp_mae = None
+        if legacy is None or reduced is None:
+            agree = legacy is None and reduced is None
+        else:
+            corner_pct = _corner_error_pct(legacy, reduced, gray)
+            corner_errors.append(corner_pct)
+            size = (int(np.linalg.norm(legacy[1] - legacy[0])), int(np.linalg.norm(legacy[3] - legacy[0])))
+            if size[0] > 1 and size[1] > 1:
+                diff = cv2.absdiff(_warp(gray, legacy, size), _warp(gray, reduced, size))
+                warp_mae = float(diff.mean())
+            agree = corner_pct <= _AGREEMENT_PCT
+        agreed += int(agree)
+        corner_txt = "-" if corner_pct is None else f"{corner_pct:.2f}"
+        mae_txt = "-" if warp_mae is None else f"{warp_mae:.1f}"
+        print(f"{name[:40]:40} {legacy_ms:11.1f} {new_ms:11.1f} {corner_txt:>10} {mae_txt:>8}")
+
+    if not total:
+        print("corpus vacio")
+        return
+    legacy_median = statistics.median(legacy_times)
+    new_median = statistics.median(new_times)
+    print()
+    print(f"imagenes={total} mediana_anterior_ms={legacy_median:.1f} mediana_reducida_ms={new_median:.1f} "
+          f"speedup={legacy_median / max(new_median, 1e-6):.1f}x")
+    worst = f"{max(corner_errors):.2f}" if corner_errors else "-"
+    print(f"coincidencia(<= {_AGREEMENT_PCT}% diagonal)={agreed}/{total} peor_error_esquinas_%={worst}")
+    if with_truth:
+        print(f"acierto_vs_real anterior={hits['anterior']}/{with_truth} reducida={hits['reducida']}/{with_truth}")
+
+
+if __name__ == "__main__":
+    main()
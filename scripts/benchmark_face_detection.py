@@ -0,0 +1,165 @@
+"""Compara la deteccion de rostros anterior (detectMultiScale a resolucion completa en las cuatro
+rotaciones) contra FaceDetector (copia reducida, orientacion EXIF primero y salida temprana).
+
+Uso:
+    python scripts/benchmark_face_detection.py fotos/              # corpus propio (jpg/png)
+    python scripts/benchmark_face_detection.py --synthetic 20      # rostros sinteticos en varios tamanos
+    python scripts/benchmark_face_detection.py --synthetic 20 --lbp lbpcascade_frontalface_improved.xml
+
+Reporta por imagen el tiempo de cada ruta y si encontro el rostro; al final, la mediana por
+tamano de imagen y el speedup. Con --synthetic se conoce el tamano real del rostro y solo cuenta
+como acierto un recorte de ese tamano (+-25%).
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.infrastructure.face_detection import FaceDetector  # noqa: E402
+
+_MARGIN = 0.2
+_SIZE_TOLERANCE = 0.25
+_SIZES = [(640, 480), (1280, 720), (1920, 1080), (3264, 2448), (4000, 3000)]
+
+
+def _legacy_crop(image: np.ndarray, cascade):
+    best_crop = None
+    best_area = 0
+    for rotated in (
+        image,
+        cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE),
+        cv2.rotate(image, cv2.ROTATE_180),
+        cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE),
+    ):
+        gray = cv2.cvtColor(rotated, cv2.COLOR_RGB2GRAY)
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(60, 60))
+        for (x, y, w, h) in faces:
+            if w * h > best_area:
+                best_area = w * h
+                pad_w, pad_h = int(w * _MARGIN), int(h * _MARGIN)
+                best_crop = rotated[max(y - pad_h, 0) : y + h + pad_h, max(x - pad_w, 0) : x + w + pad_w]
+    return best_crop
+
+
+def _timed(fn, image: np.ndarray, repeat: int):
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(image)
+        times.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(times)
+
+
+def _draw_face(size: int) -> np.ndarray:
+    # Caricatura con la distribucion de luces y sombras que buscan las cascadas frontales
+    face = np.full((size, size), 200, np.uint8)
+    c = size // 2
+    cv2.ellipse(face, (c, c), (int(size * 0.33), int(size * 0.43)), 0, 0, 360, 170, -1)
+    for side in (-1, 1):
+        ex = c + side * int(size * 0.14)
+        cv2.ellipse(face, (ex, int(size * 0.40)), (int(size * 0.08), int(size * 0.035)), 0, 0, 360, 40, -1)
+        cv2.line(face, (ex - int(size * 0.09), int(size * 0.33)), (ex + int(size * 0.09), int(size * 0.33)),
+                 60, max(2, size // 40))
+    cv2.line(face, (c, int(size * 0.45)), (c, int(size * 0.6)), 120, max(2, size // 50))
+    cv2.ellipse(face, (c, int(size * 0.72)), (int(size * 0.11), int(size * 0.03)), 0, 0, 360, 70, -1)
+    return cv2.GaussianBlur(face, (0, 0), size / 120)
+
+
+def _synthetic_corpus(count: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    for idx in range(count):
+        width, height = _SIZES[idx % len(_SIZES)]
+        background = rng.integers(60, 160, size=(height // 16, width // 16), dtype=np.uint8)
+        gray = cv2.resize(background, (width, height), interpolation=cv2.INTER_CUBIC)
+        side = int(min(width, height) * rng.uniform(0.2, 0.45))
+        x = int(rng.integers(0, width - side))
+        y = int(rng.integers(0, height - side))
+        gray[y : y + side, x : x + side] = _draw_face(side)
+        noise = rng.normal(0, 4, size=gray.shape)
+        gray = np.clip(gray.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+        image = cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)
+        # Una de cada cuatro llega de costado y sin EXIF (hay que probar las otras rotaciones)
+        if idx % 4 == 3:
+            image = cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)
+        yield f"synthetic_{idx:03d}_{width}x{height}", image, side
+
+
+def _file_corpus(directory: str):
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith((".jpg", ".jpeg", ".png")):
+            continue
+        image = cv2.imread(os.path.join(directory, name), cv2.IMREAD_COLOR)
+        if image is not None:
+            yield name, cv2.cvtColor(image, cv2.COLOR_BGR2RGB), None
+
+
+def _hit(crop, face_side) -> bool:
+    if crop is None:
+        return False
+    if face_side is None:
+        return True
+    expected = face_side * (1 + 2 * _MARGIN)
+    return abs(max(crop.shape[:2]) / expected - 1) <= _SIZE_TOLERANCE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="directorio con fotos (selfies, cedulas)")
+    parser.add_argument("--synthetic", type=int, default=0, help="generar N imagenes sinteticas")
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones por imagen (se usa la mediana)")
+    parser.add_argument("--lbp", help="ruta a una cascada LBP para medirla tambien")
+    args = parser.parse_args()
+    if not args.corpus and not args.synthetic:
+        parser.error("indique un directorio o --synthetic N")
+
+    legacy_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+    paths = {"anterior": lambda image: _legacy_crop(image, legacy_cascade)}
+    detector = FaceDetector(cascade_path="")
+    paths["piramide"] = lambda image: detector.crop(image, _MARGIN)
+    if args.lbp:
+        lbp = FaceDetector(cascade_path=args.lbp)
+        if lbp.kind != "lbp":
+            parser.error(f"no se pudo cargar la cascada {args.lbp}")
+        paths["lbp"] = lambda image: lbp.crop(image, _MARGIN)
+
+    corpus = _file_corpus(args.corpus) if args.corpus else _synthetic_corpus(args.synthetic)
+    times = {label: defaultdict(list) for label in paths}
+    hits = {label: 0 for label in paths}
+    total = 0
+    print(f"{'imagen':36} " + " ".join(f"{label + '_ms':>12} {'ok':>3}" for label in paths))
+    for name, image, face_side in corpus:
+        total += 1
+        size = f"{max(image.shape[:2])}px"
+        row = []
+        for label, fn in paths.items():
+            crop, ms = _timed(fn, image, args.repeat)
+            times[label][size].append(ms)
+            hit = _hit(crop, face_side)
+            hits[label] += int(hit)
+            row.append(f"{ms:12.1f} {'si' if hit else 'no':>3}")
+        print(f"{name[:36]:36} " + " ".join(row))
+
+    if not total:
+        print("corpus vacio")
+        return
+    print()
+    print(f"{'lado_mayor':>10} " + " ".join(f"{label + '_ms':>12}" for label in paths) + f" {'speedup':>8}")
+    for size in sorted(times["anterior"], key=lambda key: int(key[:-2])):
+        medians = {label: statistics.median(times[label][size]) for label in paths}
+        speedup = medians["anterior"] / max(medians["piramide"], 1e-6)
+        print(f"{size:>10} " + " ".join(f"{medians[label]:12.1f}" for label in paths) + f" {speedup:7.1f}x")
+    print()
+    print("aciertos " + " ".join(f"{label}={hits[label]}/{total}" for label in paths))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Mide el throughput de OpenCvFaceAdapter.extract_face con 1, 4 y 8 requests concurrentes.
+
+Compara dos variantes sobre las mismas fotos:
+    serializada  una sola cascada compartida, protegida con un lock (lo seguro antes del pool por hilo)
+    por_hilo     cada hilo usa su propia cascada (FaceDetector.cascade)
+
+Uso:
+    python scripts/benchmark_face_throughput.py                      # 48 fotos sinteticas de 1280x720
+    python scripts/benchmark_face_throughput.py fotos/ --cv-threads 1 --cv-threads 4
+
+--cv-threads fija cv2.setNumThreads para cada corrida (como FACE_DETECT_THREADS); sin el flag
+se usa el valor por defecto de OpenCV. Reporta requests/s y latencias p50/p95 por variante.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.infrastructure.face_adapter import OpenCvFaceAdapter  # noqa: E402
+from app.infrastructure.face_detection import FaceDetector  # noqa: E402
+from benchmark_face_detection import _draw_face  # noqa: E402
+
+_CONCURRENCY = (1, 4, 8)
+
+
+class _SerializedDetector(FaceDetector):
+    def __init__(self):
+        super().__init__(threads=None)
+        self._shared = cv2.CascadeClassifier(self.cascade_path)
+        self._lock = threading.Lock()
+
+    @property
+    def cascade(self):
+        return self._shared
+
+    def _detect(self, gray, min_face):
+        with self._lock:
+            return super()._detect(gray, min_face)
+
+
+def _synthetic_photos(count: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    photos = []
+    for _ in range(count):
+        background = rng.integers(60, 160, size=(720 // 16, 1280 // 16), dtype=np.uint8)
+        gray = cv2.resize(background, (1280, 720), interpolation=cv2.INTER_CUBIC)
+        side = int(720 * rng.uniform(0.25, 0.5))
+        x, y = int(rng.integers(0, 1280 - side)), int(rng.integers(0, 720 - side))
+        gray[y : y + side, x : x + side] = _draw_face(side)
+        _, encoded = cv2.imencode(".jpg", cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        photos.append(encoded.tobytes())
+    return photos
+
+
+def _file_photos(directory: str):
+    photos = []
+    for name in sorted(os.listdir(directory)):
+        if name.lower().endswith((".jpg", ".jpeg", ".png")):
+            with open(os.path.join(directory, name), "rb") as handle:
+                photos.append(handle.read())
+    return photos
+
+
+def _run(adapter: OpenCvFaceAdapter, photos: list[bytes], concurrency: int):
+    latencies = []
+    found = 0
+
+    def task(image_bytes: bytes):
+        start = time.perf_counter()
+        face = adapter.extract_face(image_bytes)
+        return (time.perf_counter() - start) * 1000, face is not None
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # Calienta una cascada por hilo antes de medir
+        list(executor.map(task, photos[:concurrency]))
+        start = time.perf_counter()
+        for latency, ok in executor.map(task, photos):
+            latencies.append(latency)
+            found += int(ok)
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    return len(photos) / elapsed, statistics.median(latencies), p95, found
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", nargs="?", help="directorio con fotos (selfies, cedulas)")
+    parser.add_argument("--count", type=int, default=48, help="fotos sinteticas si no hay corpus")
+    parser.add_argument("--cv-threads", type=int, action="append", help="valor de cv2.setNumThreads (repetible)")
+    args = parser.parse_args()
+
+    photos = _file_photos(args.corpus) if args.corpus else _synthetic_photos(args.count)
+    if not photos:
+        print("corpus vacio")
+        return
+    print(f"fotos={len(photos)} nucleos={os.cpu_count()}")
+    print(f"{'cv_threads':>10} {'concurrencia':>12} {'variante':>12} {'req/s':>8} {'p50_ms':>8} {'p95_ms':>8} {'rostros':>8}")
+    for cv_threads in args.cv_threads or [None]:
+        if cv_threads is not None:
+            cv2.setNumThreads(cv_threads)
+        label = "defecto" if cv_threads is None else str(cv_threads)
+        for concurrency in _CONCURRENCY:
+            for variant in ("serializada", "por_hilo"):
+                adapter = OpenCvFaceAdapter()
+                if variant == "serializada":
+                    adapter._detector = _SerializedDetector()
+                rps, p50, p95, found = _run(adapter, photos, concurrency)
+                print(f"{label:>10} {concurrency:>12} {variant:>12} {rps:8.1f} {p50:8.1f} {p95:8.1f} "
+                      f"{found:>4}/{len(photos)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.infrastructure.document_orientation import deskew, estimate_skew
+
+
+def _text_page() -> np.ndarray:
+    page = np.full((600, 900), 255, dtype=np.uint8)
+    for line in range(8):
+        cv2.putText(page, "REPUBLICA DEL ECUADOR 1710034065", (40, 60 + line * 65), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 3)
+    return page
+
+
+def _rotate(image: np.ndarray, degrees: float) -> np.ndarray:
+    matrix = cv2.getRotationMatrix2D((image.shape[1] / 2, image.shape[0] / 2), degrees, 1.0)
+    return cv2.warpAffine(image, matrix, (image.shape[1], image.shape[0]), borderValue=255)
+
+
+@pytest.mark.parametrize("degrees", [-7.0, 3.0, 5.0])
+def test_estimate_skew_measures_counterclockwise_tilt(degrees):
+    assert estimate_skew(_rotate(_text_page(), degrees)) == pytest.approx(degrees, abs=0.5)
+
+
+def test_deskew_straightens_text_lines():
+    tilted = _rotate(_text_page(), 5.0)
+    straight, rotated = deskew(tilted, estimate_skew(tilted))
+    assert rotated
+    assert abs(estimate_skew(straight)) < 0.5
+
+
+def test_deskew_ignores_small_large_and_unknown_angles():
+    page = _text_page()
+    for angle in (None, 0.2, 30.0):
+        result, rotated = deskew(page, angle)
+        assert result is page and not rotated
+
+
+def test_estimate_skew_needs_text_lines():
+    assert estimate_skew(np.full((400, 600), 255, dtype=np.uint8)) is None
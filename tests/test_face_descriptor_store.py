@@ -0,0 +1,28 @@
+import time
+
+from app.domain.face import FaceTemplate
+from app.infrastructure.in_memory_face_descriptor_store import InMemoryFaceDescriptorStore
+
+
+def test_stored_template_keeps_crop_and_descriptor_together():
+    store = InMemoryFaceDescriptorStore(max_entries=4, ttl_seconds=60)
+    template = FaceTemplate(image=b"recorte-1", descriptor=object())
+    store.put("1710034065", template)
+    stored = store.get("1710034065")
+    assert stored.image == b"recorte-1"
+    assert stored.descriptor is template.descriptor
+
+
+def test_entries_expire_and_evict_lru():
+    store = InMemoryFaceDescriptorStore(max_entries=1, ttl_seconds=0.05)
+    store.put("a", FaceTemplate(image=b"a", descriptor=1))
+    assert store.put("b", FaceTemplate(image=b"b", descriptor=2)) == 1
+    assert store.get("a") is None
+    time.sleep(0.06)
+    assert store.get("b") is None
+
+
+def test_disabled_store_keeps_nothing():
+    store = InMemoryFaceDescriptorStore(max_entries=0, ttl_seconds=60)
+    assert store.put("a", FaceTemplate(image=b"a", descriptor=1)) == 0
+    assert store.get("a") is None
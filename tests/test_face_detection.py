@@ -0,0 +1,65 @@
+import cv2
+import numpy as np
+import pytest
+
+from app.infrastructure.face_detection import FaceDetector, _unrotate_box
+
+_WIDTH, _HEIGHT = 200, 120
+
+
+class _ScriptedDetector(FaceDetector):
+    # Devuelve una deteccion fija por rotacion, en el orden en que crop las prueba
+    def __init__(self, results):
+        super().__init__(cascade_path="", max_side=0, confident_neighbors=12, threads=None)
+        self._results = list(results)
+        self.calls = 0
+
+    def _detect(self, gray, min_face):
+        result = self._results[self.calls]
+        self.calls += 1
+        return result
+
+
+@pytest.mark.parametrize(
+    "rotation",
+    [None, cv2.ROTATE_90_CLOCKWISE, cv2.ROTATE_180, cv2.ROTATE_90_COUNTERCLOCKWISE],
+)
+def test_unrotate_box_maps_back_to_original(rotation):
+    image = np.zeros((_HEIGHT, _WIDTH), dtype=np.uint8)
+    image[30:50, 120:160] = 255
+    rotated = image if rotation is None else cv2.rotate(image, rotation)
+    ys, xs = np.nonzero(rotated)
+    box = (int(xs.min()), int(ys.min()), int(xs.max() - xs.min() + 1), int(ys.max() - ys.min() + 1))
+    assert _unrotate_box(box, rotation, _WIDTH, _HEIGHT) == (120, 30, 40, 20)
+
+
+def test_upright_face_beats_larger_rotated_hit():
+    image = np.zeros((_HEIGHT, _WIDTH, 3), dtype=np.uint8)
+    detector = _ScriptedDetector([
+        ((10, 10, 30, 30), 6),
+        ((0, 0, 110, 110), 6),
+        None,
+        ((0, 0, 100, 100), 4),
+    ])
+    crop = detector.crop(image, margin=0.0)
+    assert crop.shape[:2] == (30, 30)
+    assert detector.calls == 4
+
+
+def test_rotation_with_more_neighbors_wins():
+    image = np.zeros((_HEIGHT, _WIDTH, 3), dtype=np.uint8)
+    detector = _ScriptedDetector([
+        ((10, 10, 30, 30), 5),
+        ((0, 0, 50, 50), 8),
+        None,
+        None,
+    ])
+    crop = detector.crop(image, margin=0.0)
+    assert crop.shape[:2] == (50, 50)
+
+
+def test_confident_upright_detection_skips_other_rotations():
+    image = np.zeros((_HEIGHT, _WIDTH, 3), dtype=np.uint8)
+    detector = _ScriptedDetector([((10, 10, 30, 30), 12)])
+    assert detector.crop(image, margin=0.0).shape[:2] == (30, 30)
+    assert detector.calls == 1
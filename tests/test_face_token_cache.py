@@ -0,0 +1,33 @@
+import time
+
+from app.domain.face import FaceTemplate
+from app.infrastructure.in_memory_face_token_cache import InMemoryFaceTokenCache
+
+
+def _template(tag: bytes) -> FaceTemplate:
+    return FaceTemplate(image=tag, descriptor=None)
+
+
+def test_token_is_reusable_within_ttl():
+    cache = InMemoryFaceTokenCache(max_entries=4, ttl_seconds=60)
+    token = cache.put(_template(b"a"))
+    assert cache.get(token).image == b"a"
+    assert cache.get(token).image == b"a"
+    assert cache.get("desconocido") is None
+
+
+def test_expired_tokens_are_counted_on_get_and_purge():
+    cache = InMemoryFaceTokenCache(max_entries=4, ttl_seconds=0.05)
+    used = cache.put(_template(b"a"))
+    cache.put(_template(b"b"))
+    time.sleep(0.06)
+    assert cache.get(used) is None
+    assert cache.stats() == {"size": 0, "expired": 2, "evicted": 0}
+
+
+def test_lru_evictions_are_counted():
+    cache = InMemoryFaceTokenCache(max_entries=1, ttl_seconds=60)
+    first = cache.put(_template(b"a"))
+    cache.put(_template(b"b"))
+    assert cache.get(first) is None
+    assert cache.stats() == {"size": 1, "expired": 0, "evicted": 1}
@@ -0,0 +1,48 @@
+import cv2
+import numpy as np
+
+from app.infrastructure.frame_burst import frame_sharpness, split_mjpeg, subsample_frames
+
+
+def _jpeg(image: np.ndarray) -> bytes:
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    assert ok
+    return encoded.tobytes()
+
+
+def _textured(seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, size=(160, 240), dtype=np.uint8)
+
+
+def test_split_mjpeg_returns_each_frame():
+    frames = [_jpeg(_textured(seed)) for seed in range(3)]
+    clip = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n".join([b""] + frames) + b"--frame--"
+    assert split_mjpeg(clip) == frames
+
+
+def test_split_mjpeg_keeps_embedded_thumbnail_inside_frame():
+    thumbnail = _jpeg(_textured(7)[:16, :16])
+    outer = _jpeg(_textured(8))
+    # Miniatura dentro de un segmento APP1 (EXIF) del cuadro principal
+    frame = outer[:2] + b"\xff\xe1\x00\x08Exif\x00\x00" + thumbnail + outer[2:]
+    assert split_mjpeg(frame + outer) == [frame, outer]
+
+
+def test_split_mjpeg_ignores_truncated_tail():
+    frame = _jpeg(_textured(1))
+    assert split_mjpeg(frame + frame[: len(frame) // 2]) == [frame]
+
+
+def test_frame_sharpness_orders_blurred_below_sharp():
+    sharp = _textured(2)
+    blurred = cv2.GaussianBlur(sharp, (0, 0), 4)
+    assert frame_sharpness(_jpeg(sharp)) > frame_sharpness(_jpeg(blurred))
+    assert frame_sharpness(b"no es jpeg") == -1.0
+
+
+def test_subsample_frames_spreads_over_clip():
+    frames = [bytes([idx]) for idx in range(40)]
+    picked = subsample_frames(frames, 8)
+    assert picked == [bytes([idx]) for idx in range(0, 40, 5)]
+    assert subsample_frames(frames[:5], 8) == frames[:5]
@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+from app.infrastructure.image_quality import ImageQualityGate
+
+
+def _jpeg(image: np.ndarray) -> bytes:
+    ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+    assert ok
+    return encoded.tobytes()
+
+
+def _textured(height: int, width: int, low: int, high: int, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(low, high, size=(height, width), dtype=np.uint8)
+
+
+def _cedula_on_bright_desk() -> bytes:
+    # Cedula nitida y bien expuesta sobre un fondo quemado (ventana, mesa blanca)
+    frame = np.full((750, 1000), 255, dtype=np.uint8)
+    frame[150:600, 200:800] = _textured(450, 600, 60, 200)
+    cv2.rectangle(frame, (200, 150), (799, 599), 0, 4)
+    return _jpeg(frame)
+
+
+def _gate(**overrides) -> ImageQualityGate:
+    params = dict(
+        mode="true",
+        min_sharpness=40,
+        scene_min_sharpness=20,
+        face_min_sharpness=10,
+        min_brightness=45,
+        max_brightness=225,
+        max_glare=0.05,
+    )
+    params.update(overrides)
+    return ImageQualityGate(**params)
+
+
+def test_default_mode_rejects(monkeypatch):
+    monkeypatch.delenv("OCR_QUALITY_GATE", raising=False)
+    gate = ImageQualityGate()
+    assert gate.enabled
+    assert gate.enforcing
+    assert not ImageQualityGate(mode="report").enforcing
+
+
+def test_document_glare_is_measured_inside_the_card():
+    report = _gate().check(_cedula_on_bright_desk(), "document")
+    assert report.ok, report.metrics
+    assert report.metrics["glare_ratio"] < 0.05
+    assert 0.3 < report.metrics["document_area"] < 0.45
+
+
+def test_scene_measures_the_whole_frame():
+    report = _gate().check(_cedula_on_bright_desk(), "scene")
+    assert report.metrics["glare_ratio"] > 0.5
+    assert "document_area" not in report.metrics
+
+
+def test_document_without_contour_uses_whole_frame():
+    frame = np.full((600, 800), 255, dtype=np.uint8)
+    report = _gate().check(_jpeg(frame), "document")
+    assert report.code == "IMAGE_OVEREXPOSED"
+
+
+def test_face_skips_exposure_and_glare():
+    # Selfie a contraluz: oscura pero enfocada
+    face = _textured(300, 300, 0, 60)
+    gate = _gate()
+    assert gate.check(_jpeg(face), "face").ok
+    assert not gate.check(_jpeg(face), "scene").ok
+
+
+def test_face_rejects_blurry_crop():
+    face = cv2.GaussianBlur(_textured(200, 200, 80, 160), (0, 0), 8)
+    report = _gate().check(_jpeg(face), "face")
+    assert report.code == "IMAGE_BLURRY"
+
+
+def test_unreadable_bytes():
+    assert _gate().check(b"no es una imagen", "face").code == "IMAGE_UNREADABLE"
@@ -0,0 +1,44 @@
+from app.infrastructure.ocr_engine_router import OcrEngineRouter, classify_request
+
+_ENGINES = ["paddle", "easyocr"]
+
+
+def test_classify_request_uses_format_and_size():
+    assert classify_request("cedula", b"\xff\xd8\xff" + b"0" * 10) == "cedula:jpeg:small"
+    assert classify_request("placa", b"\x89PNG\r\n\x1a\n" + b"0" * 1_000_000) == "placa:png:large"
+
+
+def _feed(router, engine, runs, latency_ms, successes):
+    for idx in range(runs):
+        router.record("cedula:jpeg:small", engine, latency_ms, idx < successes)
+
+
+def test_default_order_until_enough_samples():
+    router = OcrEngineRouter(epsilon=0.0, min_samples=5, window=1000)
+    _feed(router, "paddle", 5, 900, 5)
+    _feed(router, "easyocr", 4, 100, 4)
+    assert router.choose("cedula:jpeg:small", _ENGINES) == "paddle"
+
+
+def test_chooses_lower_expected_cost():
+    router = OcrEngineRouter(epsilon=0.0, min_samples=5, window=1000)
+    _feed(router, "paddle", 10, 900, 10)
+    _feed(router, "easyocr", 10, 100, 10)
+    assert router.choose("cedula:jpeg:small", _ENGINES) == "easyocr"
+
+
+def test_failures_add_fallback_cost():
+    router = OcrEngineRouter(epsilon=0.0, min_samples=5, window=1000)
+    # easyocr es rapido pero casi siempre falla y termina pagando tambien paddle
+    _feed(router, "paddle", 10, 300, 10)
+    _feed(router, "easyocr", 10, 100, 1)
+    assert router.choose("cedula:jpeg:small", _ENGINES) == "paddle"
+
+
+def test_merge_accumulates_and_window_halves_counters():
+    router = OcrEngineRouter(epsilon=0.0, min_samples=1, window=10)
+    snapshot = {"placa:jpeg:small": {"paddle": {"runs": 8, "successes": 8, "total_ms": 800.0}}}
+    router.merge(snapshot)
+    router.merge(snapshot)
+    stats = router.snapshot()["placa:jpeg:small"]["paddle"]
+    assert stats == {"runs": 8.0, "successes": 8.0, "total_ms": 800.0}
@@ -0,0 +1,90 @@
+import asyncio
+import os
+
+from app.api import ocr_runtime
+from app.infrastructure.ocr_engine_readiness import OcrEngineReadiness
+from app.infrastructure.ocr_worker_pool import OcrWorkerPool
+
+_READY = {"paddle": {"ready": True, "load_ms": 10.0}, "easyocr": {"ready": True, "load_ms": 20.0}}
+
+
+def test_ready_only_when_every_expected_worker_reported():
+    readiness = OcrEngineReadiness()
+    readiness.record({101: _READY}, expected_workers=2)
+    assert not readiness.is_ready()
+    readiness.record({101: _READY, 102: _READY}, expected_workers=2)
+    assert readiness.is_ready()
+    assert set(readiness.snapshot()["workers"]) == {"101", "102"}
+
+
+def test_failed_attempt_keeps_warming_until_final():
+    readiness = OcrEngineReadiness()
+    failed = {"paddle": {"ready": False, "error": "sin modelos"}, "easyocr": {"ready": True}}
+    readiness.record({101: failed}, expected_workers=1, final=False)
+    snapshot = readiness.snapshot()
+    assert snapshot["warming"] and snapshot["workers"]["101"]["paddle"] is False
+    # Un reintento exitoso reemplaza al intento fallido
+    readiness.record({101: _READY}, expected_workers=1, final=False)
+    assert readiness.is_ready()
+    assert readiness.snapshot()["attempts"] == 2
+
+
+def test_final_failure_is_not_ready_and_reset_warms_again():
+    readiness = OcrEngineReadiness()
+    readiness.record({101: {"paddle": {"ready": False}}}, expected_workers=1)
+    assert not readiness.is_ready() and not readiness.snapshot()["warming"]
+    readiness.reset()
+    assert readiness.snapshot()["warming"] and readiness.snapshot()["engines"] == {}
+
+
+def _warmup():
+    return _READY
+
+
+def test_pool_warm_up_reports_by_pid_and_reset_notifies():
+    pool = OcrWorkerPool(workers=0, queue_size=1, warmup=_warmup)
+    resets = []
+    pool.on_reset = lambda: resets.append(pool.generation)
+    try:
+        assert asyncio.run(pool.warm_up()) == {os.getpid(): _READY}
+        pool._reset_executor()
+        assert resets == [1]
+    finally:
+        pool.shutdown()
+
+
+class _FlakyAdapter:
+    name = "paddle"
+    load_stats: dict = {}
+
+    def __init__(self):
+        self.calls = 0
+
+    def warm_up(self):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("descarga fallida")
+
+
+class _ReadyAdapter:
+    name = "easyocr"
+    load_stats: dict = {}
+
+    def __init__(self):
+        self.calls = 0
+
+    def warm_up(self):
+        self.calls += 1
+
+
+def test_warm_up_engines_retries_only_failed_engine(monkeypatch):
+    flaky, ready = _FlakyAdapter(), _ReadyAdapter()
+    monkeypatch.setattr(ocr_runtime, "_adapter", flaky)
+    monkeypatch.setattr(ocr_runtime, "_fallback_adapter", ready)
+    monkeypatch.setattr(ocr_runtime, "_warm_report", None)
+    assert ocr_runtime.warm_up_engines()["paddle"]["ready"] is False
+    report = ocr_runtime.warm_up_engines()
+    assert report["paddle"]["ready"] and report["easyocr"]["ready"]
+    assert (flaky.calls, ready.calls) == (2, 1)
+    ocr_runtime.warm_up_engines()
+    assert (flaky.calls, ready.calls) == (2, 1)
@@ -0,0 +1,139 @@
+import time
+
+import numpy as np
+
+from app.application.services.ocr_service import OcrService
+from app.application.dtos.responses.general_response import GeneralResponse
+from app.domain.ocr import OcrLine, OcrResult, PreparedImage
+from app.infrastructure.image_hash import dhash, hamming_distance
+from app.infrastructure.in_memory_ocr_result_cache import InMemoryOcrResultCache
+
+_CEDULA_A = "1710034065"
+_CEDULA_B = "0912345675"
+
+
+def test_dhash_is_stable_and_hamming_counts_bits():
+    gray = np.tile(np.arange(64, dtype=np.uint8) * 4, (48, 1))
+    assert dhash(gray) == dhash(gray.copy())
+    assert hamming_distance(0b1011, 0b0001) == 2
+
+
+def test_exact_entries_expire_after_ttl():
+    cache = InMemoryOcrResultCache(max_entries=4, ttl_seconds=0.05, max_distance=-1)
+    cache.put("cedula", "sha", None, "valor")
+    assert cache.get_exact("cedula", "sha") == "valor"
+    time.sleep(0.06)
+    assert cache.get_exact("cedula", "sha") is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = InMemoryOcrResultCache(max_entries=2, ttl_seconds=60, max_distance=-1)
+    cache.put("placa", "a", None, 1)
+    cache.put("placa", "b", None, 2)
+    cache.get_exact("placa", "a")
+    assert cache.put("placa", "c", None, 3) == 1
+    assert cache.get_exact("placa", "b") is None
+    assert cache.get_exact("placa", "a") == 1
+
+
+def test_similar_lookup_respects_distance_and_operation():
+    cache = InMemoryOcrResultCache(max_entries=4, ttl_seconds=60, max_distance=2)
+    cache.put("cedula", "a", 0b1111, "cedula")
+    assert cache.get_similar("cedula", 0b1100) == "cedula"
+    assert cache.get_similar("cedula", 0b0000) is None
+    assert cache.get_similar("placa", 0b1111) is None
+
+
+def test_similar_lookup_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("OCR_CACHE_PHASH_MAX_DISTANCE", raising=False)
+    cache = InMemoryOcrResultCache(max_entries=4, ttl_seconds=60)
+    cache.put("cedula", "a", 0b1111, "cedula")
+    assert cache.get_similar("cedula", 0b1111) is None
+
+
+class _CedulaPort:
+    # Lee siempre la misma cedula y devuelve un fingerprint fijo (el de la foto "parecida")
+    name = "paddle"
+
+    def __init__(self, cedula: str, fingerprint: int):
+        self.cedula = cedula
+        self.fingerprint = fingerprint
+
+    def prepare_image(self, image_bytes, preprocess_mode=None):
+        return PreparedImage(image=image_bytes, preprocess_mode=preprocess_mode, fingerprint=self.fingerprint)
+
+    def extract_text_passes(self, image, passes):
+        return [OcrResult(text=self.cedula, lines=[OcrLine(self.cedula, 0.9, [])]) for _ in passes]
+
+
+def _cached_service(port):
+    cache = InMemoryOcrResultCache(max_entries=8, ttl_seconds=60, max_distance=10)
+    cached = GeneralResponse(
+        success=True,
+        message="Cedula procesada",
+        data={"cedula": _CEDULA_A, "es_cedula": True, "nombres": "PEREZ JUAN"},
+    )
+    # Otra foto (otro SHA-256) con un dHash a 3 bits del de la foto nueva
+    cache.put("cedula", "otra-foto", port.fingerprint ^ 0b111, cached)
+    return OcrService(port=port, cache=cache)
+
+
+def test_near_duplicate_of_another_cedula_is_not_served_from_cache():
+    port = _CedulaPort(_CEDULA_B, fingerprint=1 << 200)
+    response = _cached_service(port).extraer_cedula(b"foto-de-otra-persona")
+    assert response.data["cedula"] == _CEDULA_B
+
+
+def test_near_duplicate_with_matching_nui_is_served_from_cache():
+    port = _CedulaPort(_CEDULA_A, fingerprint=1 << 200)
+    response = _cached_service(port).extraer_cedula(b"otra-toma-de-la-misma-cedula")
+    assert response.data["nombres"] == "PEREZ JUAN"
+
+
+class _PlacaPort:
+    name = "paddle"
+
+    def __init__(self, placa, fingerprint, regions):
+        self.placa = placa
+        self.fingerprint = fingerprint
+        self.regions = regions
+        self.passes = []
+
+    def prepare_image(self, image_bytes, preprocess_mode=None):
+        return PreparedImage(
+            image=image_bytes,
+            preprocess_mode=preprocess_mode,
+            fingerprint=self.fingerprint,
+            regions=list(self.regions),
+        )
+
+    def extract_text_passes(self, image, passes):
+        self.passes.append(len(passes))
+        return [OcrResult(text=self.placa, lines=[OcrLine(self.placa, 0.9, [])]) for _ in passes]
+
+
+def _cached_placa_service(port):
+    cache = InMemoryOcrResultCache(max_entries=8, ttl_seconds=60, max_distance=10)
+    cached = GeneralResponse(success=True, message="Placa procesada", data={"placa": "ABC-1234"})
+    # Cuadro anterior de la misma camara fija, a 2 bits del nuevo
+    cache.put("placa", "vehiculo-anterior", port.fingerprint ^ 0b11, cached)
+    return OcrService(port=port, cache=cache)
+
+
+def test_near_duplicate_frame_of_another_vehicle_is_not_served_from_cache():
+    port = _PlacaPort("GBC-5678", fingerprint=1 << 100, regions=[(0.3, 0.6, 0.3, 0.1)])
+    response = _cached_placa_service(port).extraer_placa(b"siguiente-vehiculo")
+    assert response.data == {"placa": "GBC-5678"}
+
+
+def test_near_duplicate_frame_with_matching_plate_is_served_from_cache():
+    port = _PlacaPort("ABC-1234", fingerprint=1 << 100, regions=[(0.3, 0.6, 0.3, 0.1)])
+    response = _cached_placa_service(port).extraer_placa(b"otra-toma")
+    assert response.message == "Placa procesada"
+    assert port.passes == [1]
+
+
+def test_near_duplicate_frame_without_plate_candidates_is_not_served():
+    port = _PlacaPort("GBC-5678", fingerprint=1 << 100, regions=[])
+    response = _cached_placa_service(port).extraer_placa(b"sin-candidatos")
+    assert response.data == {"placa": "GBC-5678"}
@@ -0,0 +1,61 @@
+import os
+
+# El router abre la base y arma el pool al importarse: sin base real y sin procesos worker
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("OCR_WORKERS", "0")
+os.environ.setdefault("OCR_WARMUP", "false")
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.api.routers import ocr as ocr_routes  # noqa: E402
+from app.infrastructure.image_quality import ImageQualityGate  # noqa: E402
+from app.infrastructure.ocr_worker_pool import OcrPoolSaturatedError  # noqa: E402
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.include_router(ocr_routes.router)
+    return TestClient(app)
+
+
+def _blurry_jpeg() -> bytes:
+    rng = np.random.default_rng(4)
+    gray = cv2.GaussianBlur(rng.integers(80, 180, size=(600, 800), dtype=np.uint8), (0, 0), 10)
+    ok, encoded = cv2.imencode(".jpg", gray)
+    assert ok
+    return encoded.tobytes()
+
+
+def _post_cedula(client: TestClient):
+    return client.post("/ocr/cedula", files={"file": ("cedula.jpg", _blurry_jpeg(), "image/jpeg")})
+
+
+def test_blurry_cedula_is_rejected_with_quality_code(monkeypatch):
+    monkeypatch.delenv("OCR_QUALITY_GATE", raising=False)
+    monkeypatch.setattr(ocr_routes, "_quality_gate", ImageQualityGate())
+
+    async def _no_ocr(*args, **kwargs):
+        raise AssertionError("una foto rechazada no debe llegar al pool")
+
+    monkeypatch.setattr(ocr_routes, "_run_ocr_job", _no_ocr)
+    response = _post_cedula(_client())
+
+    assert response.status_code == 422
+    body = response.json()
+    assert body["error"]["code"] == "IMAGE_BLURRY"
+    assert body["error"]["details"]["sharpness"] < 40
+
+
+def test_report_mode_lets_the_photo_through(monkeypatch):
+    monkeypatch.setattr(ocr_routes, "_quality_gate", ImageQualityGate(mode="report"))
+
+    async def _saturated(*args, **kwargs):
+        raise OcrPoolSaturatedError(retry_after=1)
+
+    monkeypatch.setattr(ocr_routes, "_run_ocr_job", _saturated)
+    response = _post_cedula(_client())
+
+    assert response.status_code == 503
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from app.application.services.ocr_service import OcrService
+from app.domain.ocr import OcrLine, OcrResult, PreparedImage
+from app.infrastructure.ocr_worker_pool import OcrWorkerPool
+
+
+class _SlowPort:
+    # Cuenta llamadas simultaneas al motor, que en produccion no es seguro entre hilos
+    def __init__(self, name: str, text: str, delay: float):
+        self.name = name
+        self.text = text
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.passes = 0
+        self._lock = threading.Lock()
+
+    def prepare_image(self, image_bytes, preprocess_mode=None):
+        return PreparedImage(image=image_bytes, preprocess_mode=preprocess_mode)
+
+    def extract_text_passes(self, image, passes):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.passes += 1
+        try:
+            time.sleep(self.delay)
+            return [OcrResult(text=self.text, lines=[OcrLine(self.text, 0.9, [])]) for _ in passes]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _service(primary, fallback):
+    return OcrService(port=primary, fallback_port=fallback, hedge_delay_ms=0)
+
+
+def test_hedge_returns_without_waiting_for_the_loser():
+    primary = _SlowPort("paddle", "ABC-1234", 0.0)
+    fallback = _SlowPort("easyocr", "", 0.3)
+
+    start = time.perf_counter()
+    response = _service(primary, fallback).extraer_placa(b"foto", spare_capacity=True)
+
+    assert response.data == {"placa": "ABC-1234"}
+    assert time.perf_counter() - start < 0.2
+    # El perdedor termina su etapa en segundo plano
+    assert fallback.active == 1
+    time.sleep(0.4)
+    assert fallback.active == 0
+
+
+def test_consecutive_hedged_jobs_never_overlap_on_one_engine():
+    primary = _SlowPort("paddle", "ABC-1234", 0.0)
+    fallback = _SlowPort("easyocr", "", 0.1)
+    service = _service(primary, fallback)
+
+    for idx in range(3):
+        service.extraer_placa(b"foto-%d" % idx, spare_capacity=True)
+    time.sleep(0.4)
+
+    assert fallback.max_active == 1
+    assert primary.max_active == 1
+
+
+def test_cancelled_plate_loser_skips_the_full_frame_pass():
+    primary = _SlowPort("paddle", "ABC-1234", 0.05)
+    fallback = _SlowPort("easyocr", "", 0.2)
+    fallback.prepare_image = lambda image_bytes, preprocess_mode=None: PreparedImage(
+        image=image_bytes, preprocess_mode=preprocess_mode, regions=[(0.1, 0.1, 0.5, 0.2)]
+    )
+
+    _service(primary, fallback).extraer_placa(b"foto", spare_capacity=True)
+    time.sleep(0.3)
+
+    # Solo la pasada de recortes; el cuadro completo se omite al ver la cancelacion
+    assert fallback.passes == 1
+
+
+def test_spare_capacity_counts_the_job_being_submitted():
+    assert not OcrWorkerPool(workers=0, queue_size=1).has_spare_capacity()
+    pool = OcrWorkerPool(workers=2, queue_size=1)
+    assert pool.has_spare_capacity()
+    pool._in_flight = 1
+    assert not pool.has_spare_capacity()
+
+
+class _RecordingRouter:
+    def __init__(self):
+        self.records = []
+
+    def record(self, request_class, engine, latency_ms, success):
+        self.records.append((engine, success))
+
+
+def test_only_primary_position_runs_feed_the_router():
+    primary = _SlowPort("paddle", "", 0.0)
+    fallback = _SlowPort("easyocr", "ABC-1234", 0.0)
+    router = _RecordingRouter()
+    service = OcrService(port=primary, fallback_port=fallback, engine_stats=router, hedge_delay_ms=0)
+
+    response = service.extraer_placa(b"foto")
+
+    assert response.data == {"placa": "ABC-1234"}
+    assert router.records == [("paddle", False)]
@@ -0,0 +1,52 @@
+import subprocess
+import sys
+import textwrap
+
+_SCRIPT = textwrap.dedent(
+    """
+    import asyncio
+    from app.infrastructure.ocr_worker_pool import OcrWorkerPool
+
+    async def main():
+        pool = OcrWorkerPool(workers=1, queue_size=1, threads_per_worker=1)
+        pool.shm_min_bytes = 1024
+        try:
+            sizes = [await pool.run("builtins:len", b"x" * 4096) for _ in range(3)]
+        finally:
+            pool.shutdown()
+        print(sizes, pool.stats()["shm_jobs"])
+
+    asyncio.run(main())
+    """
+)
+
+
+def test_shared_memory_payloads_reach_the_worker_without_leak_warnings():
+    completed = subprocess.run(
+        [sys.executable, "-c", _SCRIPT], capture_output=True, text=True, timeout=120
+    )
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "[4096, 4096, 4096] 3"
+    assert "leaked shared_memory" not in completed.stderr
+    assert "No such file" not in completed.stderr
+
+
+def test_attaching_in_the_worker_leaves_tracking_to_the_owner(monkeypatch):
+    from multiprocessing import resource_tracker, shared_memory
+
+    from app.infrastructure.ocr_worker_pool import SharedBytesHandle, _read_shared_bytes
+
+    calls = []
+    monkeypatch.setattr(resource_tracker, "register", lambda name, rtype: calls.append(("register", name)))
+    monkeypatch.setattr(resource_tracker, "unregister", lambda name, rtype: calls.append(("unregister", name)))
+    owner = shared_memory.SharedMemory(create=True, size=16)
+    try:
+        owner.buf[:5] = b"placa"
+        calls.clear()
+        assert _read_shared_bytes(SharedBytesHandle(name=owner.name, size=5)) == b"placa"
+        registered = sum(1 for kind, _ in calls if kind == "register")
+        unregistered = sum(1 for kind, _ in calls if kind == "unregister")
+        assert registered == unregistered
+    finally:
+        owner.close()
+        owner.unlink()
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from app.domain.ocr import OcrPass, PreparedImage
+from app.infrastructure.paddle_ocr_adapter import PaddleOcrAdapter
+
+# Cada caja de texto se pinta con su propio valor; un texto "invertido" lleva la marca en la mitad
+# de abajo y solo se lee con confianza despues del clasificador de angulo (que lo gira 180 grados)
+_BOXES = [(10, 10, 1), (10, 60, 2), (10, 110, 3), (10, 160, 4)]
+_BOX_W, _BOX_H = 120, 30
+
+
+def _page(inverted: set[int] = frozenset()) -> np.ndarray:
+    image = np.zeros((220, 200, 3), dtype=np.uint8)
+    for x, y, value in _BOXES:
+        half = _BOX_H // 2
+        top = y + half if value in inverted else y
+        image[top : top + half, x : x + _BOX_W] = value * 40
+    return image
+
+
+def _quad(x: int, y: int) -> list:
+    return [[x, y], [x + _BOX_W, y], [x + _BOX_W, y + _BOX_H], [x, y + _BOX_H]]
+
+
+class _PaddleOcr27:
+    # Copia el comportamiento de PaddleOCR 2.7: una lista se trata como paginas y page_num se
+    # queda con el largo de la primera lista recibida
+    def __init__(self, use_angle_cls: bool = True):
+        self.use_angle_cls = use_angle_cls
+        self.page_num = 0
+        self.rec_calls = 0
+
+    def ocr(self, img, det=True, rec=True, cls=True):
+        if isinstance(img, list):
+            if self.page_num > len(img) or self.page_num == 0:
+                self.page_num = len(img)
+            imgs = img[: self.page_num]
+        else:
+            imgs = [img]
+        if det and not rec:
+            return [[_quad(x, y) for x, y, _ in _BOXES] for _ in imgs]
+        results = []
+        for page in imgs:
+            if not isinstance(page, list):
+                page = [page]
+            if self.use_angle_cls and cls:
+                page, _, _ = self._classify(page)
+            rec_res, _ = self._recognize(page)
+            results.append(rec_res)
+        return results
+
+    def _classify(self, crops):
+        rotated = [crop if crop[1, 1].any() else np.rot90(crop, 2) for crop in crops]
+        return rotated, [("0", 0.9)] * len(crops), 0.0
+
+    def _recognize(self, crops):
+        self.rec_calls += 1
+        results = []
+        for crop in crops:
+            value = int(crop.max()) // 40
+            results.append((f"T{value}", 0.95 if crop[1, 1].any() else 0.3))
+        return results, 0.0
+
+
+class _PaddleOcr27Pipeline(_PaddleOcr27):
+    # El objeto real expone el reconocedor y el clasificador del pipeline
+    @property
+    def text_recognizer(self):
+        return self._recognize
+
+    @property
+    def text_classifier(self):
+        return self._classify
+
+
+def _adapter(engine, angle: str) -> PaddleOcrAdapter:
+    adapter = PaddleOcrAdapter(use_angle_cls=angle == "true")
+    adapter.angle_mode = angle
+    adapter._ocr = engine
+    return adapter
+
+
+@pytest.mark.parametrize("engine_cls", [_PaddleOcr27Pipeline, _PaddleOcr27])
+def test_every_box_is_recognized(engine_cls):
+    engine = engine_cls()
+    adapter = _adapter(engine, "false")
+    # Una llamada previa con una sola imagen deja page_num=1 en 2.7
+    engine.ocr([_page()[0:40, 0:140]], det=False, cls=False)
+    prepared = PreparedImage(image=_page(), color="bgr")
+    result = adapter.extract_text_passes(prepared, [OcrPass()])[0]
+    assert [line.text for line in result.lines] == ["T1", "T2", "T3", "T4"]
+
+
+@pytest.mark.parametrize("engine_cls", [_PaddleOcr27Pipeline, _PaddleOcr27])
+def test_angle_retry_recovers_each_inverted_box(engine_cls):
+    adapter = _adapter(engine_cls(), "auto")
+    prepared = PreparedImage(image=_page(inverted={2, 4}), color="bgr")
+    result = adapter.extract_text_passes(prepared, [OcrPass()])[0]
+    assert [line.text for line in result.lines] == ["T1", "T2", "T3", "T4"]
+    assert all(line.confidence == pytest.approx(0.95) for line in result.lines)
+    assert prepared.stats["paddle_angle_cls"] == {"crops": 4, "retried": 2, "recovered": 2}
+
+
+def test_mismatched_batch_length_raises():
+    class _Short(_PaddleOcr27Pipeline):
+        def _recognize(self, crops):
+            results, elapse = super()._recognize(crops)
+            return results[:1], elapse
+
+    adapter = _adapter(_Short(), "false")
+    with pytest.raises(RuntimeError):
+        adapter.extract_text_passes(PreparedImage(image=_page(), color="bgr"), [OcrPass()])
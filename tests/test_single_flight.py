@@ -0,0 +1,78 @@
+import asyncio
+
+from app.infrastructure.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "resultado"
+
+        first = asyncio.create_task(flight.run("clave", work))
+        second = asyncio.create_task(flight.run("clave", work))
+        await asyncio.sleep(0)
+        assert flight.in_flight() == 1
+        release.set()
+        results = await asyncio.gather(first, second)
+        return calls, results, flight.in_flight()
+
+    calls, results, in_flight = asyncio.run(scenario())
+    assert calls == 1
+    assert sorted(results, key=lambda item: item[1]) == [("resultado", False), ("resultado", True)]
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately_and_later_calls_rerun():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work(tag):
+            calls.append(tag)
+            return tag
+
+        await asyncio.gather(flight.run("a", lambda: work("a")), flight.run("b", lambda: work("b")))
+        await flight.run("a", lambda: work("a"))
+        return calls
+
+    assert asyncio.run(scenario()) == ["a", "b", "a"]
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 42
+
+        leader = asyncio.create_task(flight.run("clave", work))
+        follower = asyncio.create_task(flight.run("clave", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+        return await follower
+
+    assert asyncio.run(scenario()) == (42, True)
+
+
+def test_errors_reach_every_caller():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0)
+            raise RuntimeError("fallo")
+
+        return await asyncio.gather(flight.run("k", work), flight.run("k", work), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)